@@ -4,18 +4,28 @@ import streamlit_option_menu
 from streamlit_option_menu import option_menu
 
 # Import de Funções da Pasta utils/
-from utils.pipeline_export import process_file
-from utils.pipeline_import import process_file_import
-from utils.functions import format_number, converte_csv, mensagem_sucesso
-from utils.db_queries import get_last_15_years_data_export, get_last_15_years_data_import
+from utils.pipeline_export import export_type, process_file
+from utils.pipeline_import import import_type, process_file_import
+from utils.functions import download_concluido, format_number, salvar_lote, salvar_streaming
+from utils.database import get_engine, pool_metrics
+from utils.data_layer import load_datasets, ranking_index, year_bounds
+from utils.db_queries import ANOS_ANALISE
+from utils.batch_ingest import process_uploaded_files
+from utils.incremental import incremental_state
+from utils.filters import dataset_key, filter_table
+from utils.exports import FORMATOS, export_file, export_path
+from utils.analytics import complementary_analyses, peak_explanation
+from utils.ranking import rank_countries, country_totals, yearly_values
+from utils.charts import bar_chart, line_chart, render_chart
+from utils.table_view import paginated_table
+from utils.tasks import pending_tasks, show_notifications, submit_task, task_monitor
+from utils import perf
 
 # Outras bibliotecas
-from sqlalchemy import create_engine
-from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
+import os
 import time
 import pandas as pd
-import plotly.express as px
 
 # Configuração inicial do App
 st.set_page_config(
@@ -34,21 +44,36 @@ with st.sidebar:
         default_index=0
     )
 
-# Configuração do Banco de Dados PostgreSQl
-db_url = st.secrets["DB_URL"]
-engine = create_engine(db_url)
+# Medição das etapas desta execução (painel de Performance)
+perf.start_run(option)
 
+# Notificações das tarefas concluídas e espaço na barra lateral para o acompanhamento das tarefas em segundo plano
+show_notifications()
+area_tarefas = st.sidebar.container()
 
-# Consulta SQL Tabela: export_vinho
-df_export = get_last_15_years_data_export(engine)
-
-# Consulta SQL Tabela: import_vinho
-df_import = get_last_15_years_data_import(engine)
+# Configuração do Banco de Dados PostgreSQl (engine única por processo)
+engine = get_engine()
 
 ### Página Analytics ###
 if option == 'Analytics':
     st.title('Data Analytics')
 
+    # Janela de análise (em anos, a partir do ano mais recente), limitada ao histórico disponível nas tabelas
+    periodos = [p for p in (year_bounds('export_vinho'), year_bounds('import_vinho')) if p is not None]
+    historico = max([fim - inicio for inicio, fim in periodos] + [ANOS_ANALISE])
+    with st.sidebar:
+        janela = st.slider('Janela de análise (anos)', 1, historico, ANOS_ANALISE, help='Número de anos carregados nos dashboards e na Tabela.')
+
+    # Os dados são carregados somente na página Analytics, com as consultas em paralelo (em cache entre os reruns)
+    with st.spinner('Carregando dados...'):
+        dados = load_datasets('export', 'import', 'export_resumo', 'import_resumo', anos=janela)
+
+    # Tabelas export_vinho e import_vinho (Tabelas) e tabelas de resumo (Ano, País, Tipo) utilizadas pelos dashboards
+    df_export = dados['export']
+    df_import = dados['import']
+    df_export_resumo = dados['export_resumo']
+    df_import_resumo = dados['import_resumo']
+
     ### Abas: Exportação e Importação ###
     tab1, tab2 = st.tabs(['Exportação', 'Importação'])
 
@@ -67,7 +92,7 @@ if option == 'Analytics':
                         number_paises = st.number_input('Número de países a serem análisados', min_value=2, max_value=15, value=5, help='Selecionar o número de Países que serão análisados: de 2 a 15.')
                     with col2:
                         # Filtro de Tipos
-                        tipos_disponiveis = df_export['Tipo'].dropna().unique()
+                        tipos_disponiveis = df_export_resumo['Tipo'].dropna().unique()
                         tipo_selecionado = st.multiselect(
                             "Selecione o(s) Tipo(s):",
                             options=tipos_disponiveis,
@@ -77,33 +102,20 @@ if option == 'Analytics':
                         # Filtro de Período
                         year = st.slider(
                             "Selecione um Período de Anos",
-                            df_export['Ano'].min(),
-                            df_export['Ano'].max(),
-                            (df_export['Ano'].min(), df_export['Ano'].max()),
+                            df_export_resumo['Ano'].min(),
+                            df_export_resumo['Ano'].max(),
+                            (df_export_resumo['Ano'].min(), df_export_resumo['Ano'].max()),
                             key="year_slider"
                         )
                 
-                # Aplicar filtros no DataFrame: df_export
-                df_filtered = df_export[
-                    (df_export['Ano'] >= year[0]) & 
-                    (df_export['Ano'] <= year[1]) &
-                    (df_export['Tipo'].isin(tipo_selecionado))
-                ]
+                # Índice de ranking (somas acumuladas Tipo x Ano x País), construído uma vez por versão dos dados
+                indice = ranking_index(dataset_key(df_export_resumo), df_export_resumo)
 
                 # Filtrar os países com maior valor dentro do intervalo e tipo selecionados
-                top_countries = (
-                    df_filtered.groupby('País')['Valor']
-                    .sum()
-                    .nlargest(number_paises)
-                    .index
-                )
-                df_filtered = df_filtered[df_filtered['País'].isin(top_countries)]
+                top_countries = rank_countries(indice, tipo_selecionado, year, number_paises)
 
-                # Groupby dos dados por Ano e País
-                df_export_agg = (
-                    df_filtered.groupby(['Ano', 'País'], as_index=False)['Valor']
-                    .sum()
-                )
+                # Valor por Ano e País dos países selecionados
+                df_export_agg = yearly_values(indice, tipo_selecionado, year, top_countries, 'Valor')
 
                 # Ano de início e ano final de análise
                 start_year, end_year = year
@@ -136,74 +148,30 @@ if option == 'Analytics':
                     unsafe_allow_html=True
                 )
 
-                #### Criação dos Gráficos ####
+                #### Criação dos Gráficos (em cache pelos dados agregados e parâmetros) ####
                 # Gráfico de barras: Valor
-                df_valor_pais = (
-                    df_filtered.groupby('País', as_index=False)['Valor']
-                    .sum()
-                    .nlargest(number_paises, 'Valor')
-                )
+                df_valor_pais = country_totals(indice, tipo_selecionado, year, top_countries, 'Valor')
 
-                # Ordemm com base no valor
-                country_order_valor = df_valor_pais.sort_values('Valor', ascending=False)['País'].tolist()
-
-                fig_valor_pais = px.bar(
-                    df_valor_pais,
-                    x='Valor',
-                    y='País',
-                    text_auto='.2s',
-                    title=f"Valor (US$): Top {number_paises} Países",
-                    color_discrete_sequence=['#F1145C'],
-                    category_orders={"País": country_order_valor},
-                    hover_data={'País': True, 'Valor': ':.2f'},
-                    height=500 + (number_paises - 5) * 50
-                )
+                fig_valor_pais = bar_chart(df_valor_pais, 'Valor', f"Valor (US$): Top {number_paises} Países", number_paises)
 
                 # Gráfico de barras: Quantidade
-                df_quant_pais = (
-                    df_filtered.groupby('País', as_index=False)['Quantidade']
-                    .sum()
-                    .nlargest(number_paises, 'Quantidade')
-                )
+                df_quant_pais = country_totals(indice, tipo_selecionado, year, top_countries, 'Quantidade')
 
-                # Ordem com base na quantidade
-                country_order_quant = df_quant_pais.sort_values('Quantidade', ascending=False)['País'].tolist()
-
-                fig_quant_pais = px.bar(
-                    df_quant_pais,
-                    x='Quantidade',
-                    y='País',
-                    text_auto='.2s',
-                    title=f"Quantidade Total (L): Top {number_paises} Países",
-                    color_discrete_sequence=['#F1145C'],
-                    category_orders={"País": country_order_quant},
-                    hover_data={'País': True, 'Quantidade': ':.2f'},
-                    height=500 + (number_paises - 5) * 50
-                )
+                fig_quant_pais = bar_chart(df_quant_pais, 'Quantidade', f"Quantidade Total (L): Top {number_paises} Países", number_paises)
 
                 # Gráfico de linhas: Valor por Ano
-                fig_valor_ano_pais = px.line(
-                    df_export_agg,
-                    x='Ano',
-                    y='Valor',
-                    color='País',
-                    range_y=(df_export_agg['Valor'].min() - 1000000, df_export_agg['Valor'].max() + 1000000),
-                    markers=True,
-                    title=f"Valor por Ano (US$): Top {number_paises} Países",
-                    color_discrete_sequence=px.colors.qualitative.Set1,
-                    hover_data={'Ano': True, 'Valor': ':.2f'}
-                )
+                fig_valor_ano_pais = line_chart(df_export_agg, f"Valor por Ano (US$): Top {number_paises} Países")
 
                 # Exibição dos Gráficos
                 col1, col2 = st.columns(2)
                 with col1:
                     st.metric(f'💵 Valor Total (US$): Top {number_paises} Países', format_number(df_valor_pais['Valor'].sum()))
-                    st.plotly_chart(fig_valor_pais, use_container_width=True)
+                    render_chart(fig_valor_pais)
                 with col2:
                     st.metric(f'🍷 Quantidade Total (L): Top {number_paises} Países', format_number(df_quant_pais['Quantidade'].sum()))
-                    st.plotly_chart(fig_quant_pais, use_container_width=True)
+                    render_chart(fig_quant_pais)
 
-                st.plotly_chart(fig_valor_ano_pais, use_container_width=True)
+                render_chart(fig_valor_ano_pais)
 
                 st.divider()
 
@@ -215,221 +183,151 @@ if option == 'Analytics':
                     unsafe_allow_html=True
                 )
 
-                # Análise do Custo Unitário Médio Total de Exportação de Vinho
-                if not df_export.empty:
-                    df_export_valid = df_export[df_export['Quantidade'] > 0].copy()
-                    df_export_valid['Custo Unitário Médio'] = df_export_valid['Valor'] / df_export_valid['Quantidade']
+                # Análises complementares calculadas em uma única passada sobre o agregado (utils/analytics.py)
+                analises = complementary_analyses(df_export_resumo)
 
-                    # Custo unitário médio total
-                    custo_unitario_medio_total = (
-                        df_export_valid['Valor'].sum() / df_export_valid['Quantidade'].sum()
-                        if df_export_valid['Quantidade'].sum() > 0 else 0
-                    )
-
-                    # Custo unitário médio por tipo
-                    custo_unitario_por_tipo = (
-                        df_export_valid.groupby('Tipo', as_index=False)
-                        .apply(lambda x: (x['Valor'].sum() / x['Quantidade'].sum()) if x['Quantidade'].sum() > 0 else 0)
-                    )
-                    custo_unitario_por_tipo.columns = ['Tipo', 'Custo Unitário Médio']
-
-                    # Exibição dos resultados
+                if analises is not None:
+                    # Custo Unitário Médio Total de Exportação de Vinho
                     st.expander("Custo Unitário Médio Total de Exportação de Vinho (US$/L)").markdown(
                         f"""
                         **Custo Unitário Médio Total de Exportação de Vinho (US$/L):** 
-                        {custo_unitario_medio_total:,.2f} 
+                        {analises['custo_unitario_total']:,.2f} 
                         """
                     )
 
+                    # Custo Unitário Médio por Tipo
                     st.expander("Custo Unitário Médio por Tipo de Vinho (US$/L)").markdown(
-                        "\n".join([f"- **{row['Tipo']}:** {row['Custo Unitário Médio']:,.2f} US$/L" for _, row in custo_unitario_por_tipo.iterrows()])
+                        "\n".join([f"- **{row['Tipo']}:** {row['Custo Unitário Médio']:,.2f} US$/L" for _, row in analises['custo_unitario_por_tipo'].iterrows()])
                     )
+
+                    # Análise do Pico de Exportação
+                    st.expander("Análise de Pico de Exportação").markdown(peak_explanation(analises['pico'], 'export'))
+
+                    # Análise dos 3 Principais Exportadores de Vinho do Brasil nos Últimos 5 Anos
+                    with st.expander("Top 3 Exportadores de Vinho do Brasil nos Últimos 5 Anos"):
+                        st.markdown("**Top 3 Exportadores de Vinho do Brasil nos Últimos 5 Anos:**")
+                        for _, row in analises['top'].iterrows():
+                            st.markdown(
+                                f"- **{row['País']}:** Valor exportado: **{row['Valor']:,.2f}**, Quantidade exportada: **{row['Quantidade']:,.2f}** litros"
+                            )
+
+                        # Custo unitário médio total dos últimos 5 anos para os 3 principais exportadores
+                        st.markdown("**Análise do Custo Unitário Médio dos 3 Principais Exportadores nos Últimos 5 Anos:**")
+                        for _, row in analises['top'].iterrows():
+                            st.markdown(f"**{row['País']}:**")
+                            st.markdown(f"  - **Custo Unitário Médio Total (últimos 5 anos):** {row['Custo Unitário Médio']:,.2f} US$/L")
                 else:
                     st.warning("Não há dados disponíveis para realizar esta análise.")
 
-                # Análise do Pico de Exportação
-                df_export_valid['Ano'] = df_export_valid['Ano'].astype(int)
-                pico_exportacao = (
-                    df_export_valid.groupby(['País', 'Ano'])[['Valor', 'Quantidade']]
-                    .sum()
-                    .reset_index()
-                    .sort_values(by='Valor', ascending=False)
-                    .iloc[0]
-                )
-                pais_pico = pico_exportacao['País']
-                ano_pico = pico_exportacao['Ano']
-                valor_pico = pico_exportacao['Valor']
-                quantidade_pico = pico_exportacao['Quantidade']
-
-                # Custo unitário no ano de pico
-                custo_unitario_pico = valor_pico / quantidade_pico
-
-                # Custo unitário no ano anterior
-                df_ano_anterior = df_export_valid[(df_export_valid['País'] == pais_pico) & (df_export_valid['Ano'] == (ano_pico - 1))]
-                if not df_ano_anterior.empty:
-                    valor_ano_anterior = df_ano_anterior['Valor'].sum()
-                    quantidade_ano_anterior = df_ano_anterior['Quantidade'].sum()
-                    custo_unitario_ano_anterior = valor_ano_anterior / quantidade_ano_anterior
-                else:
-                    custo_unitario_ano_anterior = None
+        # Exportação: Sessão Tables
+        with sub_tab2:
+            # Modo paginado: histórico completo consultado no banco, uma página por vez
+            modo_paginado = st.toggle('Histórico completo (tabela paginada no banco)', key='paginado_export', help='Consulta o histórico completo diretamente no banco, uma página por vez.')
+            if modo_paginado:
+                paginated_table('export_vinho', 'export')
+            else:
+                # Filtros
+                with st.expander('Filtros'):
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        pais = st.multiselect('Selecione um país', pd.Series(df_export['País'].unique()).sort_values(ascending=True))
+                    with col2:
+                        tipo = st.multiselect('Selecione os tipos', pd.Series(df_export['Tipo'].unique()).sort_values(ascending=True))
+                    with col3:
+                        year = st.slider('Selecione um Período de Anos', 
+                                        df_export['Ano'].min(), 
+                                        df_export['Ano'].max(), 
+                                        (df_export['Ano'].min(), df_export['Ano'].max()))
 
-                # Explicação do Pico
-                explicacao_pico = (
-                    f"O país **{pais_pico}** registrou o maior pico de exportação de vinho no ano **{ano_pico}**, com um valor total exportado de **{valor_pico:,.2f}** e um volume de **{quantidade_pico:,.2f}** litros. O custo unitário médio no ano de pico foi **{custo_unitario_pico:,.2f}**."
-                )
+                # Aplicando os filtros no DataFrame: df_export
+                # (resultado em cache LRU pela seleção normalizada de países, tipos e período)
+                df_filtrado = filter_table(df_export, pais, tipo, year)
 
-                # Comparação com o ano anterior
-                if custo_unitario_ano_anterior is not None:
-                    explicacao_pico += (
-                        f" No ano anterior (**{ano_pico - 1}**), o custo unitário médio foi **{custo_unitario_ano_anterior:,.2f}**. "
-                    )
-                    if custo_unitario_pico > custo_unitario_ano_anterior:
-                        explicacao_pico += (
-                            "O aumento no custo unitário médio pode indicar uma exportação de vinhos de maior valor agregado no ano do pico."
-                        )
-                    elif custo_unitario_pico < custo_unitario_ano_anterior:
-                        explicacao_pico += (
-                            "A redução no custo unitário médio sugere que o aumento no valor exportado foi impulsionado principalmente pelo volume."
-                        )
-                else:
-                    explicacao_pico += (
-                        f" Não há dados disponíveis para o ano anterior (**{ano_pico - 1}**) para comparação."
+                # Ano de início e ano final de análise
+                start_year, end_year = year
+
+                # Subtítulo do dashboard
+                st.markdown(
+                        f"""
+                        <h3> Análise de Exportação de Vinhos:
+                        <span style="color:#F1145C;"></span>
+                        </h3>
+                        """,
+                        unsafe_allow_html=True
                     )
 
-                # Exibição dos resultados
-                st.expander("Análise de Pico de Exportação").markdown(explicacao_pico)
-
-                # Análise dos 3 Principais Exportadores de Vinho do Brasil nos Últimos 5 Anos
-                df_export_valid_ultimos_5_anos = df_export_valid[df_export_valid['Ano'] >= (df_export_valid['Ano'].max() - 5)]
-                top_3_exportadores = (
-                    df_export_valid_ultimos_5_anos.groupby('País')
-                    .agg({'Valor': 'sum', 'Quantidade': 'sum'})
-                    .reset_index()
-                    .sort_values(by='Valor', ascending=False)
-                    .head(3)
-                )
+                # País de origem
+                st.markdown(
+                        f"""
+                        <p style="font-size:20px;">País de Origem: 
+                        <span style="color:#F1145C;">Brasil</span></p>
+                        """,
+                        unsafe_allow_html=True
+                    )
 
-                # Exibição do Top 3 Exportadores
-                with st.expander("Top 3 Exportadores de Vinho do Brasil nos Últimos 5 Anos"):
-                    st.markdown("**Top 3 Exportadores de Vinho do Brasil nos Últimos 5 Anos:**")
-                    for _, row in top_3_exportadores.iterrows():
-                        st.markdown(
-                            f"- **{row['País']}:** Valor exportado: **{row['Valor']:,.2f}**, Quantidade exportada: **{row['Quantidade']:,.2f}** litros"
-                        )
+                # Período Analisado
+                st.markdown(
+                        f"""
+                        <p style="font-size:18px;">Período Analisado: 
+                        <span style="color:#F1145C;">{start_year} - {end_year}</span></p>
+                        """,
+                        unsafe_allow_html=True
+                    )    
 
-                    # Custo unitário médio total dos últimos 5 anos para os 3 principais exportadores
-                    st.markdown("**Análise do Custo Unitário Médio dos 3 Principais Exportadores nos Últimos 5 Anos:**")
-                    for _, row in top_3_exportadores.iterrows():
-                        df_export_pais = df_export_valid_ultimos_5_anos[df_export_valid_ultimos_5_anos['País'] == row['País']]
-                        custo_unitario_pais = df_export_pais['Valor'].sum() / df_export_pais['Quantidade'].sum() if df_export_pais['Quantidade'].sum() > 0 else 0
+                # Valor Total e Quantidade Total
+                total_quantity = df_filtrado["Quantidade"].sum()
+                total_value = df_filtrado["Valor"].sum()
 
-                        st.markdown(f"**{row['País']}:**")
-                        st.markdown(f"  - **Custo Unitário Médio Total (últimos 5 anos):** {custo_unitario_pais:,.2f} US$/L")           
+                # Formatação Valor Total e Quantidade Total
+                quantidade_formatada = format_number(total_quantity)
+                valor_formatado = format_number(total_value)
 
-        # Exportação: Sessão Tables
-        with sub_tab2:
-            # Filtros
-            with st.expander('Filtros'):
-                col1, col2, col3 = st.columns(3)
+                # Exibição dos Valores Totais
+                col1, col2 = st.columns(2)
                 with col1:
-                    pais = st.multiselect('Selecione um país', pd.Series(df_export['País'].unique()).sort_values(ascending=True))
+                    col1.metric("💵 Valor Total (US$)", valor_formatado)
                 with col2:
-                    tipo = st.multiselect('Selecione os tipos', pd.Series(df_export['Tipo'].unique()).sort_values(ascending=True))
-                with col3:
-                    year = st.slider('Selecione um Período de Anos', 
-                                    df_export['Ano'].min(), 
-                                    df_export['Ano'].max(), 
-                                    (df_export['Ano'].min(), df_export['Ano'].max()))
-
-            # Aplicando os filtros no DataFrame: df_export
-            df_filtrado = df_export.copy()
-
-            if pais:
-                df_filtrado = df_filtrado[df_filtrado['País'].isin(pais)]
-            if tipo:
-                df_filtrado = df_filtrado[df_filtrado['Tipo'].isin(tipo)]
-            if year:
-                df_filtrado = df_filtrado[
-                    (df_filtrado['Ano'] >= year[0]) & (df_filtrado['Ano'] <= year[1])
-                ]
-
-            # Ano de início e ano final de análise
-            start_year, end_year = year
-
-            # Subtítulo do dashboard
-            st.markdown(
-                    f"""
-                    <h3> Análise de Exportação de Vinhos:
-                    <span style="color:#F1145C;"></span>
-                    </h3>
-                    """,
-                    unsafe_allow_html=True
-                )
-
-            # País de origem
-            st.markdown(
-                    f"""
-                    <p style="font-size:20px;">País de Origem: 
-                    <span style="color:#F1145C;">Brasil</span></p>
-                    """,
-                    unsafe_allow_html=True
-                )
-
-            # Período Analisado
-            st.markdown(
+                    col2.metric("🍷 Quantidade Total (L)", quantidade_formatada)
+
+                # Exibição da tabela
+                if not df_filtrado.empty:
+                    st.dataframe(
+                        df_filtrado,
+                        hide_index=True,
+                        width=2000,
+                        column_config={
+                            'Quantidade': st.column_config.NumberColumn('Quantidade (L)', format='%.2f'),
+                            'Valor': st.column_config.NumberColumn('Valor (US$)', format='%.2f'),
+                            'Ano': st.column_config.NumberColumn('Ano', format='%d')
+                        }
+                    )
+                else:
+                    st.warning("Nenhum resultado encontrado para os filtros aplicados.")
+            
+                # Número de linhas da tabela (Dinâmico a partir dos filtros aplicados)
+                st.markdown(
                     f"""
-                    <p style="font-size:18px;">Período Analisado: 
-                    <span style="color:#F1145C;">{start_year} - {end_year}</span></p>
-                    """,
+                    <p>A tabela possui <span style="color:#F1145C;">{df_filtrado.shape[0]}</span> linhas.
+                    """, 
                     unsafe_allow_html=True
-                )    
-
-            # Valor Total e Quantidade Total
-            total_quantity = df_filtrado["Quantidade"].sum()
-            total_value = df_filtrado["Valor"].sum()
-
-            # Formatação Valor Total e Quantidade Total
-            quantidade_formatada = format_number(total_quantity)
-            valor_formatado = format_number(total_value)
-
-            # Exibição dos Valores Totais
-            col1, col2 = st.columns(2)
-            with col1:
-                col1.metric("💵 Valor Total (US$)", valor_formatado)
-            with col2:
-                col2.metric("🍷 Quantidade Total (L)", quantidade_formatada)
-
-            # Exibição da tabela
-            if not df_filtrado.empty:
-                st.dataframe(
-                    df_filtrado,
-                    hide_index=True,
-                    width=2000,
-                    column_config={
-                        'Quantidade': st.column_config.NumberColumn('Quantidade (L)', format='%.2f'),
-                        'Valor': st.column_config.NumberColumn('Valor (US$)', format='%.2f'),
-                        'Ano': st.column_config.NumberColumn('Ano', format='%d')
-                    }
                 )
-            else:
-                st.warning("Nenhum resultado encontrado para os filtros aplicados.")
-            
-            # Número de linhas da tabela (Dinâmico a partir dos filtros aplicados)
-            st.markdown(
-                f"""
-                <p>A tabela possui <span style="color:#F1145C;">{df_filtrado.shape[0]}</span> linhas.
-                """, 
-                unsafe_allow_html=True
-            )
             
-            # Download da tabela em formato csv
-            st.markdown('Escreva um nome para o arquivo')
-            coluna1, coluna2 = st.columns(2)
-            with coluna1:
-                nome_arquivo = st.text_input('', label_visibility = 'collapsed', value = 'dados')
-                nome_arquivo += '.csv'
-            with coluna2:
-                st.download_button('Download', data = converte_csv(df_filtrado), file_name = nome_arquivo, mime = 'text/csv', on_click = mensagem_sucesso, help='Clique para fazer download dos dados em formato csv.')
+                # Download da tabela: o arquivo só é gerado (em blocos, no disco) ao clicar em "Preparar download"
+                st.markdown('Escreva um nome para o arquivo e escolha o formato')
+                coluna1, coluna2, coluna3 = st.columns(3)
+                with coluna1:
+                    nome_arquivo = st.text_input('', label_visibility = 'collapsed', value = 'dados')
+                with coluna2:
+                    formato = st.selectbox('Formato', list(FORMATOS), label_visibility = 'collapsed', help='Para seleções grandes, prefira CSV (gzip) ou Parquet.')
+                with coluna3:
+                    caminho = export_path(df_export, pais, tipo, year, formato)
+                    if st.session_state.get('download_export') != caminho or not os.path.exists(caminho):
+                        if st.button('Preparar download', help='Clique para gerar o arquivo com os filtros aplicados.'):
+                            with st.spinner('Gerando o arquivo...'):
+                                st.session_state['download_export'] = export_file(df_export, pais, tipo, year, formato)
+                    if st.session_state.get('download_export') == caminho and os.path.exists(caminho):
+                        with open(caminho, 'rb') as arquivo:
+                            st.download_button('Download', data = arquivo, file_name = nome_arquivo + FORMATOS[formato]['extensao'], mime = FORMATOS[formato]['mime'], on_click = download_concluido, args = ('download_export',), help='Clique para fazer download dos dados.')
 
     ### Analytics Importações ###
     with tab2:
@@ -446,7 +344,7 @@ if option == 'Analytics':
                         number_paises_import = st.number_input('Número de países a serem análisados', min_value=2, max_value=15, value=5, help='Selecionar o número de Países que serão análisados: de 2 a 15.',key='number_paises_import')
                     with col2:
                         # Filtro de Tipos
-                        tipos_disponiveis_import = df_import['Tipo'].dropna().unique()
+                        tipos_disponiveis_import = df_import_resumo['Tipo'].dropna().unique()
                         tipo_selecionado_import = st.multiselect(
                             "Selecione o(s) Tipo(s):",
                             options=tipos_disponiveis_import,
@@ -457,33 +355,20 @@ if option == 'Analytics':
                         # Filtro de Período
                         year_import = st.slider(
                             "Selecione um Período de Anos",
-                            df_import['Ano'].min(),
-                            df_import['Ano'].max(),
-                            (df_import['Ano'].min(), df_import['Ano'].max()),
+                            df_import_resumo['Ano'].min(),
+                            df_import_resumo['Ano'].max(),
+                            (df_import_resumo['Ano'].min(), df_import_resumo['Ano'].max()),
                             key="year_import"
                         )
                 
-                # Aplicar filtros no DataFrame: df_import
-                df_filtered_import = df_import[
-                    (df_import['Ano'] >= year_import[0]) & 
-                    (df_import['Ano'] <= year_import[1]) &
-                    (df_import['Tipo'].isin(tipo_selecionado_import))
-                ]
+                # Índice de ranking (somas acumuladas Tipo x Ano x País), construído uma vez por versão dos dados
+                indice_import = ranking_index(dataset_key(df_import_resumo), df_import_resumo)
 
                 # Filtrar os países com maior valor dentro do intervalo e tipo selecionados
-                top_countries_import = (
-                    df_filtered_import.groupby('País')['Valor']
-                    .sum()
-                    .nlargest(number_paises_import)
-                    .index
-                )
-                df_filtered_import = df_filtered_import[df_filtered_import['País'].isin(top_countries_import)]
+                top_countries_import = rank_countries(indice_import, tipo_selecionado_import, year_import, number_paises_import)
 
-                # Groupby dos dados por Ano e País
-                df_import_agg = (
-                    df_filtered_import.groupby(['Ano', 'País'], as_index=False)['Valor']
-                    .sum()
-                )
+                # Valor por Ano e País dos países selecionados
+                df_import_agg = yearly_values(indice_import, tipo_selecionado_import, year_import, top_countries_import, 'Valor')
 
                 # Ano de início e ano final de análise
                 start_year_import, end_year_import = year_import
@@ -516,180 +401,187 @@ if option == 'Analytics':
                     unsafe_allow_html=True
                 )
 
-                #### Criação dos Gráficos ####
+                #### Criação dos Gráficos (em cache pelos dados agregados e parâmetros) ####
                 # Gráfico de barras: Valor
-                df_valor_pais_import = (
-                    df_filtered_import.groupby('País', as_index=False)['Valor']
-                    .sum()
-                    .nlargest(number_paises_import, 'Valor')
-                )
+                df_valor_pais_import = country_totals(indice_import, tipo_selecionado_import, year_import, top_countries_import, 'Valor')
 
-                # Ordem por valor
-                country_order_valor_import = df_valor_pais_import.sort_values('Valor', ascending=False)['País'].tolist()
-
-                fig_valor_pais_import = px.bar(
-                    df_valor_pais_import,
-                    x='Valor',
-                    y='País',
-                    text_auto='.2s',
-                    title=f"Valor (US$): Top {number_paises_import} Países",
-                    color_discrete_sequence=['#F1145C'],
-                    category_orders={"País": country_order_valor_import},
-                    hover_data={'País': True, 'Valor': ':.2f'},
-                    height=500 + (number_paises_import - 5) * 50
-                )
+                fig_valor_pais_import = bar_chart(df_valor_pais_import, 'Valor', f"Valor (US$): Top {number_paises_import} Países", number_paises_import)
 
                 # Gráfico de barras: Quantidade
-                df_quant_pais_import = (
-                    df_filtered_import.groupby('País', as_index=False)['Quantidade']
-                    .sum()
-                    .nlargest(number_paises_import, 'Quantidade')
-                )
+                df_quant_pais_import = country_totals(indice_import, tipo_selecionado_import, year_import, top_countries_import, 'Quantidade')
 
-                # Ordem por quantidade
-                country_order_quant_import = df_quant_pais_import.sort_values('Quantidade', ascending=False)['País'].tolist()
-
-                fig_quant_pais_import = px.bar(
-                    df_quant_pais_import,
-                    x='Quantidade',
-                    y='País',
-                    text_auto='.2s',
-                    title=f"Quantidade Total (L): Top {number_paises_import} Países",
-                    color_discrete_sequence=['#F1145C'],
-                    category_orders={"País": country_order_quant_import},
-                    hover_data={'País': True, 'Quantidade': ':.2f'},
-                    height=500 + (number_paises_import - 5) * 50
-                )
+                fig_quant_pais_import = bar_chart(df_quant_pais_import, 'Quantidade', f"Quantidade Total (L): Top {number_paises_import} Países", number_paises_import)
 
                 # Gráfico de linhas: Valor por Ano
-                fig_valor_ano_pais_import = px.line(
-                    df_import_agg,
-                    x='Ano',
-                    y='Valor',
-                    color='País',
-                    range_y=(df_import_agg['Valor'].min() - 1000000, df_import_agg['Valor'].max() + 1000000),
-                    markers=True,
-                    title=f"Valor por Ano (US$): Top {number_paises_import} Países",
-                    color_discrete_sequence=px.colors.qualitative.Set1,
-                    hover_data={'Ano': True, 'Valor': ':.2f'}
-                )
+                fig_valor_ano_pais_import = line_chart(df_import_agg, f"Valor por Ano (US$): Top {number_paises_import} Países")
 
                 # Exibição dos gráficos
                 col1, col2 = st.columns(2)
                 with col1:
                     st.metric(f'💵 Valor Total (US$): Top {number_paises_import} Países', format_number(df_valor_pais_import['Valor'].sum()))
-                    st.plotly_chart(fig_valor_pais_import, use_container_width=True)
+                    render_chart(fig_valor_pais_import)
                 with col2:
                     st.metric(f'🍷 Quantidade Total (L): Top {number_paises_import} Países', format_number(df_quant_pais_import['Quantidade'].sum()))
-                    st.plotly_chart(fig_quant_pais_import, use_container_width=True)
+                    render_chart(fig_quant_pais_import)
 
-                st.plotly_chart(fig_valor_ano_pais_import, use_container_width=True)
-        
-        ### Importação: Tabelas
-        with sub_tab2:
-            # Filtros
-            with st.expander('Filtros'):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    pais_import = st.multiselect('Selecione um país', pd.Series(df_import['País'].unique()).sort_values(ascending=True), key='pais_import')
-                with col2:
-                    tipo_import = st.multiselect('Selecione os tipos', pd.Series(df_import['Tipo'].unique()).sort_values(ascending=True), key='tipo_import')
-                with col3:
-                    year_import = st.slider('Selecione um Período de Anos', 
-                                    df_import['Ano'].min(), 
-                                    df_import['Ano'].max(), 
-                                    (df_import['Ano'].min(), df_import['Ano'].max()),
-                                    key='import_year')
-                    
-            # Aplicando os filtros no DataFrame: df_import
-            df_filtrado_import = df_import.copy()
-
-            if pais_import:
-                df_filtrado_import = df_filtrado_import[df_filtrado_import['País'].isin(pais_import)]
-            if tipo_import:
-                df_filtrado_import = df_filtrado_import[df_filtrado_import['Tipo'].isin(tipo_import)]
-            if year_import:
-                df_filtrado_import = df_filtrado_import[
-                    (df_filtrado_import['Ano'] >= year_import[0]) & (df_filtrado_import['Ano'] <= year_import[1])
-                ]
-
-            # AAno de início e ano final de análise
-            start_year_import, end_year_import = year_import
-
-            # Subtítulo do dashboard
-            st.markdown(
-                    f"""
-                    <h3> Análise de Importação de Vinhos
-                    <span style="color:#F1145C;"></span>
-                    </h3>
-                    """,
-                    unsafe_allow_html=True
-                )
+                render_chart(fig_valor_ano_pais_import)
 
-            # País de origem
-            st.markdown(
+                st.divider()
+
+                # Sessão para Análises Complementares
+                st.markdown(
                     f"""
-                    <p style="font-size:20px;">País de Origem: 
-                    <span style="color:#F1145C;">Brasil</span></p>
+                    <h4>Análises Complementares</h4>
                     """,
                     unsafe_allow_html=True
                 )
 
-            # Período analisado
-            st.markdown(
+                # Análises complementares calculadas em uma única passada sobre o agregado (utils/analytics.py)
+                analises_import = complementary_analyses(df_import_resumo)
+
+                if analises_import is not None:
+                    # Custo Unitário Médio Total de Importação de Vinho
+                    st.expander("Custo Unitário Médio Total de Importação de Vinho (US$/L)").markdown(
+                        f"""
+                        **Custo Unitário Médio Total de Importação de Vinho (US$/L):** 
+                        {analises_import['custo_unitario_total']:,.2f} 
+                        """
+                    )
+
+                    # Custo Unitário Médio por Tipo
+                    st.expander("Custo Unitário Médio por Tipo de Vinho (US$/L)").markdown(
+                        "\n".join([f"- **{row['Tipo']}:** {row['Custo Unitário Médio']:,.2f} US$/L" for _, row in analises_import['custo_unitario_por_tipo'].iterrows()])
+                    )
+
+                    # Análise do Pico de Importação
+                    st.expander("Análise de Pico de Importação").markdown(peak_explanation(analises_import['pico'], 'import'))
+
+                    # Análise dos 3 Principais Fornecedores de Vinho do Brasil nos Últimos 5 Anos
+                    with st.expander("Top 3 Fornecedores de Vinho do Brasil nos Últimos 5 Anos"):
+                        st.markdown("**Top 3 Fornecedores de Vinho do Brasil nos Últimos 5 Anos:**")
+                        for _, row in analises_import['top'].iterrows():
+                            st.markdown(
+                                f"- **{row['País']}:** Valor importado: **{row['Valor']:,.2f}**, Quantidade importada: **{row['Quantidade']:,.2f}** litros"
+                            )
+
+                        # Custo unitário médio total dos últimos 5 anos para os 3 principais fornecedores
+                        st.markdown("**Análise do Custo Unitário Médio dos 3 Principais Fornecedores nos Últimos 5 Anos:**")
+                        for _, row in analises_import['top'].iterrows():
+                            st.markdown(f"**{row['País']}:**")
+                            st.markdown(f"  - **Custo Unitário Médio Total (últimos 5 anos):** {row['Custo Unitário Médio']:,.2f} US$/L")
+                else:
+                    st.warning("Não há dados disponíveis para realizar esta análise.")
+        
+        ### Importação: Tabelas
+        with sub_tab2:
+            # Modo paginado: histórico completo consultado no banco, uma página por vez
+            modo_paginado = st.toggle('Histórico completo (tabela paginada no banco)', key='paginado_import', help='Consulta o histórico completo diretamente no banco, uma página por vez.')
+            if modo_paginado:
+                paginated_table('import_vinho', 'import')
+            else:
+                # Filtros
+                with st.expander('Filtros'):
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        pais_import = st.multiselect('Selecione um país', pd.Series(df_import['País'].unique()).sort_values(ascending=True), key='pais_import')
+                    with col2:
+                        tipo_import = st.multiselect('Selecione os tipos', pd.Series(df_import['Tipo'].unique()).sort_values(ascending=True), key='tipo_import')
+                    with col3:
+                        year_import = st.slider('Selecione um Período de Anos', 
+                                        df_import['Ano'].min(), 
+                                        df_import['Ano'].max(), 
+                                        (df_import['Ano'].min(), df_import['Ano'].max()),
+                                        key='import_year')
+                    
+                # Aplicando os filtros no DataFrame: df_import
+                # (resultado em cache LRU pela seleção normalizada de países, tipos e período)
+                df_filtrado_import = filter_table(df_import, pais_import, tipo_import, year_import)
+
+                # AAno de início e ano final de análise
+                start_year_import, end_year_import = year_import
+
+                # Subtítulo do dashboard
+                st.markdown(
+                        f"""
+                        <h3> Análise de Importação de Vinhos
+                        <span style="color:#F1145C;"></span>
+                        </h3>
+                        """,
+                        unsafe_allow_html=True
+                    )
+
+                # País de origem
+                st.markdown(
+                        f"""
+                        <p style="font-size:20px;">País de Origem: 
+                        <span style="color:#F1145C;">Brasil</span></p>
+                        """,
+                        unsafe_allow_html=True
+                    )
+
+                # Período analisado
+                st.markdown(
+                        f"""
+                        <p style="font-size:18px;">Período Analisado: 
+                        <span style="color:#F1145C;">{start_year_import} - {end_year_import}</span></p>
+                        """,
+                        unsafe_allow_html=True
+                    ) 
+
+                # Valor Total e Quantidade Total
+                total_quantity_import = df_filtrado_import["Quantidade"].sum()
+                total_value_import = df_filtrado_import["Valor"].sum()
+
+                # Formato Valor Total e Quantidade Total
+                quantidade_formatada_import = format_number(total_quantity_import)
+                valor_formatado_import = format_number(total_value_import)
+
+                # Exibição Valor Total e Quantidade Total
+                col1, col2 = st.columns(2)
+                with col1:
+                    col1.metric("💵 Valor Total (US$)", valor_formatado_import)
+                with col2:
+                    col2.metric("🍷 Quantidade Total (L)", quantidade_formatada_import)
+
+                # Exibição da tabela
+                if not df_filtrado_import.empty:
+                    st.dataframe(
+                        df_filtrado_import,
+                        hide_index=True,
+                        width=2000,
+                        column_config={
+                            'Quantidade': st.column_config.NumberColumn('Quantidade (L)', format='%.2f'),
+                            'Valor': st.column_config.NumberColumn('Valor (US$)', format='%.2f'),
+                            'Ano': st.column_config.NumberColumn('Ano', format='%d')
+                        }
+                    )
+                else:
+                    st.warning("Nenhum resultado encontrado para os filtros aplicados.")
+            
+                # Número de linhas da tabela
+                st.markdown(
                     f"""
-                    <p style="font-size:18px;">Período Analisado: 
-                    <span style="color:#F1145C;">{start_year_import} - {end_year_import}</span></p>
-                    """,
+                    <p>A tabela possui <span style="color:#F1145C;">{df_filtrado_import.shape[0]}</span> linhas.
+                    """, 
                     unsafe_allow_html=True
-                ) 
-
-            # Valor Total e Quantidade Total
-            total_quantity_import = df_filtrado_import["Quantidade"].sum()
-            total_value_import = df_filtrado_import["Valor"].sum()
-
-            # Formato Valor Total e Quantidade Total
-            quantidade_formatada_import = format_number(total_quantity_import)
-            valor_formatado_import = format_number(total_value_import)
-
-            # Exibição Valor Total e Quantidade Total
-            col1, col2 = st.columns(2)
-            with col1:
-                col1.metric("💵 Valor Total (US$)", valor_formatado_import)
-            with col2:
-                col2.metric("🍷 Quantidade Total (L)", quantidade_formatada_import)
-
-            # Exibição da tabela
-            if not df_filtrado_import.empty:
-                st.dataframe(
-                    df_filtrado_import,
-                    hide_index=True,
-                    width=2000,
-                    column_config={
-                        'Quantidade': st.column_config.NumberColumn('Quantidade (L)', format='%.2f'),
-                        'Valor': st.column_config.NumberColumn('Valor (US$)', format='%.2f'),
-                        'Ano': st.column_config.NumberColumn('Ano', format='%d')
-                    }
                 )
-            else:
-                st.warning("Nenhum resultado encontrado para os filtros aplicados.")
-            
-            # Número de linhas da tabela
-            st.markdown(
-                f"""
-                <p>A tabela possui <span style="color:#F1145C;">{df_filtrado_import.shape[0]}</span> linhas.
-                """, 
-                unsafe_allow_html=True
-            )
 
-            # Download da tabela em formato csv
-            st.markdown('Escreva um nome para o arquivo')
-            coluna1, coluna2 = st.columns(2)
-            with coluna1:
-                nome_arquivo_import = st.text_input('', label_visibility = 'collapsed', value = 'dados', key='nome_arquivo_import')
-                nome_arquivo_import += '.csv'
-            with coluna2:
-                st.download_button('Download', data = converte_csv(df_filtrado_import), file_name = nome_arquivo_import, mime = 'text/csv', on_click = mensagem_sucesso, help='Clique para fazer download dos dados em formato csv.', key='download_import')
+                # Download da tabela: o arquivo só é gerado (em blocos, no disco) ao clicar em "Preparar download"
+                st.markdown('Escreva um nome para o arquivo e escolha o formato')
+                coluna1, coluna2, coluna3 = st.columns(3)
+                with coluna1:
+                    nome_arquivo_import = st.text_input('', label_visibility = 'collapsed', value = 'dados', key='nome_arquivo_import')
+                with coluna2:
+                    formato_import = st.selectbox('Formato', list(FORMATOS), label_visibility = 'collapsed', help='Para seleções grandes, prefira CSV (gzip) ou Parquet.', key='formato_import')
+                with coluna3:
+                    caminho_import = export_path(df_import, pais_import, tipo_import, year_import, formato_import)
+                    if st.session_state.get('download_import') != caminho_import or not os.path.exists(caminho_import):
+                        if st.button('Preparar download', help='Clique para gerar o arquivo com os filtros aplicados.', key='preparar_import'):
+                            with st.spinner('Gerando o arquivo...'):
+                                st.session_state['download_import'] = export_file(df_import, pais_import, tipo_import, year_import, formato_import)
+                    if st.session_state.get('download_import') == caminho_import and os.path.exists(caminho_import):
+                        with open(caminho_import, 'rb') as arquivo:
+                            st.download_button('Download', data = arquivo, file_name = nome_arquivo_import + FORMATOS[formato_import]['extensao'], mime = FORMATOS[formato_import]['mime'], on_click = download_concluido, args = ('download_import',), help='Clique para fazer download dos dados.', key='botao_download_import')
 ### Página Upload ###
 elif option == 'Upload':
     st.title('Upload de Dados')
@@ -728,20 +620,59 @@ elif option == 'Upload':
             key='files_export'
         )
         
-        # Processamento dos dados
-        if uploaded_files:
-            consolidated_data = pd.DataFrame()
+        # Modo streaming: os arquivos são lidos em blocos e gravados diretamente no banco, sem pré-visualização
+        modo_streaming = st.toggle(
+            'Modo streaming (arquivos grandes)',
+            key='streaming_export',
+            help='Lê os arquivos em blocos de linhas e grava cada bloco no banco de dados, limitando o uso de memória.'
+        )
 
-            for uploaded_file in uploaded_files:
-                # Carregar o arquivo em um DataFrame
-                df = pd.read_csv(uploaded_file, sep=';')
+        # Carga incremental: somente os anos mais recentes que os do banco ou com conteúdo alterado (checksum)
+        modo_incremental = st.toggle(
+            'Somente anos novos ou alterados',
+            value=True,
+            key='incremental_export',
+            help='Compara cada ano dos arquivos com o último ano gravado de cada Tipo e com o checksum da última carga. Desative para reprocessar todo o histórico.'
+        )
 
-                # Processar o DataFrame usando o arquivo utilizando 'pipeline_export.py'
-                processed_data = process_file(uploaded_file.name, df)
+        # Gravação em modo streaming
+        if uploaded_files and modo_streaming:
+            st.write(f'{len(uploaded_files)} arquivo(s) selecionado(s) para gravação em modo streaming.')
 
-                # Concatenar o DataFrame
-                consolidated_data = pd.concat(
-                    [consolidated_data, processed_data], ignore_index=True)
+            # A gravação roda em segundo plano: a sessão continua respondendo e o resultado aparece em uma notificação
+            if st.button('Salvar dados no banco de dados', key='salve_export_streaming'):
+                submit_task(
+                    'Gravando arquivos em modo streaming',
+                    salvar_streaming, engine, list(uploaded_files), process_file, 'export_vinho',
+                    progress=True
+                )
+
+        # Processamento dos dados
+        elif uploaded_files:
+            # Leitura e processamento dos arquivos em paralelo, com uma única concatenação ao final
+            barra_progresso = st.progress(0, text='Processando arquivos...')
+            incremental = incremental_state(engine, 'export_vinho', export_type) if modo_incremental else None
+            # Arquivos fora do registro (utils/pipeline.py) ou com cabeçalho diferente do esperado interrompem o processamento
+            try:
+                consolidated_data, tempos = process_uploaded_files(
+                    uploaded_files,
+                    process_file,
+                    incremental=incremental,
+                    on_progress=lambda feitos, total, tempo: barra_progresso.progress(
+                        feitos / total, text=f"{tempo['Arquivo']} processado ({feitos}/{total})"
+                    )
+                )
+            except ValueError as e:
+                barra_progresso.empty()
+                st.error(f'Erro ao processar os arquivos: {e}')
+                # st.stop() interrompe o script antes do fim da página: a medição desta execução é encerrada aqui
+                perf.finish_run()
+                st.stop()
+            barra_progresso.empty()
+
+            # Tempo de leitura e transformação de cada arquivo
+            with st.expander('Tempo de processamento por arquivo'):
+                st.dataframe(pd.DataFrame(tempos), hide_index=True, width=2000)
 
             # Exibir os dados
             st.write('Dados processados:')
@@ -751,35 +682,15 @@ elif option == 'Upload':
                 hide_index=True,
                 column_config={
                     'Quantidade': st.column_config.NumberColumn('Quantidade (Kg)', format="%.2f"),
-                    'Valor': st.column_config.NumberColumn('Valor (US$)', format="%.2f")
+                    'Valor': st.column_config.NumberColumn('Valor (US$)', format="%.2f"),
+                    'Ano': st.column_config.NumberColumn('Ano', format='%d')
                 }
             )
 
             # Botão para salvar os dados no banco de dados PostgreSQL
             if st.button('Salvar dados no banco de dados'):
-                try:
-                    table_name = 'export_vinho'
-                    with engine.connect() as connection:
-                        try:
-                            existing_data = pd.read_sql(
-                                f"SELECT * FROM {table_name}", connection)
-                        except SQLAlchemyError:
-                            existing_data = pd.DataFrame()  # Caso a tabela não exista
-
-                    # Remover duplicados comparando com os dados existentes
-                    if not existing_data.empty:
-                        consolidated_data = consolidated_data[~consolidated_data.isin(
-                            existing_data.to_dict(orient='list')).all(axis=1)]
-
-                    # Salvar novos dados no banco de dados
-                    if not consolidated_data.empty:
-                        consolidated_data.to_sql(
-                            table_name, engine, if_exists='append', index=False)
-                        st.success(f'Dados salvos com sucesso na tabela `{table_name}` do banco de dados!')
-                    else:
-                        st.warning('Os dados já existem no banco de dados.')
-                except Exception as e:
-                    st.error(f'Erro ao salvar os dados no banco de dados: {e}')
+                # A gravação roda em segundo plano: a sessão continua respondendo e o resultado aparece em uma notificação
+                submit_task('Salvando dados no banco de dados', salvar_lote, engine, consolidated_data, 'export_vinho', incremental)
 
     ### Upload de Dados de Importação ###
     with tab2:
@@ -797,20 +708,59 @@ elif option == 'Upload':
             key='files_import'
         )
 
-        # Processamento dos dados
-        if uploaded_files:
-            consolidated_data = pd.DataFrame()
+        # Modo streaming: os arquivos são lidos em blocos e gravados diretamente no banco, sem pré-visualização
+        modo_streaming = st.toggle(
+            'Modo streaming (arquivos grandes)',
+            key='streaming_import',
+            help='Lê os arquivos em blocos de linhas e grava cada bloco no banco de dados, limitando o uso de memória.'
+        )
 
-            for uploaded_file in uploaded_files:
-                # Carregar o arquivo em um DataFrame
-                df = pd.read_csv(uploaded_file, sep=';')
+        # Carga incremental: somente os anos mais recentes que os do banco ou com conteúdo alterado (checksum)
+        modo_incremental = st.toggle(
+            'Somente anos novos ou alterados',
+            value=True,
+            key='incremental_import',
+            help='Compara cada ano dos arquivos com o último ano gravado de cada Tipo e com o checksum da última carga. Desative para reprocessar todo o histórico.'
+        )
 
-                # Processar o DataFrame usando o arquivo `pipeline_import.py`
-                processed_data = process_file_import(uploaded_file.name, df)
+        # Gravação em modo streaming
+        if uploaded_files and modo_streaming:
+            st.write(f'{len(uploaded_files)} arquivo(s) selecionado(s) para gravação em modo streaming.')
 
-                # Concatenar o DataFrame
-                consolidated_data = pd.concat(
-                    [consolidated_data, processed_data], ignore_index=True)
+            # A gravação roda em segundo plano: a sessão continua respondendo e o resultado aparece em uma notificação
+            if st.button('Salvar dados no banco de dados', key='salve_import_streaming'):
+                submit_task(
+                    'Gravando arquivos em modo streaming',
+                    salvar_streaming, engine, list(uploaded_files), process_file_import, 'import_vinho',
+                    progress=True
+                )
+
+        # Processamento dos dados
+        elif uploaded_files:
+            # Leitura e processamento dos arquivos em paralelo, com uma única concatenação ao final
+            barra_progresso = st.progress(0, text='Processando arquivos...')
+            incremental = incremental_state(engine, 'import_vinho', import_type) if modo_incremental else None
+            # Arquivos fora do registro (utils/pipeline.py) ou com cabeçalho diferente do esperado interrompem o processamento
+            try:
+                consolidated_data, tempos = process_uploaded_files(
+                    uploaded_files,
+                    process_file_import,
+                    incremental=incremental,
+                    on_progress=lambda feitos, total, tempo: barra_progresso.progress(
+                        feitos / total, text=f"{tempo['Arquivo']} processado ({feitos}/{total})"
+                    )
+                )
+            except ValueError as e:
+                barra_progresso.empty()
+                st.error(f'Erro ao processar os arquivos: {e}')
+                # st.stop() interrompe o script antes do fim da página: a medição desta execução é encerrada aqui
+                perf.finish_run()
+                st.stop()
+            barra_progresso.empty()
+
+            # Tempo de leitura e transformação de cada arquivo
+            with st.expander('Tempo de processamento por arquivo'):
+                st.dataframe(pd.DataFrame(tempos), hide_index=True, width=2000)
 
             # Exibir os dados
             st.write('Dados processados:')
@@ -820,35 +770,21 @@ elif option == 'Upload':
                 hide_index=True,
                 column_config={
                     'Quantidade': st.column_config.NumberColumn('Quantidade (Kg)', format="%.2f"),
-                    'Valor': st.column_config.NumberColumn('Valor (US$)', format="%.2f")
+                    'Valor': st.column_config.NumberColumn('Valor (US$)', format="%.2f"),
+                    'Ano': st.column_config.NumberColumn('Ano', format='%d')
                 }
             )
 
             # Botão para salvar os dados no banco de dados
             if st.button('Salvar dados no banco de dados', key='salve_import'):
-                try:
-                    table_name = 'import_vinho'
-                    with engine.connect() as connection:
-                        try:
-                            existing_data = pd.read_sql(
-                                f"SELECT * FROM {table_name}", connection)
-                        except SQLAlchemyError:
-                            existing_data = pd.DataFrame()  # Caso a tabela não exista
-
-                    # Remover duplicados comparando com os dados existentes
-                    if not existing_data.empty:
-                        consolidated_data = consolidated_data[~consolidated_data.isin(
-                            existing_data.to_dict(orient='list')).all(axis=1)]
-
-                    # Salvar novos dados no banco de dados
-                    if not consolidated_data.empty:
-                        consolidated_data.to_sql(
-                            table_name, engine, if_exists='append', index=False)
-                        st.success(f'Dados salvos com sucesso na tabela `{table_name}` do banco de dados!')
-                    else:
-                        st.warning('Os dados já existem no banco de dados.')
-                except Exception as e:
-                    st.error(f'Erro ao salvar os dados no banco de dados: {e}')
+                # A gravação roda em segundo plano: a sessão continua respondendo e o resultado aparece em uma notificação
+                submit_task('Salvando dados no banco de dados', salvar_lote, engine, consolidated_data, 'import_vinho', incremental)
+
+# Acompanhamento das tarefas em segundo plano (gravações no banco)
+# Montado ao final da página para incluir as tarefas enviadas nesta mesma execução (botões de Upload)
+if pending_tasks():
+    with area_tarefas:
+        task_monitor()
 
 # Rodapé
 st.markdown(f"""
@@ -867,4 +803,28 @@ st.markdown(f"""
     <footer>
         {datetime.now().year} - FIAP | PÓS TECH | Data Analytics | Tech Challenge - Cézar Maldini. Todos os direitos reservados.
     </footer>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# Painel de Performance (oculto): exibido somente com ?perf=1 na URL
+execucao = perf.finish_run()
+if st.query_params.get('perf') == '1':
+    with st.sidebar:
+        st.divider()
+        st.subheader('Performance')
+        execucoes = perf.recent_runs()
+        st.caption(f"Última execução: {execucao['duracao_ms']:,.0f} ms | memória {execucao['memoria_final_mb']:,.0f} MB")
+        pool = pool_metrics(engine)
+        if pool is not None:
+            st.caption(
+                f"Pool de conexões: {pool['em_uso']} em uso | {pool['livres']} livres | limite {pool['limite']} | "
+                f"espera média {pool['espera_media_ms']:,.2f} ms | máxima {pool['espera_max_ms']:,.2f} ms | timeouts {pool['timeouts']}"
+            )
+        for i, item in enumerate(execucoes):
+            with st.expander(f"{item['inicio']} | {item['pagina']} | {item['duracao_ms']:,.0f} ms", expanded=i == 0):
+                st.dataframe(perf.stages_table(item), hide_index=True)
+        st.download_button(
+            'Exportar log (JSON lines)',
+            data=perf.runs_jsonl(execucoes),
+            file_name='performance.jsonl',
+            mime='application/x-ndjson'
+        )
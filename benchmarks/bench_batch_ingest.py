@@ -0,0 +1,45 @@
+# Benchmark do processamento de vários arquivos: loop serial com concat incremental x pool de threads
+# Uso: python -m benchmarks.bench_batch_ingest [--escala 10]
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.dados_sinteticos import gerar_csv
+from utils.batch_ingest import process_files, read_embrapa_csv
+from utils.pipeline_export import process_file
+from utils.pipeline_import import process_file_import
+
+ARQUIVOS_EXPORT = ['ExpVinho.csv', 'ExpEspumantes.csv', 'ExpUva.csv', 'ExpSuco.csv']
+ARQUIVOS_IMPORT = ['ImpVinhos.csv', 'ImpEspumantes.csv', 'ImpFrescas.csv', 'ImpPassas.csv', 'ImpSuco.csv']
+
+# Caminho serial anterior do app: leitura, transformação e pd.concat a cada arquivo
+def processar_serial(arquivos, process_fn):
+    consolidated_data = pd.DataFrame()
+    for nome, conteudo in arquivos:
+        processed_data = process_fn(nome, read_embrapa_csv(conteudo))
+        consolidated_data = pd.concat([consolidated_data, processed_data], ignore_index=True)
+    return consolidated_data
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara o processamento serial e paralelo dos arquivos do Upload.')
+    parser.add_argument('--escala', type=int, default=10)
+    args = parser.parse_args()
+
+    for titulo, nomes, process_fn in [('Exportação', ARQUIVOS_EXPORT, process_file), ('Importação', ARQUIVOS_IMPORT, process_file_import)]:
+        arquivos = [(nome, gerar_csv(args.escala, seed=i).encode('utf-8')) for i, nome in enumerate(nomes)]
+
+        inicio = time.perf_counter()
+        processar_serial(arquivos, process_fn)
+        tempo_serial = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        obtido, tempos = process_files(arquivos, process_fn)
+        tempo_paralelo = time.perf_counter() - inicio
+
+        # A igualdade entre os caminhos serial e paralelo é verificada em tests/test_batch_ingest.py
+        print(f'{titulo}: {len(arquivos)} arquivos, {len(obtido)} linhas | serial {tempo_serial:.3f}s | paralelo {tempo_paralelo:.3f}s')
+        print(pd.DataFrame(tempos).to_string(index=False))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# Medição dos gráficos do dashboard: tempo de construção no servidor e tamanho do JSON enviado ao navegador
+# Compara a construção direta com plotly.express (anterior) com utils/charts (cache + payload reduzido)
+# Uso: python -m benchmarks.bench_charts [--paises 15] [--anos 16]
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from utils import charts
+
+# Construção anterior dos gráficos no app.py
+def bar_anterior(df, medida, titulo, n):
+    ordem = df.sort_values(medida, ascending=False)['País'].tolist()
+    return px.bar(df, x=medida, y='País', text_auto='.2s', title=titulo, color_discrete_sequence=['#F1145C'],
+                  category_orders={"País": ordem}, hover_data={'País': True, medida: ':.2f'}, height=500 + (n - 5) * 50)
+
+def line_anterior(df, titulo):
+    return px.line(df, x='Ano', y='Valor', color='País',
+                   range_y=(df['Valor'].min() - 1000000, df['Valor'].max() + 1000000), markers=True, title=titulo,
+                   color_discrete_sequence=px.colors.qualitative.Set1, hover_data={'Ano': True, 'Valor': ':.2f'})
+
+# Função que mede o tempo de construção (ms) e o tamanho do JSON serializado (KB)
+def medir(construir):
+    inicio = time.perf_counter()
+    fig = construir()
+    duracao = (time.perf_counter() - inicio) * 1000
+    return duracao, len(fig.to_json()) / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede tempo de construção e tamanho dos gráficos do dashboard.')
+    parser.add_argument('--paises', type=int, default=15)
+    parser.add_argument('--anos', type=int, default=16)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    paises = [f'País {i:02d}' for i in range(args.paises)]
+    df_valor = pd.DataFrame({'País': paises, 'Valor': rng.random(args.paises) * 1e7})
+    df_quant = pd.DataFrame({'País': paises, 'Quantidade': rng.random(args.paises) * 1e7})
+    df_ano = pd.DataFrame({
+        'Ano': np.repeat(np.arange(2008, 2008 + args.anos), args.paises),
+        'País': paises * args.anos,
+        'Valor': rng.random(args.paises * args.anos) * 1e7
+    })
+    n = args.paises
+
+    graficos = [
+        ('Barras Valor', lambda: bar_anterior(df_valor, 'Valor', 'Valor', n), lambda: charts.bar_chart(df_valor, 'Valor', 'Valor', n)),
+        ('Barras Quantidade', lambda: bar_anterior(df_quant, 'Quantidade', 'Quantidade', n), lambda: charts.bar_chart(df_quant, 'Quantidade', 'Quantidade', n)),
+        ('Linhas Valor/Ano', lambda: line_anterior(df_ano, 'Valor por Ano'), lambda: charts.line_chart(df_ano, 'Valor por Ano')),
+    ]
+
+    # Aquecimento (importações e validadores do plotly são carregados na primeira figura)
+    bar_anterior(df_valor, 'Valor', 'Valor', n).to_json()
+
+    print(f"{'gráfico':>18} | {'anterior (ms)':>13} {'KB':>6} | {'cache vazio (ms)':>16} {'cache (ms)':>10} {'KB':>6}")
+    for nome, anterior, novo in graficos:
+        tempo_anterior, tamanho_anterior = medir(anterior)
+        tempo_frio, tamanho_novo = medir(novo)
+        tempo_quente, _ = medir(novo)
+        print(f'{nome:>18} | {tempo_anterior:>13.1f} {tamanho_anterior:>6.1f} | {tempo_frio:>16.1f} {tempo_quente:>10.2f} {tamanho_novo:>6.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# Benchmark de memória e latência dos filtros/groupbys do dashboard: DataFrame original x compact_frame
+# Uso: python -m benchmarks.bench_compact_frame [--escala 10] [--repeticoes 20]
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.dados_sinteticos import gerar_dataframe
+from utils.db_queries import compact_frame
+from utils.pipeline_export import process_file
+
+ARQUIVOS = ['ExpVinho.csv', 'ExpEspumantes.csv', 'ExpUva.csv', 'ExpSuco.csv']
+
+# Caminhos quentes do Analytics: filtros do Dashboard e da Tabela e os groupbys dos gráficos
+def caminho_dashboard(df, paises):
+    df_filtered = df[(df['Ano'] >= 2010) & (df['Ano'] <= 2020) & (df['Tipo'].isin(['Vinhos de mesa', 'Espumantes']))]
+    top = df_filtered.groupby('País', observed=True)['Valor'].sum().nlargest(10).index
+    df_filtered = df_filtered[df_filtered['País'].isin(top)]
+    df_filtered.groupby(['Ano', 'País'], as_index=False, observed=True)['Valor'].sum()
+    df_filtered.groupby('País', as_index=False, observed=True)['Quantidade'].sum()
+    df[df['País'].isin(paises) & df['Tipo'].isin(['Suco de uva'])]
+
+def medir(df, paises, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        caminho_dashboard(df, paises)
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara memória e latência do DataFrame original e do compacto.')
+    parser.add_argument('--escala', type=int, default=10)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    original = pd.concat(
+        [process_file(nome, gerar_dataframe(args.escala, seed=i)) for i, nome in enumerate(ARQUIVOS)],
+        ignore_index=True
+    )
+    original['Ano'] = original['Ano'].astype('int64')
+    compacto = compact_frame(original)
+    paises = original['País'].drop_duplicates().head(20).tolist()
+
+    print(f'{len(original)} linhas')
+    print(f"{'':>10} {'memória (MB)':>14} {'latência (ms)':>15}")
+    for nome, df in [('original', original), ('compacto', compacto)]:
+        memoria = df.memory_usage(deep=True).sum() / 1e6
+        print(f'{nome:>10} {memoria:>14.1f} {medir(df, paises, args.repeticoes):>15.2f}')
+    print('dtypes compactos:', dict(compacto.dtypes.astype(str)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# Benchmark do cache de arquivos processados: primeiro processamento x rerun com os mesmos arquivos (memória e disco)
+# Uso: python -m benchmarks.bench_file_cache [--escala 10]
+import argparse
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.dados_sinteticos import gerar_csv
+from utils import file_cache
+from utils.batch_ingest import process_files
+from utils.pipeline_export import process_file
+
+ARQUIVOS = ['ExpVinho.csv', 'ExpEspumantes.csv', 'ExpUva.csv', 'ExpSuco.csv']
+
+# Função que mede o processamento dos arquivos e retorna o tempo (s) e o resultado
+def medir(arquivos):
+    inicio = time.perf_counter()
+    resultado, _ = process_files(arquivos, process_file)
+    return time.perf_counter() - inicio, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede o ganho do cache de arquivos processados nos reruns do Upload.')
+    parser.add_argument('--escala', type=int, default=10)
+    args = parser.parse_args()
+
+    arquivos = [(nome, gerar_csv(args.escala, seed=i).encode('utf-8')) for i, nome in enumerate(ARQUIVOS)]
+    megabytes = sum(len(conteudo) for _, conteudo in arquivos) / 1e6
+
+    with tempfile.TemporaryDirectory() as pasta:
+        file_cache.CACHE_DIR = pasta
+        tempo_inicial, esperado = medir(arquivos)
+        tempo_memoria, obtido_memoria = medir(arquivos)
+
+        # Novo processo: memória vazia, itens lidos do disco
+        file_cache.clear_cache()
+        tempo_disco, obtido_disco = medir(arquivos)
+
+    pd.testing.assert_frame_equal(esperado, obtido_memoria)
+    pd.testing.assert_frame_equal(esperado, obtido_disco)
+    print(f'{len(arquivos)} arquivos, {megabytes:.2f} MB, {len(esperado)} linhas')
+    print(f'  sem cache        {tempo_inicial:.3f}s')
+    print(f'  cache em memória {tempo_memoria:.3f}s ({tempo_inicial / tempo_memoria:.0f}x)')
+    print(f'  cache em disco   {tempo_disco:.3f}s ({tempo_inicial / tempo_disco:.0f}x)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# Benchmark do top-N de países do dashboard: groupby/nlargest sobre as linhas x índice de somas acumuladas
+# Uso: python -m benchmarks.bench_ranking [--escalas 1 10 50] [--repeticoes 50]
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.dados_sinteticos import gerar_dataframe
+from utils.pipeline_export import process_file
+from utils.ranking import build_ranking_index, country_totals, rank_countries
+
+ARQUIVOS = ['ExpVinho.csv', 'ExpEspumantes.csv', 'ExpUva.csv', 'ExpSuco.csv']
+TIPOS = ['Vinhos de mesa', 'Espumantes', 'Suco de uva']
+ANOS = (2005, 2020)
+N = 10
+
+# Caminho anterior do dashboard: filtro, groupby por país e nlargest
+def top_groupby(df):
+    df_filtered = df[(df['Ano'] >= ANOS[0]) & (df['Ano'] <= ANOS[1]) & (df['Tipo'].isin(TIPOS))]
+    return df_filtered.groupby('País', as_index=False)['Valor'].sum().nlargest(N, 'Valor')
+
+def top_indice(indice):
+    return country_totals(indice, TIPOS, ANOS, rank_countries(indice, TIPOS, ANOS, N), 'Valor')
+
+def medir(funcao, argumento, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao(argumento)
+    return (time.perf_counter() - inicio) / repeticoes * 1000, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara o top-N por groupby com o índice de ranking.')
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--repeticoes', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'escala':>6} {'linhas':>10} {'índice (ms)':>12} {'groupby (ms)':>13} {'consulta índice (ms)':>21}")
+    for escala in args.escalas:
+        df = pd.concat([process_file(nome, gerar_dataframe(escala, seed=i)) for i, nome in enumerate(ARQUIVOS)], ignore_index=True)
+
+        inicio = time.perf_counter()
+        indice = build_ranking_index(df)
+        tempo_indice = (time.perf_counter() - inicio) * 1000
+
+        tempo_groupby, esperado = medir(top_groupby, df, args.repeticoes)
+        tempo_consulta, obtido = medir(top_indice, indice, args.repeticoes)
+        pd.testing.assert_frame_equal(esperado.reset_index(drop=True), obtido.reset_index(drop=True), check_dtype=False)
+        print(f'{escala:>6} {len(df):>10} {tempo_indice:>12.1f} {tempo_groupby:>13.2f} {tempo_consulta:>21.2f}')
+
+if __name__ == '__main__':
+    main()
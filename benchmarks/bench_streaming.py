@@ -0,0 +1,65 @@
+# Benchmark de memória: gravação de um CSV grande com leitura completa x modo streaming (blocos de linhas)
+# Cada modo roda em um subprocesso separado para que o pico de RSS de um não contamine o outro
+# Uso: python -m benchmarks.bench_streaming [--escala 50] [--chunksize 500]
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.dados_sinteticos import gerar_csv
+
+# Função que retorna o pico de memória residente (RSS) do processo atual em MB
+def pico_rss_mb():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+# Execução de um único modo (subprocesso)
+def executar_modo(modo, caminho_csv, db_url, chunksize):
+    from sqlalchemy import create_engine
+
+    from utils.batch_ingest import read_embrapa_csv, stream_file_to_db
+    from utils.db_writer import upsert_dataframe
+    from utils.pipeline_export import process_file
+
+    engine = create_engine(db_url)
+    base = pico_rss_mb()
+    inicio = time.perf_counter()
+    if modo == 'completo':
+        processed_data = process_file('ExpVinho.csv', read_embrapa_csv(caminho_csv))
+        resultado = upsert_dataframe(engine, processed_data, 'export_vinho')
+    else:
+        resultado, _ = stream_file_to_db(engine, 'ExpVinho.csv', caminho_csv, process_file, 'export_vinho', chunksize)
+    duracao = time.perf_counter() - inicio
+    print(f'{modo:>10} | {duracao:8.2f}s | pico RSS {pico_rss_mb():8.1f} MB (antes da carga: {base:.1f} MB) | {resultado}')
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara o pico de memória do modo completo e do modo streaming.')
+    parser.add_argument('--escala', type=int, default=50)
+    parser.add_argument('--chunksize', type=int, default=500)
+    parser.add_argument('--modo', choices=['completo', 'streaming'])
+    parser.add_argument('--arquivo')
+    parser.add_argument('--db')
+    args = parser.parse_args()
+
+    if args.modo:
+        executar_modo(args.modo, args.arquivo, args.db, args.chunksize)
+        return
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_csv = os.path.join(pasta, 'ExpVinho.csv')
+        with open(caminho_csv, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(gerar_csv(args.escala))
+        print(f'Arquivo sintético: {os.path.getsize(caminho_csv) / 1e6:.1f} MB (escala {args.escala})')
+
+        for modo in ['completo', 'streaming']:
+            db_url = f"sqlite:///{os.path.join(pasta, f'{modo}.sqlite')}"
+            subprocess.run([
+                sys.executable, '-m', 'benchmarks.bench_streaming',
+                '--modo', modo, '--arquivo', caminho_csv, '--db', db_url, '--chunksize', str(args.chunksize)
+            ], check=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# Benchmark da transformação largo -> longo dos arquivos da Embrapa
+# Uso: python -m benchmarks.bench_transform [--escalas 1 10 100] [--repeticoes 3]
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.dados_sinteticos import gerar_dataframe
+from utils.pipeline_export import process_file
+
+# Implementação anterior de process_file (apply linha a linha), mantida apenas para comparação
+def process_file_legado(file_name, data):
+    data = data.melt(id_vars=['Id', 'País'], var_name='Ano', value_name='Value')
+    data['Valor'] = data.apply(lambda row: row['Value'] if '.' in str(row['Ano']) else None, axis=1)
+    data['Quantidade'] = data.apply(lambda row: row['Value'] if '.' not in str(row['Ano']) else None, axis=1)
+    data['Ano'] = data['Ano'].str.replace(r'\.1$', '', regex=True)
+    data = data.groupby(['Id', 'País', 'Ano'], as_index=False).agg({
+        'Quantidade': 'sum',
+        'Valor': 'sum'
+    })
+    data['Tipo'] = 'Vinhos de mesa' if file_name == 'ExpVinho.csv' else 'Desconhecido'
+    data = data[~((data['Quantidade'] == 0) & (data['Valor'] == 0))]
+    return data
+
+# Função que mede o menor tempo entre as repetições
+def medir(funcao, data, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao('ExpVinho.csv', data.copy())
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara a transformação vetorizada com a implementação linha a linha.')
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'escala':>6} {'linhas':>10} {'legado (s)':>12} {'vetorizado (s)':>15} {'ganho':>8}")
+    for escala in args.escalas:
+        data = gerar_dataframe(escala)
+        tempo_legado, esperado = medir(process_file_legado, data, args.repeticoes)
+        tempo_novo, obtido = medir(process_file, data, args.repeticoes)
+
+        # O esquema e os valores devem ser idênticos aos da implementação anterior ("Ano" agora é inteiro)
+        esperado = esperado.assign(Ano=esperado['Ano'].astype('int16'))
+        pd.testing.assert_frame_equal(
+            esperado.reset_index(drop=True),
+            obtido.reset_index(drop=True),
+            check_dtype=False
+        )
+        print(f'{escala:>6} {len(obtido):>10} {tempo_legado:>12.3f} {tempo_novo:>15.3f} {tempo_legado / tempo_novo:>7.1f}x')
+
+if __name__ == '__main__':
+    main()
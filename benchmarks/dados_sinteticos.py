@@ -0,0 +1,41 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from utils.pipeline import FONTES
+
+# Tamanho aproximado de um arquivo real da Embrapa: ~140 países, anos de 1970 até 2023
+PAISES_BASE = 140
+ANO_INICIAL = 1970
+ANO_FINAL = 2023
+
+# Função que gera o texto de um CSV no formato largo da Embrapa (Id;País;1970;1970;1971;1971;...)
+# A primeira coluna de cada ano é a Quantidade e a segunda é o Valor
+# n_paises (opcional) substitui o número de países dado pela escala
+def gerar_csv(escala=1, ano_inicial=ANO_INICIAL, ano_final=ANO_FINAL, proporcao_zeros=0.4, seed=42, n_paises=None):
+    rng = np.random.default_rng(seed)
+    n_paises = n_paises or PAISES_BASE * escala
+    anos = list(range(ano_inicial, ano_final + 1))
+
+    valores = rng.integers(1, 5_000_000, size=(n_paises, len(anos) * 2))
+    valores[rng.random(valores.shape) < proporcao_zeros] = 0
+
+    cabecalho = ['Id', 'País'] + [str(ano) for ano in anos for _ in range(2)]
+    linhas = [';'.join(cabecalho)]
+    for i in range(n_paises):
+        linhas.append(';'.join([str(i + 1), f'País {i + 1:05d}'] + [str(v) for v in valores[i]]))
+    return '\n'.join(linhas) + '\n'
+
+# Função que gera o DataFrame exatamente como o app o recebe do pd.read_csv
+def gerar_dataframe(escala=1, **kwargs):
+    return pd.read_csv(io.StringIO(gerar_csv(escala, **kwargs)), sep=';')
+
+# Função que gera um conjunto de arquivos (nome, bytes) de uma direção: países x anos x Tipos
+# Os nomes dos arquivos seguem o registro de utils/pipeline.py (um arquivo por Tipo, os mesmos países em todos)
+def gerar_arquivos(direcao='export', n_paises=PAISES_BASE, ano_inicial=ANO_INICIAL, ano_final=ANO_FINAL, n_tipos=None, proporcao_zeros=0.4, seed=42):
+    fontes = [fonte for fonte in FONTES if fonte['direcao'] == direcao][:n_tipos]
+    return [
+        (fonte['padrao'], gerar_csv(ano_inicial=ano_inicial, ano_final=ano_final, proporcao_zeros=proporcao_zeros, seed=seed + i, n_paises=n_paises).encode('utf-8'))
+        for i, fonte in enumerate(fontes)
+    ]
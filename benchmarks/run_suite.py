@@ -0,0 +1,255 @@
+# Suíte de benchmarks dos caminhos críticos de ingestão e do dashboard, com dados sintéticos no formato da Embrapa
+# Cobre: leitura do CSV, transformação, gravação (upsert/dedup), resumo, carga via utils/db_queries e agregações do dashboard
+# O resultado é gravado em JSON para comparação entre commits
+#
+# Uso:
+#   python -m benchmarks.run_suite [--paises 140] [--anos 1970 2023] [--tipos 4] [--repeticoes 5]
+#                                  [--db-url URL] [--saida resultado.json] [--comparar base.json]
+#
+# Sem --db-url é utilizado um banco SQLite temporário; com a URL de um PostgreSQL local as tabelas
+# bench_* são criadas e removidas ao final
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from benchmarks.dados_sinteticos import ANO_FINAL, ANO_INICIAL, PAISES_BASE, gerar_arquivos
+from utils import charts, file_cache, snapshot
+from utils.analytics import complementary_analyses
+from utils.batch_ingest import process_files, read_embrapa_csv
+from utils.db_queries import compact_frame, get_last_years_data, query_data
+from utils.db_writer import upsert_dataframe
+from utils.filters import apply_filters
+from utils.pipeline import process_dataset
+from utils.ranking import build_ranking_index, country_totals, rank_countries, yearly_values
+from utils.rollups import refresh_rollup, rollup_table
+
+# Tabela utilizada pela suíte (a tabela de resumo é bench_export_vinho_resumo)
+TABELA = 'bench_export_vinho'
+
+# Filtros do dashboard utilizados nas agregações
+TOP_N = 10
+ANOS_DASHBOARD = 15
+
+# Função que executa uma função várias vezes e retorna os tempos (s) e o último resultado
+# preparar (opcional) é executada antes de cada repetição, fora da medição
+def medir(funcao, repeticoes, preparar=None):
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos, resultado
+
+# Função que monta o registro de um caso medido
+def caso(etapa, nome, tempos, linhas):
+    return {
+        'etapa': etapa,
+        'caso': nome,
+        'linhas': int(linhas),
+        'repeticoes': len(tempos),
+        'mediana_s': statistics.median(tempos),
+        'min_s': min(tempos),
+        'max_s': max(tempos),
+    }
+
+# Função que retorna o commit atual do repositório (None fora de um repositório git)
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Função que remove as tabelas da suíte
+def remover_tabelas(engine):
+    with engine.begin() as connection:
+        for tabela in (TABELA, rollup_table(TABELA)):
+            connection.execute(text(f'DROP TABLE IF EXISTS {tabela}'))
+
+# Casos de ingestão: leitura, transformação, processamento paralelo, gravação e resumo
+def casos_ingestao(engine, arquivos, repeticoes):
+    resultados = []
+    linhas_csv = sum(conteudo.count(b'\n') - 1 for _, conteudo in arquivos)
+
+    tempos, lidos = medir(lambda: [read_embrapa_csv(conteudo) for _, conteudo in arquivos], repeticoes)
+    resultados.append(caso('ingestão', 'leitura do CSV (pd.read_csv)', tempos, linhas_csv))
+
+    tempos, processados = medir(
+        lambda: [process_dataset(nome, df) for (nome, _), df in zip(arquivos, lidos)], repeticoes
+    )
+    dados = pd.concat(processados, ignore_index=True)
+    resultados.append(caso('ingestão', 'transformação (pipeline)', tempos, len(dados)))
+
+    tempos, _ = medir(
+        lambda: process_files(arquivos, process_dataset), repeticoes, preparar=file_cache.clear_cache
+    )
+    resultados.append(caso('ingestão', 'process_files (leitura + transformação em paralelo)', tempos, len(dados)))
+
+    tempos, _ = medir(lambda: upsert_dataframe(engine, dados, TABELA), repeticoes, preparar=lambda: remover_tabelas(engine))
+    resultados.append(caso('gravação', 'upsert em tabela vazia', tempos, len(dados)))
+
+    tempos, _ = medir(lambda: upsert_dataframe(engine, dados, TABELA), repeticoes)
+    resultados.append(caso('gravação', 'upsert de reenvio (dedup, sem alterações)', tempos, len(dados)))
+
+    alterados = dados.assign(Valor=dados['Valor'] + 1)
+    tempos, _ = medir(lambda: upsert_dataframe(engine, alterados, TABELA), 1)
+    resultados.append(caso('gravação', 'upsert com todas as linhas alteradas', tempos, len(dados)))
+    upsert_dataframe(engine, dados, TABELA)
+
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP TABLE IF EXISTS {rollup_table(TABELA)}'))
+    tempos, _ = medir(lambda: refresh_rollup(engine, TABELA, dados), 1)
+    resultados.append(caso('gravação', 'criação da tabela de resumo', tempos, len(dados)))
+
+    tempos, _ = medir(lambda: refresh_rollup(engine, TABELA, dados[['Tipo', 'Ano']].drop_duplicates()), repeticoes)
+    resultados.append(caso('gravação', 'atualização incremental do resumo', tempos, len(dados)))
+    return resultados
+
+# Casos de carga: consultas de utils/db_queries, compactação e snapshot local
+def casos_carga(engine, repeticoes):
+    resultados = []
+
+    tempos, completo = medir(lambda: query_data(engine, TABELA), repeticoes)
+    resultados.append(caso('carga', 'query_data (tabela completa)', tempos, len(completo)))
+
+    tempos, janela = medir(lambda: get_last_years_data(engine, TABELA, ANOS_DASHBOARD), repeticoes)
+    resultados.append(caso('carga', f'get_last_years_data ({ANOS_DASHBOARD} anos)', tempos, len(janela)))
+
+    tempos, resumo = medir(lambda: get_last_years_data(engine, rollup_table(TABELA), ANOS_DASHBOARD), repeticoes)
+    resultados.append(caso('carga', f'get_last_years_data do resumo ({ANOS_DASHBOARD} anos)', tempos, len(resumo)))
+
+    tempos, _ = medir(lambda: compact_frame(janela), repeticoes)
+    resultados.append(caso('carga', 'compact_frame', tempos, len(janela)))
+
+    with tempfile.TemporaryDirectory() as pasta:
+        snapshot.SNAPSHOT_DIR = pasta
+        tempos, _ = medir(lambda: snapshot.write_snapshot(engine, TABELA), repeticoes)
+        resultados.append(caso('carga', 'gravação do snapshot Arrow (por década)', tempos, len(completo)))
+        decada = snapshot.decade(completo['Ano'].max())
+        tempos, _ = medir(lambda: snapshot.write_snapshot(engine, TABELA, {decada}), repeticoes)
+        resultados.append(caso('carga', 'regravação da última década do snapshot', tempos, int((completo['Ano'] >= decada).sum())))
+        ano_inicio = int(completo['Ano'].max()) - ANOS_DASHBOARD
+        tempos, _ = medir(lambda: snapshot.read_snapshot(TABELA, ano_inicio), repeticoes)
+        resultados.append(caso('carga', f'leitura do snapshot Arrow ({ANOS_DASHBOARD} anos)', tempos, len(janela)))
+        tempos, _ = medir(lambda: snapshot.read_snapshot(TABELA), repeticoes)
+        resultados.append(caso('carga', 'leitura do snapshot Arrow (histórico completo)', tempos, len(completo)))
+
+    return resultados, compact_frame(janela), compact_frame(resumo)
+
+# Casos do dashboard: ranking, análises complementares, filtros da Tabela e gráficos
+def casos_dashboard(janela, resumo, repeticoes):
+    resultados = []
+    tipos = sorted(resumo['Tipo'].dropna().astype(str).unique())
+    anos = (int(resumo['Ano'].min()), int(resumo['Ano'].max()))
+
+    tempos, indice = medir(lambda: build_ranking_index(resumo), repeticoes)
+    resultados.append(caso('dashboard', 'índice de ranking (somas acumuladas)', tempos, len(resumo)))
+
+    tempos, top = medir(lambda: rank_countries(indice, tipos, anos, TOP_N), repeticoes)
+    resultados.append(caso('dashboard', f'top {TOP_N} países', tempos, len(resumo)))
+
+    tempos, totais = medir(lambda: country_totals(indice, tipos, anos, top, 'Valor'), repeticoes)
+    resultados.append(caso('dashboard', 'totais por país (barras)', tempos, len(resumo)))
+
+    tempos, anuais = medir(lambda: yearly_values(indice, tipos, anos, top, 'Valor'), repeticoes)
+    resultados.append(caso('dashboard', 'valor por ano e país (linhas)', tempos, len(resumo)))
+
+    tempos, _ = medir(lambda: complementary_analyses(resumo), repeticoes)
+    resultados.append(caso('dashboard', 'análises complementares', tempos, len(resumo)))
+
+    paises = janela['País'].dropna().astype(str).unique()[:TOP_N].tolist()
+    tempos, filtrado = medir(lambda: apply_filters(janela, paises, tipos[:2], anos), repeticoes)
+    resultados.append(caso('dashboard', 'filtros da Tabela', tempos, len(janela)))
+
+    tempos, _ = medir(lambda: filtrado.to_csv(index=False).encode('utf-8'), repeticoes)
+    resultados.append(caso('dashboard', 'CSV da Tabela filtrada', tempos, len(filtrado)))
+
+    tempos, _ = medir(
+        lambda: charts.bar_chart(totais, 'Valor', f'Valor (US$): Top {TOP_N} Países', TOP_N).to_json(),
+        repeticoes, preparar=charts._figuras.clear
+    )
+    resultados.append(caso('dashboard', 'gráfico de barras (construção + JSON)', tempos, len(totais)))
+
+    tempos, _ = medir(
+        lambda: charts.line_chart(anuais, f'Valor por Ano (US$): Top {TOP_N} Países').to_json(),
+        repeticoes, preparar=charts._figuras.clear
+    )
+    resultados.append(caso('dashboard', 'gráfico de linhas (construção + JSON)', tempos, len(anuais)))
+    return resultados
+
+# Função que imprime a comparação entre o resultado atual e um resultado anterior (razão das medianas)
+def comparar(atual, base):
+    anteriores = {(c['etapa'], c['caso']): c for c in base['casos']}
+    print(f"\nComparação com {base.get('commit')} ({base.get('data')}):")
+    for c in atual['casos']:
+        anterior = anteriores.get((c['etapa'], c['caso']))
+        if anterior is None:
+            continue
+        razao = c['mediana_s'] / anterior['mediana_s'] if anterior['mediana_s'] else float('nan')
+        print(f"  {c['etapa']:<10} {c['caso']:<55} {anterior['mediana_s'] * 1000:10.2f} ms -> {c['mediana_s'] * 1000:10.2f} ms ({razao:.2f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks de ingestão e do dashboard com dados sintéticos (saída em JSON).')
+    parser.add_argument('--paises', type=int, default=PAISES_BASE, help='Países por arquivo')
+    parser.add_argument('--anos', type=int, nargs=2, default=[ANO_INICIAL, ANO_FINAL], metavar=('INICIAL', 'FINAL'))
+    parser.add_argument('--tipos', type=int, default=4, help='Número de arquivos (Tipos) de exportação, de 1 a 4')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--db-url', help='Banco utilizado na gravação e na carga (padrão: SQLite temporário)')
+    parser.add_argument('--saida', help='Arquivo JSON de saída (padrão: imprime o JSON)')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior para comparação')
+    args = parser.parse_args()
+
+    arquivos = gerar_arquivos('export', args.paises, args.anos[0], args.anos[1], args.tipos)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        engine = create_engine(args.db_url or f"sqlite:///{os.path.join(pasta, 'bench.sqlite')}")
+        try:
+            casos = casos_ingestao(engine, arquivos, args.repeticoes)
+            casos_db, janela, resumo = casos_carga(engine, args.repeticoes)
+            casos += casos_db
+            casos += casos_dashboard(janela, resumo, args.repeticoes)
+        finally:
+            remover_tabelas(engine)
+            engine.dispose()
+
+    resultado = {
+        'commit': commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'banco': engine.dialect.name,
+        'parametros': {
+            'paises': args.paises,
+            'anos': args.anos,
+            'tipos': len(arquivos),
+            'repeticoes': args.repeticoes,
+            'megabytes_csv': round(sum(len(c) for _, c in arquivos) / 1e6, 3),
+        },
+        'casos': casos,
+    }
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as destino:
+            json.dump(resultado, destino, ensure_ascii=False, indent=2)
+        for c in casos:
+            print(f"  {c['etapa']:<10} {c['caso']:<55} {c['mediana_s'] * 1000:10.2f} ms  ({c['linhas']} linhas)")
+    else:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as origem:
+            comparar(resultado, json.load(origem))
+
+if __name__ == '__main__':
+    main()
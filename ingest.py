@@ -0,0 +1,160 @@
+# Carga em lote (sem navegador) dos arquivos CSV da Embrapa no Banco de Dados PostgreSQL
+# Utiliza o mesmo pipeline da página de Upload do app.py
+#
+# Uso:
+#   python ingest.py <pasta com ExpX.csv/ImpX.csv> [--db-url URL] [--workers N] [--streaming] [--chunksize N] [--completo]
+#   python ingest.py --particionar [--db-url URL]
+#
+# Por padrão somente os anos novos ou alterados (checksum) de cada arquivo são processados; --completo reprocessa todos
+#
+# --particionar converte export_vinho e import_vinho (PostgreSQL) em tabelas particionadas por década de "Ano"
+# (migração opcional, executada uma única vez; pode ser combinada com a carga de uma pasta)
+#
+# A URL do banco é lida de --db-url, da variável de ambiente DB_URL ou de .streamlit/secrets.toml
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+import toml
+from sqlalchemy import inspect
+
+from utils.batch_ingest import CHUNK_ROWS, MAX_WORKERS, process_files, stream_file_to_db
+from utils.database import create_pooled_engine
+from utils.db_writer import upsert_dataframe
+from utils.incremental import incremental_state, save_checksums
+from utils.migrations import TABLES, migrate_schema, partition_table
+from utils.pipeline import dataset_type, find_source, process_dataset
+from utils.rollups import refresh_rollup, rollup_table
+from utils.snapshot import decade, write_snapshot
+
+# Função que obtém a URL do banco de dados
+def get_db_url(db_url=None):
+    if db_url:
+        return db_url
+    if os.environ.get('DB_URL'):
+        return os.environ['DB_URL']
+    caminho = os.path.join('.streamlit', 'secrets.toml')
+    if os.path.exists(caminho):
+        return toml.load(caminho).get('DB_URL')
+    return None
+
+# Função que agrupa os arquivos CSV da pasta por tabela de destino, de acordo com o registro de utils/pipeline.py
+def discover_files(pasta):
+    arquivos = {}
+    for nome in sorted(os.listdir(pasta)):
+        caminho = os.path.join(pasta, nome)
+        if not nome.lower().endswith('.csv') or not os.path.isfile(caminho):
+            continue
+        try:
+            fonte = find_source(nome)
+        except ValueError as e:
+            print(f'Ignorando {nome}: {e}', file=sys.stderr)
+            continue
+        arquivos.setdefault(fonte['tabela'], []).append((nome, caminho))
+    return arquivos
+
+# Função que carrega os arquivos de uma tabela e retorna as contagens e os tempos de cada etapa
+def ingest_table(engine, table_name, arquivos, workers, streaming, chunksize, completo):
+    tempos = {}
+    if streaming:
+        inicio = time.perf_counter()
+        resultado = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        pares = []
+        for nome, caminho in arquivos:
+            contagens, pares_arquivo = stream_file_to_db(engine, nome, caminho, process_dataset, table_name, chunksize)
+            pares.append(pares_arquivo)
+            for chave in resultado:
+                resultado[chave] += contagens[chave]
+        tempos['leitura + transformação + gravação'] = time.perf_counter() - inicio
+        gravados = pd.concat(pares, ignore_index=True)
+    else:
+        inicio = time.perf_counter()
+        incremental = None if completo else incremental_state(engine, table_name, dataset_type)
+        gravados, tempos_arquivos = process_files(arquivos, process_dataset, max_workers=workers, incremental=incremental)
+        tempos['leitura + transformação'] = time.perf_counter() - inicio
+        tempos['  leitura (soma por arquivo)'] = sum(t['Leitura (s)'] for t in tempos_arquivos)
+        tempos['  transformação (soma por arquivo)'] = sum(t['Transformação (s)'] for t in tempos_arquivos)
+
+        inicio = time.perf_counter()
+        resultado = upsert_dataframe(engine, gravados, table_name)
+        tempos['gravação (COPY + upsert)'] = time.perf_counter() - inicio
+        if incremental is not None:
+            save_checksums(engine, table_name, incremental['checksums'])
+
+    if resultado['inserted'] or resultado['updated']:
+        inicio = time.perf_counter()
+        refresh_rollup(engine, table_name, gravados)
+        tempos['tabela de resumo'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        decadas = {decade(ano) for ano in gravados['Ano'].unique()}
+        write_snapshot(engine, table_name, decadas)
+        write_snapshot(engine, rollup_table(table_name), decadas)
+        tempos['snapshots'] = time.perf_counter() - inicio
+
+    return resultado, sum(resultado.values()), tempos
+
+def main():
+    parser = argparse.ArgumentParser(description='Carrega os arquivos CSV da Embrapa (ExpX.csv/ImpX.csv) no banco de dados.')
+    parser.add_argument('pasta', nargs='?', help='Pasta com os arquivos CSV baixados do site da Embrapa')
+    parser.add_argument('--db-url', help='URL do banco (padrão: variável DB_URL ou .streamlit/secrets.toml)')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help='Arquivos processados em paralelo')
+    parser.add_argument('--streaming', action='store_true', help='Lê e grava os arquivos em blocos de linhas')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_ROWS, help='Linhas por bloco no modo streaming')
+    parser.add_argument('--completo', action='store_true', help='Reprocessa todos os anos dos arquivos (sem a carga incremental)')
+    parser.add_argument('--particionar', action='store_true', help='Particiona export_vinho e import_vinho por década (PostgreSQL)')
+    args = parser.parse_args()
+    if not args.pasta and not args.particionar:
+        parser.error('informe a pasta com os arquivos CSV ou --particionar')
+
+    db_url = get_db_url(args.db_url)
+    if not db_url:
+        parser.error('URL do banco não encontrada: informe --db-url ou defina DB_URL')
+
+    arquivos = discover_files(args.pasta) if args.pasta else {}
+    if args.pasta and not arquivos:
+        parser.error(f'Nenhum arquivo ExpX.csv/ImpX.csv encontrado em {args.pasta}')
+
+    # Gravação sequencial: poucas conexões e sem timeout por comando (cargas completas podem ser longas)
+    engine = create_pooled_engine(db_url, sessoes=1, extras=2, statement_timeout_ms=0)
+    if args.particionar:
+        if engine.dialect.name != 'postgresql':
+            parser.error('--particionar está disponível somente no PostgreSQL')
+        for table_name in TABLES:
+            if inspect(engine).has_table(table_name):
+                inicio = time.perf_counter()
+                convertida = partition_table(engine, table_name)
+                situacao = 'particionada por década' if convertida else 'já estava particionada'
+                print(f'{table_name}: {situacao} ({time.perf_counter() - inicio:.3f} s)')
+    migrate_schema(engine)
+    if not arquivos:
+        return
+
+    inicio_total = time.perf_counter()
+    linhas_total = 0
+    bytes_total = 0
+    for table_name, arquivos_tabela in arquivos.items():
+        bytes_tabela = sum(os.path.getsize(caminho) for _, caminho in arquivos_tabela)
+
+        inicio = time.perf_counter()
+        resultado, linhas, tempos = ingest_table(
+            engine, table_name, arquivos_tabela, args.workers, args.streaming, args.chunksize, args.completo
+        )
+        duracao = time.perf_counter() - inicio
+        linhas_total += linhas
+        bytes_total += bytes_tabela
+
+        print(f'\n{table_name}: {len(arquivos_tabela)} arquivo(s), {bytes_tabela / 1e6:.2f} MB, {linhas} linhas')
+        print(f"  inseridas: {resultado['inserted']} | atualizadas: {resultado['updated']} | ignoradas: {resultado['skipped']}")
+        for etapa, segundos in tempos.items():
+            print(f'  {etapa:<36} {segundos:8.3f} s')
+        print(f'  {"total":<36} {duracao:8.3f} s | {linhas / duracao:,.0f} linhas/s | {bytes_tabela / 1e6 / duracao:.2f} MB/s')
+
+    duracao_total = time.perf_counter() - inicio_total
+    print(f'\nTotal: {linhas_total} linhas em {duracao_total:.3f} s | '
+          f'{linhas_total / duracao_total:,.0f} linhas/s | {bytes_total / 1e6 / duracao_total:.2f} MB/s')
+
+if __name__ == '__main__':
+    main()
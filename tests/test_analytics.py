@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+
+from utils.analytics import complementary_analyses, peak_explanation
+
+# Conjunto pequeno e fixo (País, Ano, Tipo): os números esperados abaixo foram calculados à mão
+@pytest.fixture
+def dados():
+    return pd.DataFrame([
+        ('A', 2019, 'Vinhos de mesa', 100.0, 80.0),
+        ('A', 2020, 'Vinhos de mesa', 300.0, 100.0),
+        ('A', 2020, 'Suco de uva', 100.0, 100.0),
+        ('B', 2020, 'Vinhos de mesa', 200.0, 50.0),
+        ('B', 2015, 'Suco de uva', 50.0, 0.0),
+        ('C', 2013, 'Vinhos de mesa', 90.0, 30.0),
+    ], columns=['País', 'Ano', 'Tipo', 'Valor', 'Quantidade'])
+
+def test_custo_unitario_total_e_por_tipo(dados):
+    analises = complementary_analyses(dados)
+
+    # Linhas sem Quantidade ficam fora das análises
+    assert analises['custo_unitario_total'] == pytest.approx(790 / 360)
+    por_tipo = analises['custo_unitario_por_tipo']
+    assert por_tipo['Tipo'].tolist() == ['Suco de uva', 'Vinhos de mesa']
+    assert por_tipo['Custo Unitário Médio'].tolist() == pytest.approx([1.0, 690 / 260])
+
+def test_pico_com_ano_anterior(dados):
+    pico = complementary_analyses(dados)['pico']
+
+    assert pico['pais'] == 'A'
+    assert pico['ano'] == 2020
+    assert pico['valor'] == 400.0
+    assert pico['quantidade'] == 200.0
+    assert pico['custo_unitario'] == pytest.approx(2.0)
+    assert pico['custo_unitario_ano_anterior'] == pytest.approx(1.25)
+
+def test_top_paises_na_janela(dados):
+    top = complementary_analyses(dados, anos_janela=5, top_n=3)['top']
+
+    # C (2013) está fora da janela de 5 anos contada a partir de 2020
+    assert top['País'].tolist() == ['A', 'B']
+    assert top['Valor'].tolist() == [500.0, 200.0]
+    assert top['Quantidade'].tolist() == [280.0, 50.0]
+    assert top['Custo Unitário Médio'].tolist() == pytest.approx([500 / 280, 4.0])
+
+def test_top_n_limita_o_numero_de_paises(dados):
+    top = complementary_analyses(dados, anos_janela=10, top_n=2)['top']
+
+    assert top['País'].tolist() == ['A', 'B']
+
+def test_sem_quantidade_positiva_retorna_none(dados):
+    assert complementary_analyses(dados.assign(Quantidade=0.0)) is None
+
+def test_categorias_nao_observadas_sao_ignoradas(dados):
+    categorico = dados.astype({'País': pd.CategoricalDtype(['A', 'B', 'C', 'D']), 'Tipo': 'category'})
+
+    analises = complementary_analyses(categorico)
+
+    assert analises['custo_unitario_total'] == pytest.approx(790 / 360)
+    assert analises['top']['País'].tolist() == ['A', 'B']
+
+def test_texto_do_pico_exportacao(dados):
+    texto = peak_explanation(complementary_analyses(dados)['pico'], 'export')
+
+    assert texto == (
+        'O país **A** registrou o maior pico de exportação de vinho no ano **2020**, com um valor total exportado de '
+        '**400.00** e um volume de **200.00** litros. O custo unitário médio no ano de pico foi **2.00**. '
+        'No ano anterior (**2019**), o custo unitário médio foi **1.25**. '
+        'O aumento no custo unitário médio pode indicar uma exportação de vinhos de maior valor agregado no ano do pico.'
+    )
+
+def test_texto_do_pico_importacao_com_reducao():
+    pico = {'pais': 'B', 'ano': 2021, 'valor': 1000.0, 'quantidade': 1000.0, 'custo_unitario': 1.0, 'custo_unitario_ano_anterior': 2.5}
+
+    texto = peak_explanation(pico, 'import')
+
+    assert texto.startswith('O país **B** registrou o maior pico de importação de vinho no ano **2021**, com um valor total importado de **1,000.00**')
+    assert texto.endswith(
+        'No ano anterior (**2020**), o custo unitário médio foi **2.50**. '
+        'A redução no custo unitário médio sugere que o aumento no valor importado foi impulsionado principalmente pelo volume.'
+    )
+
+def test_texto_do_pico_sem_ano_anterior():
+    pico = {'pais': 'C', 'ano': 2013, 'valor': 90.0, 'quantidade': 30.0, 'custo_unitario': 3.0, 'custo_unitario_ano_anterior': None}
+
+    texto = peak_explanation(pico)
+
+    assert texto.endswith('Não há dados disponíveis para o ano anterior (**2012**) para comparação.')
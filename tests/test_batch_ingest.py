@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from benchmarks.dados_sinteticos import gerar_csv
+from utils.batch_ingest import process_files, read_embrapa_csv
+from utils.file_cache import clear_cache
+from utils.pipeline_export import process_file
+from utils.pipeline_import import process_file_import
+
+ARQUIVOS_EXPORT = ['ExpVinho.csv', 'ExpEspumantes.csv', 'ExpUva.csv', 'ExpSuco.csv']
+ARQUIVOS_IMPORT = ['ImpVinhos.csv', 'ImpEspumantes.csv', 'ImpFrescas.csv', 'ImpPassas.csv', 'ImpSuco.csv']
+
+# O cache de arquivos processados é limpo antes de cada teste: todos os arquivos passam pelo pipeline
+@pytest.fixture(autouse=True)
+def cache_vazio():
+    clear_cache()
+    yield
+    clear_cache()
+
+# Caminho serial anterior do app: leitura, transformação e pd.concat a cada arquivo
+def processar_serial(arquivos, process_fn):
+    consolidated_data = pd.DataFrame()
+    for nome, conteudo in arquivos:
+        processed_data = process_fn(nome, read_embrapa_csv(conteudo))
+        consolidated_data = pd.concat([consolidated_data, processed_data], ignore_index=True)
+    return consolidated_data
+
+@pytest.mark.parametrize('nomes, process_fn', [(ARQUIVOS_EXPORT, process_file), (ARQUIVOS_IMPORT, process_file_import)])
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_processamento_paralelo_igual_ao_serial(nomes, process_fn, max_workers):
+    arquivos = [(nome, gerar_csv(2, seed=i).encode('utf-8')) for i, nome in enumerate(nomes)]
+
+    esperado = processar_serial(arquivos, process_fn)
+    obtido, tempos = process_files(arquivos, process_fn, max_workers=max_workers)
+
+    pd.testing.assert_frame_equal(esperado, obtido)
+    assert [t['Arquivo'] for t in tempos] == nomes
+    assert sum(t['Linhas'] for t in tempos) == len(obtido)
+
+def test_segundo_processamento_vem_do_cache():
+    arquivos = [(nome, gerar_csv(2, seed=i).encode('utf-8')) for i, nome in enumerate(ARQUIVOS_EXPORT)]
+
+    primeiro, tempos_primeiro = process_files(arquivos, process_file)
+    segundo, tempos_segundo = process_files(arquivos, process_file)
+
+    pd.testing.assert_frame_equal(primeiro, segundo)
+    assert not any(t['Cache'] for t in tempos_primeiro)
+    assert all(t['Cache'] for t in tempos_segundo)
+
+def test_lista_vazia():
+    data, tempos = process_files([], process_file)
+
+    assert data.empty
+    assert tempos == []
@@ -0,0 +1,92 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from utils.db_writer import upsert_dataframe
+from utils.migrations import migrate_schema
+from utils.revisions import table_revision
+from utils.rollups import ensure_rollup, refresh_rollup
+
+# Engine SQLite (banco local de testes) em um arquivo temporário
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'teste.sqlite'}")
+
+# Função que monta um lote no formato das tabelas export_vinho/import_vinho
+def lote(valores):
+    return pd.DataFrame({
+        'Id': [1, 2, 3],
+        'País': ['Argentina', 'Chile', 'Uruguai'],
+        'Ano': [2020, 2020, 2021],
+        'Quantidade': [10.0, 20.0, 30.0],
+        'Valor': valores,
+        'Tipo': ['Vinhos de mesa'] * 3,
+    })
+
+# Função que lê a tabela ordenada pela chave natural
+def ler(engine):
+    with engine.connect() as connection:
+        return pd.read_sql(text('SELECT * FROM export_vinho ORDER BY "Id"'), connection)
+
+def test_primeira_gravacao_insere_todas_as_linhas(engine):
+    resultado = upsert_dataframe(engine, lote([1.0, 2.0, 3.0]), 'export_vinho')
+
+    assert resultado == {'inserted': 3, 'updated': 0, 'skipped': 0}
+    assert ler(engine)['Valor'].tolist() == [1.0, 2.0, 3.0]
+
+def test_regravacao_identica_e_ignorada(engine):
+    upsert_dataframe(engine, lote([1.0, 2.0, 3.0]), 'export_vinho')
+    revisao = table_revision(engine, 'export_vinho')
+
+    resultado = upsert_dataframe(engine, lote([1.0, 2.0, 3.0]), 'export_vinho')
+
+    assert resultado == {'inserted': 0, 'updated': 0, 'skipped': 3}
+    assert table_revision(engine, 'export_vinho') == revisao
+
+def test_on_conflict_atualiza_somente_as_medidas_alteradas(engine):
+    upsert_dataframe(engine, lote([1.0, 2.0, 3.0]), 'export_vinho')
+    revisao = table_revision(engine, 'export_vinho')
+
+    novo = pd.concat([lote([1.0, 5.0, 3.0]), pd.DataFrame({
+        'Id': [4], 'País': ['Peru'], 'Ano': [2021], 'Quantidade': [40.0], 'Valor': [4.0], 'Tipo': ['Vinhos de mesa'],
+    })], ignore_index=True)
+    resultado = upsert_dataframe(engine, novo, 'export_vinho')
+
+    assert resultado == {'inserted': 1, 'updated': 1, 'skipped': 2}
+    tabela = ler(engine)
+    assert len(tabela) == 4
+    assert tabela['Valor'].tolist() == [1.0, 5.0, 3.0, 4.0]
+    assert table_revision(engine, 'export_vinho') == revisao + 1
+
+def test_on_conflict_nothing_mantem_os_valores_gravados(engine):
+    upsert_dataframe(engine, lote([1.0, 2.0, 3.0]), 'export_vinho')
+
+    resultado = upsert_dataframe(engine, lote([9.0, 9.0, 9.0]), 'export_vinho', on_conflict='nothing')
+
+    assert resultado == {'inserted': 0, 'updated': 0, 'skipped': 3}
+    assert ler(engine)['Valor'].tolist() == [1.0, 2.0, 3.0]
+
+def test_chaves_duplicadas_no_lote_mantem_a_ultima(engine):
+    data = pd.concat([lote([1.0, 2.0, 3.0]), lote([7.0, 8.0, 9.0])], ignore_index=True)
+
+    resultado = upsert_dataframe(engine, data, 'export_vinho')
+
+    assert resultado == {'inserted': 3, 'updated': 0, 'skipped': 3}
+    assert ler(engine)['Valor'].tolist() == [7.0, 8.0, 9.0]
+
+def test_migracao_mantem_a_ultima_linha_duplicada_e_recria_o_resumo(engine):
+    # Tabela do fluxo antigo (append, sem chave única): a linha de 2019 foi revisada de 10 para 12
+    antigo = lote([1.0, 2.0, 3.0]).iloc[[0]].assign(Ano=2019)
+    revisado = antigo.assign(Quantidade=12.0, Valor=120.0)
+    pd.concat([antigo.assign(Quantidade=10.0, Valor=100.0), revisado]).to_sql('export_vinho', engine, index=False)
+    ensure_rollup(engine, 'export_vinho')
+
+    migrate_schema(engine)
+    upsert_dataframe(engine, lote([1.0, 2.0, 3.0]), 'export_vinho')
+    refresh_rollup(engine, 'export_vinho', lote([1.0, 2.0, 3.0]))
+
+    base = ler(engine)
+    assert base.loc[base['Ano'] == 2019, ['Quantidade', 'Valor']].values.tolist() == [[12.0, 120.0]]
+    with engine.connect() as connection:
+        resumo = pd.read_sql(text('SELECT * FROM export_vinho_resumo WHERE "Ano" = 2019'), connection)
+    assert resumo[['Quantidade', 'Valor']].values.tolist() == [[12.0, 120.0]]
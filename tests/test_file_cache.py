@@ -0,0 +1,37 @@
+import os
+
+import pandas as pd
+
+from utils import file_cache
+
+# O cache em disco é lido de uma pasta temporária, com a memória vazia (como após reiniciar o app)
+def test_nova_versao_do_pipeline_ignora_o_cache_em_disco(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_cache, 'CACHE_DIR', str(tmp_path))
+    df = pd.DataFrame({'País': ['Chile'], 'Valor': [1.0]})
+    file_cache.put_cached(('arquivo', 'ExpVinho.csv'), df)
+    file_cache.clear_cache()
+
+    pd.testing.assert_frame_equal(file_cache.get_cached(('arquivo', 'ExpVinho.csv')), df)
+
+    file_cache.clear_cache()
+    monkeypatch.setattr(file_cache, 'VERSAO_PIPELINE', file_cache.VERSAO_PIPELINE + 1)
+    assert file_cache.get_cached(('arquivo', 'ExpVinho.csv')) is None
+    file_cache.clear_cache()
+
+def test_cache_em_disco_remove_os_arquivos_usados_ha_mais_tempo(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_cache, 'CACHE_DIR', str(tmp_path))
+    df = pd.DataFrame({'Valor': [float(i) for i in range(1000)]})
+    file_cache.put_cached('a', df)
+    tamanho = os.path.getsize(file_cache._caminho('a'))
+    monkeypatch.setattr(file_cache, 'MAX_BYTES_DISCO', 2 * tamanho)
+    file_cache.put_cached('b', df)
+    os.utime(file_cache._caminho('a'), (0, 0))
+    os.utime(file_cache._caminho('b'), (1, 1))
+
+    # Leitura de 'a' (com a memória vazia) o torna o mais recente: 'b' é removido ao gravar 'c'
+    file_cache.clear_cache()
+    assert file_cache.get_cached('a') is not None
+    file_cache.put_cached('c', df)
+
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(file_cache._caminho(c)) for c in ['a', 'c'])
+    file_cache.clear_cache()
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.ranking import build_ranking_index, country_totals, rank_countries
+
+TIPOS = ['Espumantes', 'Suco de uva', 'Vinhos de mesa']
+
+# Caminho anterior do dashboard: filtro, groupby por país e nlargest
+def top_groupby(df, tipos, anos, n):
+    filtrado = df[df['Tipo'].isin(tipos) & df['Ano'].between(*anos)]
+    return filtrado.groupby('País', as_index=False)['Valor'].sum().nlargest(n, 'Valor').reset_index(drop=True)
+
+# Valores inteiros pequenos: muitos países empatados no corte do top-N
+def dados_aleatorios(semente):
+    gerador = np.random.default_rng(semente)
+    linhas = 60
+    return pd.DataFrame({
+        'País': [f'P{i:02d}' for i in gerador.integers(0, 12, linhas)],
+        'Ano': gerador.integers(2010, 2020, linhas),
+        'Tipo': gerador.choice(TIPOS, linhas),
+        'Valor': gerador.integers(0, 4, linhas).astype(float),
+        'Quantidade': gerador.integers(0, 4, linhas).astype(float),
+    })
+
+@pytest.mark.parametrize('semente', range(50))
+def test_top_paises_igual_ao_groupby_com_empates(semente):
+    df = dados_aleatorios(semente)
+    indice = build_ranking_index(df)
+    tipos, anos, n = TIPOS[:2], (2012, 2017), 3
+
+    top = country_totals(indice, tipos, anos, rank_countries(indice, tipos, anos, n))
+
+    pd.testing.assert_frame_equal(top, top_groupby(df, tipos, anos, n), check_dtype=False)
+
+def test_empate_no_corte_usa_a_ordem_alfabetica():
+    df = pd.DataFrame({
+        'País': ['P01', 'P04', 'P06', 'P07'],
+        'Ano': [2020] * 4,
+        'Tipo': ['Vinhos de mesa'] * 4,
+        'Valor': [10.0, 9.0, 9.0, 9.0],
+        'Quantidade': [1.0] * 4,
+    })
+    indice = build_ranking_index(df)
+
+    posicoes = rank_countries(indice, ['Vinhos de mesa'], (2020, 2020), 3)
+
+    assert indice['paises'][posicoes].tolist() == ['P01', 'P04', 'P06']
@@ -0,0 +1,79 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from utils import snapshot
+from utils.db_writer import upsert_dataframe
+
+# Engine SQLite (banco local de testes) e pasta temporária para os snapshots
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_DIR', str(tmp_path / 'snapshots'))
+    return create_engine(f"sqlite:///{tmp_path / 'teste.sqlite'}")
+
+# Função que monta um lote no formato da tabela export_vinho, uma linha por ano
+def lote(anos):
+    return pd.DataFrame({
+        'Id': range(1, len(anos) + 1),
+        'País': ['Chile'] * len(anos),
+        'Ano': anos,
+        'Quantidade': [1.0] * len(anos),
+        'Valor': [2.0] * len(anos),
+        'Tipo': ['Vinhos de mesa'] * len(anos),
+    })
+
+# Função que registra as décadas gravadas e se cada uma foi comprimida
+@pytest.fixture
+def gravacoes(monkeypatch):
+    registro = {}
+    original = snapshot._gravar_decada
+
+    def gravar(df, caminho, comprimir):
+        registro[int(df['Ano'].iloc[0]) // 10 * 10] = comprimir
+        original(df, caminho, comprimir)
+    monkeypatch.setattr(snapshot, '_gravar_decada', gravar)
+    return registro
+
+def test_nova_decada_regrava_a_decada_anterior_comprimida(engine, gravacoes):
+    upsert_dataframe(engine, lote([2018, 2019]), 'export_vinho')
+    snapshot.write_snapshot(engine, 'export_vinho')
+    assert gravacoes == {2010: False}
+
+    gravacoes.clear()
+    upsert_dataframe(engine, lote([2018, 2019, 2020]), 'export_vinho')
+    snapshot.write_snapshot(engine, 'export_vinho', decadas=[2020])
+
+    assert gravacoes == {2010: True, 2020: False}
+    assert snapshot.read_snapshot('export_vinho')['Ano'].tolist() == [2018, 2019, 2020]
+
+def test_snapshot_de_tabela_vazia_retorna_frame_vazio(engine):
+    upsert_dataframe(engine, lote([2020]), 'export_vinho')
+    with engine.begin() as connection:
+        connection.execute(text('DELETE FROM export_vinho'))
+    snapshot.write_snapshot(engine, 'export_vinho')
+
+    df = snapshot.read_snapshot('export_vinho')
+
+    assert df.empty
+    assert list(df.columns) == ['Id', 'País', 'Ano', 'Quantidade', 'Valor', 'Tipo']
+
+def test_gravacoes_concorrentes_da_mesma_tabela(engine):
+    upsert_dataframe(engine, lote(list(range(1990, 2024))), 'export_vinho')
+    snapshot.write_snapshot(engine, 'export_vinho')
+
+    # Regravações completas e parciais em paralelo com leituras (sessões diferentes e tarefa de Upload)
+    def tarefa(i):
+        if i % 3 == 0:
+            snapshot.write_snapshot(engine, 'export_vinho')
+        elif i % 3 == 1:
+            snapshot.write_snapshot(engine, 'export_vinho', decadas=[2000, 2020])
+        return snapshot.load_with_snapshot(engine, 'export_vinho', 15)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        resultados = list(executor.map(tarefa, range(24)))
+
+    assert all(df['Ano'].tolist() == list(range(2008, 2024)) for df in resultados)
+    assert not [nome for nome in os.listdir(snapshot.snapshot_dir('export_vinho')) if nome.endswith('.tmp')]
@@ -0,0 +1,105 @@
+import pandas as pd
+
+from utils.perf import timed_fn
+
+# Termos utilizados nos textos das análises de exportação e importação
+TERMOS = {
+    'export': {
+        'fluxo': 'exportação',
+        'verbo': 'exportado',
+    },
+    'import': {
+        'fluxo': 'importação',
+        'verbo': 'importado',
+    },
+}
+
+# Função que calcula o custo unitário (Valor / Quantidade), retornando 0 quando não há quantidade
+def _custo_unitario(valor, quantidade):
+    return valor / quantidade if quantidade > 0 else 0
+
+# Função que calcula todas as análises complementares a partir de um único agregado (País, Ano, Tipo)
+# - custo unitário médio total e por Tipo
+# - pico de Valor por (País, Ano) com o custo unitário do ano anterior
+# - top N países nos últimos anos (janela contada a partir do ano mais recente)
+# Retorna None quando não há linhas com Quantidade positiva
+@timed_fn('dashboard: análises complementares')
+def complementary_analyses(df, anos_janela=5, top_n=3):
+    df_valid = df[df['Quantidade'] > 0]
+    if df_valid.empty:
+        return None
+
+    agregado = df_valid.groupby(['País', 'Ano', 'Tipo'], observed=True)[['Valor', 'Quantidade']].sum()
+
+    # Custo unitário médio total e por Tipo
+    total = agregado.sum()
+    por_tipo = agregado.groupby(level='Tipo', observed=True).sum()
+    custo_unitario_por_tipo = pd.DataFrame({
+        'Tipo': por_tipo.index.astype(str),
+        'Custo Unitário Médio': (por_tipo['Valor'] / por_tipo['Quantidade']).where(por_tipo['Quantidade'] > 0, 0).to_numpy()
+    })
+
+    # Pico de Valor por (País, Ano) e custo unitário no ano anterior do mesmo país
+    por_pais_ano = agregado.groupby(level=['País', 'Ano'], observed=True).sum()
+    pais_pico, ano_pico = por_pais_ano['Valor'].idxmax()
+    valor_pico, quantidade_pico = por_pais_ano.loc[(pais_pico, ano_pico), ['Valor', 'Quantidade']]
+    chave_anterior = (pais_pico, ano_pico - 1)
+    if chave_anterior in por_pais_ano.index:
+        anterior = por_pais_ano.loc[chave_anterior]
+        custo_unitario_ano_anterior = anterior['Valor'] / anterior['Quantidade']
+    else:
+        custo_unitario_ano_anterior = None
+
+    # Top N países na janela de anos mais recente
+    anos = por_pais_ano.index.get_level_values('Ano')
+    top = (
+        por_pais_ano[anos >= anos.max() - anos_janela]
+        .groupby(level='País', observed=True)
+        .sum()
+        .sort_values(by='Valor', ascending=False)
+        .head(top_n)
+        .reset_index()
+    )
+    top['País'] = top['País'].astype(str)
+    top['Custo Unitário Médio'] = (top['Valor'] / top['Quantidade']).where(top['Quantidade'] > 0, 0)
+
+    return {
+        'custo_unitario_total': _custo_unitario(total['Valor'], total['Quantidade']),
+        'custo_unitario_por_tipo': custo_unitario_por_tipo,
+        'pico': {
+            'pais': pais_pico,
+            'ano': int(ano_pico),
+            'valor': valor_pico,
+            'quantidade': quantidade_pico,
+            'custo_unitario': valor_pico / quantidade_pico,
+            'custo_unitario_ano_anterior': custo_unitario_ano_anterior,
+        },
+        'top': top,
+    }
+
+# Função que monta o texto explicativo da análise de pico
+def peak_explanation(pico, direcao='export'):
+    termos = TERMOS[direcao]
+    ano_anterior = pico['ano'] - 1
+    explicacao_pico = (
+        f"O país **{pico['pais']}** registrou o maior pico de {termos['fluxo']} de vinho no ano **{pico['ano']}**, com um valor total {termos['verbo']} de **{pico['valor']:,.2f}** e um volume de **{pico['quantidade']:,.2f}** litros. O custo unitário médio no ano de pico foi **{pico['custo_unitario']:,.2f}**."
+    )
+
+    # Comparação com o ano anterior
+    if pico['custo_unitario_ano_anterior'] is not None:
+        explicacao_pico += (
+            f" No ano anterior (**{ano_anterior}**), o custo unitário médio foi **{pico['custo_unitario_ano_anterior']:,.2f}**. "
+        )
+        if pico['custo_unitario'] > pico['custo_unitario_ano_anterior']:
+            explicacao_pico += (
+                f"O aumento no custo unitário médio pode indicar uma {termos['fluxo']} de vinhos de maior valor agregado no ano do pico."
+            )
+        elif pico['custo_unitario'] < pico['custo_unitario_ano_anterior']:
+            explicacao_pico += (
+                f"A redução no custo unitário médio sugere que o aumento no valor {termos['verbo']} foi impulsionado principalmente pelo volume."
+            )
+    else:
+        explicacao_pico += (
+            f" Não há dados disponíveis para o ano anterior (**{ano_anterior}**) para comparação."
+        )
+    return explicacao_pico
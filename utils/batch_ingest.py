@@ -0,0 +1,131 @@
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from utils.db_writer import upsert_dataframe
+from utils.file_cache import file_digest, get_cached, put_cached
+from utils.incremental import project_years, register_changed_years, year_checksums
+from utils.perf import thread_initializer, timed_fn
+
+# Número máximo de arquivos processados em paralelo
+MAX_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+
+# Número de linhas (países) lidas por bloco no modo streaming
+CHUNK_ROWS = 500
+
+# Função que retorna o conteúdo (bytes) de um arquivo: caminho, bytes ou objeto de upload do Streamlit
+def read_bytes(arquivo):
+    if hasattr(arquivo, 'getvalue'):
+        return arquivo.getvalue()
+    if isinstance(arquivo, bytes):
+        return arquivo
+    with open(arquivo, 'rb') as origem:
+        return origem.read()
+
+# Função que lê um arquivo CSV da Embrapa (separador ';')
+# Aceita caminhos, bytes ou objetos de upload do Streamlit
+@timed_fn('upload: leitura do CSV')
+def read_embrapa_csv(arquivo):
+    if hasattr(arquivo, 'getvalue'):
+        arquivo = io.BytesIO(arquivo.getvalue())
+    elif isinstance(arquivo, bytes):
+        arquivo = io.BytesIO(arquivo)
+    return pd.read_csv(arquivo, sep=';')
+
+# Função que lê e transforma um único arquivo, medindo o tempo de cada etapa
+# O resultado fica em cache pela impressão digital do conteúdo (BLAKE2), pelo nome do arquivo e pela função do pipeline:
+# reenvios e reruns com o mesmo arquivo custam apenas o cálculo do hash
+# Com a carga incremental, somente as colunas dos anos novos ou alterados seguem para a transformação
+def _processar_arquivo(nome, arquivo, process_fn, incremental=None):
+    inicio = time.perf_counter()
+    conteudo = read_bytes(arquivo)
+    digest = file_digest(conteudo)
+    chave = (digest, nome, f'{process_fn.__module__}.{process_fn.__qualname__}')
+    tempos = {'Arquivo': nome}
+
+    df = None
+    if incremental is not None:
+        checksums = get_cached(('checksums', digest))
+        if checksums is None:
+            df = read_embrapa_csv(conteudo)
+            checksums = year_checksums(df)
+            put_cached(('checksums', digest), checksums)
+        anos = register_changed_years(incremental, nome, checksums)
+        tempos['Anos processados'] = len(anos)
+        chave += (tuple(anos),)
+
+    processed_data = get_cached(chave)
+    tempos['Cache'] = processed_data is not None
+    leitura = time.perf_counter()
+    if processed_data is None:
+        if df is None:
+            df = read_embrapa_csv(conteudo)
+        leitura = time.perf_counter()
+        if incremental is not None:
+            df = project_years(df, anos)
+        processed_data = process_fn(nome, df)
+        put_cached(chave, processed_data)
+    fim = time.perf_counter()
+    tempos.update({
+        'Linhas': len(processed_data),
+        'Leitura (s)': round(leitura - inicio, 3),
+        'Transformação (s)': round(fim - leitura, 3),
+    })
+    return processed_data, tempos
+
+# Função que processa vários arquivos em paralelo (pool de threads) e concatena uma única vez ao final
+# arquivos: lista de pares (nome, arquivo); on_progress é chamada na thread principal a cada arquivo concluído
+# incremental: estado de utils.incremental.incremental_state (None processa todos os anos dos arquivos)
+# Retorna o DataFrame consolidado (na mesma ordem dos arquivos recebidos) e os tempos por arquivo
+def process_files(arquivos, process_fn, max_workers=MAX_WORKERS, on_progress=None, incremental=None):
+    arquivos = list(arquivos)
+    resultados = [None] * len(arquivos)
+    tempos = [None] * len(arquivos)
+
+    # As threads herdam o contexto da sessão para que as medições (utils/perf.py) entrem na execução atual
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(arquivos))), initializer=thread_initializer()) as executor:
+        futuros = {
+            executor.submit(_processar_arquivo, nome, arquivo, process_fn, incremental): i
+            for i, (nome, arquivo) in enumerate(arquivos)
+        }
+        for concluidos, futuro in enumerate(as_completed(futuros), start=1):
+            i = futuros[futuro]
+            resultados[i], tempos[i] = futuro.result()
+            if on_progress is not None:
+                on_progress(concluidos, len(arquivos), tempos[i])
+
+    if not resultados:
+        return pd.DataFrame(), []
+    return pd.concat(resultados, ignore_index=True), tempos
+
+# Função que processa os arquivos enviados pelo st.file_uploader
+def process_uploaded_files(uploaded_files, process_fn, **kwargs):
+    return process_files([(f.name, f) for f in uploaded_files], process_fn, **kwargs)
+
+# Função que lê o CSV em blocos de linhas e devolve cada bloco já transformado (formato longo)
+# A memória utilizada fica limitada ao tamanho do bloco, e não ao tamanho do arquivo
+def iter_processed_chunks(nome, arquivo, process_fn, chunksize=CHUNK_ROWS):
+    if hasattr(arquivo, 'seek'):
+        arquivo.seek(0)
+    with pd.read_csv(arquivo, sep=';', chunksize=chunksize) as leitor:
+        for bloco in leitor:
+            processed_data = process_fn(nome, bloco)
+            if not processed_data.empty:
+                yield processed_data
+
+# Função que grava um arquivo no banco em modo streaming: cada bloco transformado é enviado ao upsert
+# Retorna as contagens acumuladas e os pares (Tipo, Ano) gravados, utilizados na atualização das tabelas de resumo
+def stream_file_to_db(engine, nome, arquivo, process_fn, table_name, chunksize=CHUNK_ROWS, write_fn=upsert_dataframe):
+    contagens = {'inserted': 0, 'updated': 0, 'skipped': 0}
+    pares = []
+    for processed_data in iter_processed_chunks(nome, arquivo, process_fn, chunksize):
+        resultado = write_fn(engine, processed_data, table_name)
+        for chave in contagens:
+            contagens[chave] += resultado[chave]
+        pares.append(processed_data[['Tipo', 'Ano']].drop_duplicates())
+
+    pares = pd.concat(pares, ignore_index=True).drop_duplicates() if pares else pd.DataFrame(columns=['Tipo', 'Ano'])
+    return contagens, pares
@@ -0,0 +1,98 @@
+import threading
+from collections import OrderedDict
+
+import plotly.express as px
+import streamlit as st
+
+from utils.perf import timed
+
+# Número máximo de figuras mantidas em cache (compartilhado por todas as sessões do processo)
+MAX_FIGURAS = 64
+
+# Acima deste número de pontos o gráfico de linhas é renderizado com WebGL
+LIMITE_WEBGL = 500
+
+# Casas decimais enviadas ao navegador (os rótulos e o hover exibem no máximo 2)
+CASAS_DECIMAIS = 2
+
+# Seções do template do Plotly que não são utilizadas pelos gráficos de barras/linhas do app
+_LAYOUT_NAO_UTILIZADO = ['geo', 'polar', 'ternary', 'scene', 'mapbox']
+
+_lock = threading.Lock()
+_figuras = OrderedDict()
+
+# Função que monta a chave do cache a partir do tipo de gráfico, dos parâmetros e dos dados agregados
+def _chave(tipo, df, parametros):
+    return (tipo, tuple(df.columns), tuple(map(tuple, df.to_numpy())), parametros)
+
+# Função que retorna a figura do cache ou a constrói (e armazena) com a função informada
+def _cached(chave, construir):
+    with _lock:
+        if chave in _figuras:
+            _figuras.move_to_end(chave)
+            return _figuras[chave]
+    with timed('gráfico: construção'):
+        fig = trim_payload(construir())
+    with _lock:
+        _figuras[chave] = fig
+        while len(_figuras) > MAX_FIGURAS:
+            _figuras.popitem(last=False)
+    return fig
+
+# Função que reduz o JSON enviado ao navegador
+# Mantém no template somente os padrões dos tipos de trace utilizados (o tema do Streamlit é aplicado sobre template.layout)
+def trim_payload(fig):
+    tipos_utilizados = {trace.type for trace in fig.data}
+    template = fig.layout.template
+    for tipo in list(template.data.to_plotly_json().keys()):
+        if tipo not in tipos_utilizados:
+            template.data[tipo] = ()
+    for secao in _LAYOUT_NAO_UTILIZADO:
+        template.layout[secao] = None
+    return fig
+
+# Função que cria (ou reaproveita) o gráfico de barras horizontais do Top N países por uma medida
+def bar_chart(df, medida, titulo, number_paises):
+    df = df.round({medida: CASAS_DECIMAIS})
+
+    def construir():
+        # Ordem com base na medida
+        ordem = df.sort_values(medida, ascending=False)['País'].tolist()
+        return px.bar(
+            df,
+            x=medida,
+            y='País',
+            text_auto='.2s',
+            title=titulo,
+            color_discrete_sequence=['#F1145C'],
+            category_orders={"País": ordem},
+            hover_data={medida: ':.2f'},
+            height=500 + (number_paises - 5) * 50
+        )
+
+    return _cached(_chave('bar', df, (medida, titulo, number_paises)), construir)
+
+# Função que cria (ou reaproveita) o gráfico de linhas de Valor por Ano e País
+def line_chart(df, titulo):
+    df = df.round({'Valor': CASAS_DECIMAIS})
+
+    def construir():
+        return px.line(
+            df,
+            x='Ano',
+            y='Valor',
+            color='País',
+            range_y=(df['Valor'].min() - 1000000, df['Valor'].max() + 1000000),
+            markers=True,
+            title=titulo,
+            color_discrete_sequence=px.colors.qualitative.Set1,
+            hover_data={'Ano': True, 'Valor': ':.2f'},
+            render_mode='webgl' if len(df) > LIMITE_WEBGL else 'svg'
+        )
+
+    return _cached(_chave('line', df, (titulo,)), construir)
+
+# Função que exibe a figura no app, medindo a serialização e o envio ao navegador
+def render_chart(fig):
+    with timed('gráfico: serialização e envio'):
+        st.plotly_chart(fig, use_container_width=True)
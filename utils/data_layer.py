@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from utils.database import get_engine
+from utils.db_queries import ANOS_ANALISE, compact_frame, get_country_categories, get_year_bounds, query_page, query_summary
+from utils.filters import clear_cache as clear_filter_cache
+from utils.perf import timed_fn
+from utils.ranking import build_ranking_index
+from utils.revisions import table_revision
+from utils.rollups import ensure_rollup, refresh_rollup, rollup_table
+from utils.snapshot import decade, load_with_snapshot, write_snapshot
+
+# Tempo (em segundos) que os resultados ficam em cache antes de uma nova consulta ao banco
+CACHE_TTL = 60 * 60
+
+# Número máximo de janelas de anos em cache por função de carga (as menos usadas são descartadas)
+# Cada entrada é um DataFrame completo: sem limite, cada posição do slider de janela ficaria em memória até o TTL
+MAX_JANELAS = 8
+
+# Função que carrega os dados de uma tabela, com cache por tabela e janela de anos
+# Reruns do Streamlit (sliders, multiselects, etc.) reutilizam o resultado sem acessar o banco
+# Em um cache vazio os dados vêm do snapshot local; o banco é lido apenas se o snapshot estiver desatualizado
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_JANELAS, show_spinner=False)
+def load_table(table_name, anos=ANOS_ANALISE):
+    df = load_with_snapshot(get_engine(), table_name, anos)
+    return compact_frame(df, country_categories())
+
+# Função que carrega a tabela de resumo (Ano, País, Tipo) utilizada pelos dashboards
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_JANELAS, show_spinner=False)
+def load_rollup(table_name, anos=ANOS_ANALISE):
+    engine = get_engine()
+    ensure_rollup(engine, table_name)
+    df = load_with_snapshot(engine, rollup_table(table_name), anos)
+    return compact_frame(df, country_categories())
+
+# Função que carrega o conjunto de países compartilhado pelas categorias de export_vinho e import_vinho
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def country_categories():
+    return get_country_categories(get_engine())
+
+# Função que retorna o índice de ranking de países de um DataFrame, construído uma única vez por versão dos dados
+# O DataFrame não entra na chave do cache (parâmetro com '_'): a versão (dataset_key, com a revisão do conteúdo) já o identifica
+@st.cache_resource(max_entries=8, show_spinner=False)
+def ranking_index(versao, _df):
+    return build_ranking_index(_df)
+
+# Função que retorna o período (primeiro e último ano) do histórico completo de uma tabela
+# revisao (opcional) entra somente na chave do cache: uma nova revisão do conteúdo refaz a consulta
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def year_bounds(table_name, revisao=None):
+    return get_year_bounds(get_engine(), table_name)
+
+# Função que retorna a revisão atual do conteúdo de uma tabela (incrementada a cada gravação, também pelo ingest.py)
+# Sem cache: é uma consulta pela chave primária, refeita a cada rerun para que gravações de outros processos apareçam
+def content_revision(table_name):
+    return table_revision(get_engine(), table_name)
+
+# Função que calcula no banco o número de linhas e os totais de uma seleção da Tabela paginada
+# Os filtros chegam normalizados (tuplas de normalize_filters): listas vazias não filtram; revisao entra somente na chave do cache
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def selection_summary(table_name, revisao, paises, tipos, anos):
+    return query_summary(get_engine(), table_name, anos[0], anos[1], list(tipos) or None, list(paises) or None)
+
+# Função que carrega uma página da Tabela paginada a partir da chave da última linha da página anterior
+@st.cache_data(ttl=CACHE_TTL, max_entries=256, show_spinner=False)
+def selection_page(table_name, revisao, paises, tipos, anos, apos, tamanho):
+    return query_page(get_engine(), table_name, apos, tamanho, anos[0], anos[1], list(tipos) or None, list(paises) or None)
+
+# Conjuntos de dados disponíveis para as páginas do app: nome -> (função de carga, tabela)
+DATASETS = {
+    'export': (load_table, 'export_vinho'),
+    'import': (load_table, 'import_vinho'),
+    'export_resumo': (load_rollup, 'export_vinho'),
+    'import_resumo': (load_rollup, 'import_vinho'),
+}
+
+# Função que carrega, sob demanda, somente os conjuntos de dados pedidos pela página
+# Consultas independentes rodam em paralelo; o que já estiver em cache retorna sem acessar o banco
+@timed_fn('carga: conjuntos de dados')
+def load_datasets(*nomes, anos=ANOS_ANALISE):
+    if len(nomes) == 1:
+        funcao, table_name = DATASETS[nomes[0]]
+        return {nomes[0]: funcao(table_name, anos)}
+
+    # As threads herdam o contexto da sessão para que o cache do Streamlit funcione normalmente
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=len(nomes), initializer=lambda: add_script_run_ctx(ctx=ctx)) as executor:
+        futuros = {nome: executor.submit(DATASETS[nome][0], DATASETS[nome][1], anos) for nome in nomes}
+        return {nome: futuro.result() for nome, futuro in futuros.items()}
+
+# Função que invalida o cache dos dados após a gravação de novas linhas no banco
+def invalidate_cache():
+    load_table.clear()
+    load_rollup.clear()
+    country_categories.clear()
+    clear_filter_cache()
+    ranking_index.clear()
+    year_bounds.clear()
+    selection_summary.clear()
+    selection_page.clear()
+
+# Função chamada após a gravação de um lote (Upload): atualiza o resumo, regrava as décadas alteradas dos snapshots e limpa o cache
+# data precisa conter apenas as colunas Tipo e Ano das linhas gravadas
+@timed_fn('gravação: resumo, snapshots e cache')
+def on_table_updated(table_name, data):
+    engine = get_engine()
+    # Os dados já foram gravados no banco: o cache é limpo mesmo se o resumo ou os snapshots falharem
+    try:
+        refresh_rollup(engine, table_name, data)
+        decadas = {decade(ano) for ano in data['Ano'].unique()}
+        write_snapshot(engine, table_name, decadas)
+        write_snapshot(engine, rollup_table(table_name), decadas)
+    finally:
+        invalidate_cache()
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import streamlit as st
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from utils.migrations import migrate_schema
+from utils.perf import record
+
+# Número esperado de sessões do Streamlit usando o banco ao mesmo tempo (uma conexão fixa por sessão)
+SESSOES_SIMULTANEAS = 8
+
+# Conexões extras (overflow) para os picos: cargas em paralelo do data layer e tarefas de gravação em segundo plano
+CONEXOES_EXTRAS = 8
+
+# Tempo máximo (s) de espera por uma conexão livre antes de gerar erro
+POOL_TIMEOUT = 30
+
+# Idade máxima (s) de uma conexão: conexões ociosas costumam ser encerradas pelo Postgres na nuvem
+POOL_RECYCLE = 30 * 60
+
+# Tempo máximo (ms) de execução de um comando no Postgres (0 desativa)
+STATEMENT_TIMEOUT_MS = 2 * 60 * 1000
+
+# Pool de conexões que mede o tempo de espera por uma conexão livre
+class MeteredQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock_metricas = threading.Lock()
+        self.metricas = {'checkouts': 0, 'espera_total_s': 0.0, 'espera_max_s': 0.0, 'timeouts': 0}
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except PoolTimeoutError:
+            # Somente a espera esgotada por uma conexão livre conta como timeout (falhas de conexão não)
+            with self._lock_metricas:
+                self.metricas['timeouts'] += 1
+            raise
+        espera = time.perf_counter() - inicio
+        with self._lock_metricas:
+            self.metricas['checkouts'] += 1
+            self.metricas['espera_total_s'] += espera
+            self.metricas['espera_max_s'] = max(self.metricas['espera_max_s'], espera)
+        record('banco: espera por conexão', espera)
+        return conexao
+
+# Função que calcula a configuração do pool para um número de sessões simultâneas
+def pool_settings(sessoes=SESSOES_SIMULTANEAS, extras=CONEXOES_EXTRAS):
+    return {
+        'pool_size': max(1, int(sessoes)),
+        'max_overflow': max(0, int(extras)),
+        'pool_timeout': POOL_TIMEOUT,
+        'pool_recycle': POOL_RECYCLE,
+    }
+
+# Função que cria uma engine com pool de conexões medido, pre-ping e (no Postgres) timeout por comando
+# SQLite em memória mantém o pool padrão do SQLAlchemy (uma conexão por thread)
+def create_pooled_engine(db_url, sessoes=SESSOES_SIMULTANEAS, extras=CONEXOES_EXTRAS, statement_timeout_ms=STATEMENT_TIMEOUT_MS):
+    url = make_url(db_url)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return create_engine(url, pool_pre_ping=True)
+
+    connect_args = {}
+    if url.get_backend_name() == 'postgresql' and statement_timeout_ms:
+        connect_args['options'] = f'-c statement_timeout={int(statement_timeout_ms)}'
+    return create_engine(
+        url,
+        poolclass=MeteredQueuePool,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+        **pool_settings(sessoes, extras)
+    )
+
+# Função que retorna as métricas do pool de conexões da engine (None se o pool não for medido)
+def pool_metrics(engine):
+    pool = engine.pool
+    if not isinstance(pool, MeteredQueuePool):
+        return None
+    with pool._lock_metricas:
+        metricas = dict(pool.metricas)
+    metricas['espera_media_ms'] = round(metricas['espera_total_s'] / metricas['checkouts'] * 1000, 2) if metricas['checkouts'] else 0.0
+    metricas['espera_max_ms'] = round(metricas.pop('espera_max_s') * 1000, 2)
+    metricas.pop('espera_total_s')
+    metricas.update({
+        'tamanho': pool.size(),
+        'em_uso': pool.checkedout(),
+        'livres': pool.checkedin(),
+        'overflow': max(0, pool.overflow()),
+        'limite': pool.size() + pool._max_overflow,
+    })
+    return metricas
+
+# Função que cria uma única engine por processo do Streamlit
+# O pool de conexões é compartilhado entre todas as sessões e reruns do app
+# O pool pode ser ajustado em secrets.toml: DB_SESSOES, DB_CONEXOES_EXTRAS e DB_STATEMENT_TIMEOUT_MS
+# As migrações de schema são verificadas uma única vez, na criação da engine
+@st.cache_resource(show_spinner=False)
+def get_engine():
+    db_url = st.secrets["DB_URL"]
+    engine = create_pooled_engine(
+        db_url,
+        sessoes=st.secrets.get('DB_SESSOES', SESSOES_SIMULTANEAS),
+        extras=st.secrets.get('DB_CONEXOES_EXTRAS', CONEXOES_EXTRAS),
+        statement_timeout_ms=st.secrets.get('DB_STATEMENT_TIMEOUT_MS', STATEMENT_TIMEOUT_MS)
+    )
+    migrate_schema(engine)
+    return engine
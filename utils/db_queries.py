@@ -1,47 +1,196 @@
+import re
+
+import numpy as np
 import pandas as pd
+from sqlalchemy import bindparam, text
+
+from utils.pipeline import FONTES
+from utils.perf import timed_fn
+
+# Janela padrão de análise (em anos) utilizada pelo módulo de Analytics
+ANOS_ANALISE = 15
+
+# Conjunto fixo de Tipos das tabelas export_vinho e import_vinho (categorias estáveis entre recargas)
+# Tipos do registro de arquivos, mais 'Desconhecido' das linhas gravadas antes da validação dos nomes
+TIPOS = sorted({fonte['tipo'] for fonte in FONTES} | {'Desconhecido'})
+
+# Maior inteiro representado sem perda em float32
+_FLOAT32_EXATO = 2 ** 24
+
+# Nomes de tabelas e colunas não podem ser parâmetros da query, por isso são validados antes da interpolação
+_IDENTIFICADOR = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Função que valida o nome de uma tabela antes de utilizá-lo em uma query
+def _tabela(table_name):
+    if not _IDENTIFICADOR.match(table_name):
+        raise ValueError(f'Nome de tabela inválido: {table_name!r}')
+    return table_name
+
+# Função que executa uma query no Banco de Dados PostgreSQL e retorna o ano mais recente de uma tabela
+# Com a coluna "Ano" tipada e indexada a consulta é respondida pelo índice (index-only scan)
+@timed_fn('banco: ano mais recente')
+def get_recent_year(engine, table_name):
+    query_max_year = text(f'''
+    SELECT MAX("Ano") AS ano_mais_recente
+    FROM {_tabela(table_name)};
+    ''')
+    result = pd.read_sql(query_max_year, engine)
+    return int(result.loc[0, 'ano_mais_recente'])
+
+# Função que monta a cláusula WHERE parametrizada dos filtros de Período, Tipos e Países
+# Retorna o filtro, os parâmetros e os parâmetros expansíveis (listas do IN)
+def _filtros(ano_inicio=None, ano_fim=None, tipos=None, paises=None):
+    condicoes = []
+    parametros = {}
+    expansiveis = []
+    if ano_inicio is not None:
+        condicoes.append('"Ano" >= :ano_inicio')
+        parametros['ano_inicio'] = int(ano_inicio)
+    if ano_fim is not None:
+        condicoes.append('"Ano" <= :ano_fim')
+        parametros['ano_fim'] = int(ano_fim)
+    if tipos is not None:
+        condicoes.append('"Tipo" IN :tipos')
+        parametros['tipos'] = list(tipos)
+        expansiveis.append(bindparam('tipos', expanding=True))
+    if paises is not None:
+        condicoes.append('"País" IN :paises')
+        parametros['paises'] = list(paises)
+        expansiveis.append(bindparam('paises', expanding=True))
+    return condicoes, parametros, expansiveis
+
+# Função que executa uma query parametrizada com os filtros do Analytics aplicados no banco
+# Período (ano_inicio/ano_fim), Tipos, Países e as colunas retornadas são enviados para o SQL
+# No app o período é usado pelas cargas (janela de análise e décadas dos snapshots) e os filtros de Período, Tipo e
+# País da Tabela paginada chegam ao banco por _filtros; os dashboards e a Tabela em memória filtram o DataFrame já
+# carregado (índice de ranking e cache de filtros), sem novas consultas a cada rerun
+@timed_fn('banco: consulta')
+def query_data(engine, table_name, ano_inicio=None, ano_fim=None, tipos=None, paises=None, colunas=None):
+    condicoes, parametros, expansiveis = _filtros(ano_inicio, ano_fim, tipos, paises)
+
+    projecao = ', '.join(f'"{c}"' for c in colunas) if colunas else '*'
+    filtro = f"WHERE {' AND '.join(condicoes)}" if condicoes else ''
+    query = text(f'''
+    SELECT {projecao}
+    FROM {_tabela(table_name)}
+    {filtro}
+    ORDER BY "Ano";
+    ''').bindparams(*expansiveis)
+
+    df = pd.read_sql(query, engine, params=parametros)
+    if 'Ano' in df.columns and df['Ano'].dtype == object:
+        df['Ano'] = df['Ano'].astype(int)
+    return df
+
+# Função que retorna o primeiro e o último ano de uma tabela (histórico completo)
+@timed_fn('banco: período da tabela')
+def get_year_bounds(engine, table_name):
+    with engine.connect() as connection:
+        inicio, fim = connection.execute(text(
+            f'SELECT MIN("Ano"), MAX("Ano") FROM {_tabela(table_name)}'
+        )).one()
+    return (int(inicio), int(fim)) if inicio is not None else None
+
+# Função que calcula no banco o número de linhas e os totais de Quantidade e Valor de uma seleção da Tabela
+@timed_fn('banco: totais da seleção')
+def query_summary(engine, table_name, ano_inicio=None, ano_fim=None, tipos=None, paises=None):
+    condicoes, parametros, expansiveis = _filtros(ano_inicio, ano_fim, tipos, paises)
+    filtro = f"WHERE {' AND '.join(condicoes)}" if condicoes else ''
+    query = text(f'''
+    SELECT COUNT(*), COALESCE(SUM("Quantidade"), 0), COALESCE(SUM("Valor"), 0)
+    FROM {_tabela(table_name)}
+    {filtro};
+    ''').bindparams(*expansiveis)
+    with engine.connect() as connection:
+        linhas, quantidade, valor = connection.execute(query, parametros).one()
+    return {'linhas': int(linhas), 'quantidade': float(quantidade), 'valor': float(valor)}
+
+# Ordem das páginas da Tabela paginada: "Id" desempata as linhas de mesmo Ano, País e Tipo
+ORDEM_PAGINA = ['Ano', 'País', 'Tipo', 'Id']
+
+# Função que retorna uma página da seleção usando paginação por chave (keyset)
+# apos é a chave (Ano, País, Tipo, Id) da última linha da página anterior (None para a primeira página)
+# O banco lê somente as linhas da página a partir do índice, sem OFFSET, em qualquer ponto do histórico
+@timed_fn('banco: página da tabela')
+def query_page(engine, table_name, apos=None, tamanho=100, ano_inicio=None, ano_fim=None, tipos=None, paises=None):
+    condicoes, parametros, expansiveis = _filtros(ano_inicio, ano_fim, tipos, paises)
+    colunas = ', '.join(f'"{c}"' for c in ORDEM_PAGINA)
+    if apos is not None:
+        condicoes.append(f'({colunas}) > (:apos_ano, :apos_pais, :apos_tipo, :apos_id)')
+        parametros.update(zip(['apos_ano', 'apos_pais', 'apos_tipo', 'apos_id'], apos))
+    parametros['tamanho'] = int(tamanho)
+
+    filtro = f"WHERE {' AND '.join(condicoes)}" if condicoes else ''
+    query = text(f'''
+    SELECT "Id", "País", "Ano", "Quantidade", "Valor", "Tipo"
+    FROM {_tabela(table_name)}
+    {filtro}
+    ORDER BY {colunas}
+    LIMIT :tamanho;
+    ''').bindparams(*expansiveis)
+
+    df = pd.read_sql(query, engine, params=parametros)
+    if df['Ano'].dtype == object:
+        df['Ano'] = df['Ano'].astype(int)
+    return df
+
+# Função que retorna a chave (Ano, País, Tipo, Id) da última linha de uma página (início da página seguinte)
+def page_key(pagina):
+    ultima = pagina.iloc[-1]
+    return (int(ultima['Ano']), str(ultima['País']), str(ultima['Tipo']), int(ultima['Id']))
+
+# Função que retorna a lista ordenada de países das duas tabelas, utilizada como conjunto de categorias compartilhado
+@timed_fn('banco: países')
+def get_country_categories(engine):
+    query = text('''
+    SELECT "País" FROM export_vinho
+    UNION
+    SELECT "País" FROM import_vinho
+    ORDER BY 1;
+    ''')
+    return pd.read_sql(query, engine)['País'].dropna().tolist()
+
+# Função que verifica se uma medida pode ser armazenada em float32 sem alterar valores nem somas
+# Todos os valores precisam ser inteiros e a soma absoluta da coluna precisa caber na mantissa do float32
+def _cabe_em_float32(serie):
+    valores = serie.to_numpy(dtype='float64')
+    return bool(np.all(np.mod(valores, 1) == 0)) and float(np.abs(valores).sum()) <= _FLOAT32_EXATO
+
+# Função que converte o DataFrame para uma representação compacta em memória
+# País e Tipo como categorias (conjunto estável e compartilhado), Ano como int16 e medidas em float32 quando possível
+@timed_fn('carga: compactação')
+def compact_frame(df, paises=None):
+    df = df.copy()
+    if 'País' in df.columns:
+        categorias = sorted(set(paises or []) | set(df['País'].dropna().astype(str)))
+        df['País'] = df['País'].astype(str).where(df['País'].notna()).astype(pd.CategoricalDtype(categorias))
+    if 'Tipo' in df.columns:
+        categorias = sorted(set(TIPOS) | set(df['Tipo'].dropna().astype(str)))
+        df['Tipo'] = df['Tipo'].astype(str).where(df['Tipo'].notna()).astype(pd.CategoricalDtype(categorias))
+    if 'Ano' in df.columns:
+        df['Ano'] = df['Ano'].astype('int16')
+    for coluna in ['Quantidade', 'Valor']:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype('float32' if _cabe_em_float32(df[coluna]) else 'float64')
+    return df
+
+# Função que executa uma query no Banco de Dados PostgreSQL e retorna os dados dos últimos anos de uma tabela
+def get_last_years_data(engine, table_name, anos=ANOS_ANALISE, **filtros):
+    ano_mais_recente = get_recent_year(engine, table_name)
+    return query_data(engine, table_name, ano_inicio=ano_mais_recente - anos, **filtros)
 
 # Função que executa uma query no Banco de Dados PostgreSQL e retorna o ano mais recente da tabela export_vinho
 def get_recent_year_export(engine):
-    query_max_year_export = '''
-    SELECT MAX(CAST("Ano" AS INTEGER)) AS ano_mais_recente
-    FROM export_vinho;
-    '''
-    result_export = pd.read_sql(query_max_year_export, engine)
-    return int(result_export.loc[0, 'ano_mais_recente'])
+    return get_recent_year(engine, 'export_vinho')
 
 # Função que executa uma query no Banco de Dados PostgreSQL e retorna os dados dos últimos 15 anos da tabela export_vinho
 def get_last_15_years_data_export(engine):
-    ano_mais_recente = get_recent_year_export(engine)
-    ano_limite_export = ano_mais_recente - 15
-
-    query_export = f'''
-    SELECT *
-    FROM export_vinho
-    WHERE CAST("Ano" AS INTEGER) >= {ano_limite_export};
-    '''
-    df_export = pd.read_sql(query_export, engine).sort_values('Ano', ascending=True)
-    df_export['Ano'] = df_export['Ano'].astype(int)
-    return df_export
+    return get_last_years_data(engine, 'export_vinho', 15)
 
 # Função que executa uma query no Banco de Dados PostgreSQL e retorna o ano mais recente da tabela import_vinho
 def get_recent_year_import(engine):
-    query_max_year_export = '''
-    SELECT MAX(CAST("Ano" AS INTEGER)) AS ano_mais_recente
-    FROM export_vinho;
-    '''
-    result_export = pd.read_sql(query_max_year_export, engine)
-    return int(result_export.loc[0, 'ano_mais_recente'])
+    return get_recent_year(engine, 'import_vinho')
 
 # Função que executa uma query no Banco de Dados PostgreSQL e retorna os dados dos últimos 15 anos da tabela import_vinho
 def get_last_15_years_data_import(engine):
-    ano_mais_recente_import = get_recent_year_import(engine)
-    ano_limite_import = ano_mais_recente_import - 15
-
-    query_import = f'''
-    SELECT *
-    FROM import_vinho
-    WHERE CAST("Ano" AS INTEGER) >= {ano_limite_import};
-    '''
-    df_import = pd.read_sql(query_import, engine).sort_values('Ano', ascending=True)
-    df_import['Ano'] = df_import['Ano'].astype(int)
-    return df_import
\ No newline at end of file
+    return get_last_years_data(engine, 'import_vinho', 15)
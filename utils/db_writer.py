@@ -0,0 +1,109 @@
+import io
+
+from sqlalchemy import inspect, text
+
+from utils.migrations import NATURAL_KEY, create_indexes, ensure_natural_key, ensure_partitions
+from utils.perf import timed_fn
+from utils.revisions import bump_revision
+
+# Colunas de medida atualizadas quando a chave já existe no banco
+MEASURE_COLS = ['Quantidade', 'Valor']
+
+STAGING_TABLE = 'staging_ingestao'
+
+# Função que coloca o nome de uma coluna/tabela entre aspas duplas
+def _q(nome):
+    return '"' + nome.replace('"', '""') + '"'
+
+# Função que cria a tabela (caso não exista) e garante o índice único da chave natural
+# Em tabelas existentes o índice (e a remoção das duplicatas do fluxo antigo) já é aplicado por migrate_schema
+def ensure_table(engine, table_name, data):
+    if not inspect(engine).has_table(table_name):
+        data.head(0).to_sql(table_name, engine, index=False)
+        with engine.begin() as connection:
+            create_indexes(connection, table_name)
+
+    with engine.begin() as connection:
+        ensure_natural_key(connection, table_name)
+
+# Função que carrega o lote na tabela temporária de staging
+# No PostgreSQL a carga é feita com COPY; nos demais bancos (ex.: SQLite) com executemany
+def _load_staging(connection, table_name, data):
+    colunas = list(data.columns)
+    lista_colunas = ', '.join(_q(c) for c in colunas)
+
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text(
+            f'CREATE TEMP TABLE {_q(STAGING_TABLE)} (LIKE {_q(table_name)} INCLUDING DEFAULTS) ON COMMIT DROP'
+        ))
+        buffer = io.StringIO()
+        data.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        cursor.copy_expert(f'COPY {_q(STAGING_TABLE)} ({lista_colunas}) FROM STDIN WITH (FORMAT csv)', buffer)
+        cursor.close()
+    else:
+        connection.execute(text(f'DROP TABLE IF EXISTS temp.{_q(STAGING_TABLE)}'))
+        connection.execute(text(f'CREATE TEMP TABLE {_q(STAGING_TABLE)} AS SELECT * FROM {_q(table_name)} WHERE 0'))
+        parametros = ', '.join(f':p{i}' for i in range(len(colunas)))
+        registros = [
+            {f'p{i}': valor for i, valor in enumerate(linha)}
+            for linha in data.astype(object).where(data.notna(), None).itertuples(index=False, name=None)
+        ]
+        connection.execute(text(f'INSERT INTO {_q(STAGING_TABLE)} ({lista_colunas}) VALUES ({parametros})'), registros)
+
+# Função que conta, a partir do staging, quantas linhas serão inseridas, atualizadas ou ignoradas
+def _count_changes(connection, table_name):
+    juncao = ' AND '.join(f's.{_q(c)} = t.{_q(c)}' for c in NATURAL_KEY)
+    alterado = ' OR '.join(f's.{_q(c)} <> t.{_q(c)}' for c in MEASURE_COLS)
+    existe = f't.{_q(NATURAL_KEY[0])} IS NOT NULL'
+    resultado = connection.execute(text(f'''
+        SELECT
+            COALESCE(SUM(CASE WHEN NOT ({existe}) THEN 1 ELSE 0 END), 0) AS novas,
+            COALESCE(SUM(CASE WHEN {existe} AND ({alterado}) THEN 1 ELSE 0 END), 0) AS alteradas
+        FROM {_q(STAGING_TABLE)} s
+        LEFT JOIN {_q(table_name)} t ON {juncao}
+    ''')).one()
+    return int(resultado.novas), int(resultado.alteradas)
+
+# Função que grava um lote na tabela com upsert baseado na chave natural (Id, País, Ano, Tipo)
+# O custo depende apenas do tamanho do lote: nada é lido da tabela de destino para o pandas
+# on_conflict='update' atualiza as medidas das chaves existentes; on_conflict='nothing' as mantém
+# Retorna as contagens de linhas inseridas, atualizadas e ignoradas
+@timed_fn('gravação: upsert')
+def upsert_dataframe(engine, data, table_name, on_conflict='update'):
+    if on_conflict not in ('update', 'nothing'):
+        raise ValueError(f"on_conflict deve ser 'update' ou 'nothing', recebido: {on_conflict!r}")
+
+    total = len(data)
+    data = data.drop_duplicates(subset=NATURAL_KEY, keep='last')
+    if data.empty:
+        return {'inserted': 0, 'updated': 0, 'skipped': total}
+
+    ensure_table(engine, table_name, data)
+
+    colunas = ', '.join(_q(c) for c in data.columns)
+    chave = ', '.join(_q(c) for c in NATURAL_KEY)
+    if on_conflict == 'update':
+        atualizacao = ', '.join(f'{_q(c)} = excluded.{_q(c)}' for c in MEASURE_COLS)
+        alterado = ' OR '.join(f'{_q(table_name)}.{_q(c)} <> excluded.{_q(c)}' for c in MEASURE_COLS)
+        conflito = f'DO UPDATE SET {atualizacao} WHERE {alterado}'
+    else:
+        conflito = 'DO NOTHING'
+
+    with engine.begin() as connection:
+        ensure_partitions(connection, table_name, data['Ano'].unique())
+        _load_staging(connection, table_name, data)
+        inseridas, alteradas = _count_changes(connection, table_name)
+        connection.execute(text(f'''
+            INSERT INTO {_q(table_name)} ({colunas})
+            SELECT {colunas} FROM {_q(STAGING_TABLE)} WHERE true
+            ON CONFLICT ({chave}) {conflito}
+        '''))
+        if inseridas or (alteradas and on_conflict == 'update'):
+            bump_revision(connection, table_name)
+        if connection.dialect.name != 'postgresql':
+            connection.execute(text(f'DROP TABLE IF EXISTS temp.{_q(STAGING_TABLE)}'))
+
+    atualizadas = alteradas if on_conflict == 'update' else 0
+    return {'inserted': inseridas, 'updated': atualizadas, 'skipped': total - inseridas - atualizadas}
@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import io
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.db_queries import page_key, query_page
+from utils.filters import dataset_key, filter_table, normalize_filters
+from utils.perf import timed
+
+# Formatos de download da Tabela: extensão do arquivo e tipo MIME
+FORMATOS = {
+    'CSV': {'extensao': '.csv', 'mime': 'text/csv'},
+    'CSV (gzip)': {'extensao': '.csv.gz', 'mime': 'application/gzip'},
+    'Parquet': {'extensao': '.parquet', 'mime': 'application/vnd.apache.parquet'},
+}
+
+# Número de linhas serializadas por bloco (limita a memória usada na geração do arquivo)
+LINHAS_POR_BLOCO = 50_000
+
+# Número máximo de arquivos gerados mantidos em disco (os mais antigos são removidos)
+MAX_ARQUIVOS = 20
+
+# Pasta local onde ficam os arquivos gerados para download
+EXPORT_DIR = os.environ.get('EXPORT_DIR', os.path.join('.cache', 'exports'))
+
+# Um lock por arquivo: a mesma seleção é gerada uma única vez, e seleções diferentes são geradas em paralelo
+_lock = threading.Lock()
+_locks_arquivos = {}
+
+# Função que retorna o caminho do arquivo gerado para uma chave (versão dos dados e filtros normalizados)
+def _caminho(chave, formato):
+    nome = hashlib.blake2b(repr(chave).encode(), digest_size=20).hexdigest()
+    return os.path.join(EXPORT_DIR, nome + FORMATOS[formato]['extensao'])
+
+# Função que retorna o caminho do arquivo de uma seleção da Tabela em um formato
+# O nome vem da versão dos dados (com a revisão do conteúdo) e dos filtros normalizados: a mesma seleção reaproveita o arquivo já gerado
+# Sem versão (DataFrame fora do data layer), a chave usa o hash do conteúdo
+def export_path(df, paises, tipos, anos, formato):
+    versao = dataset_key(df)
+    if versao is None:
+        versao = hashlib.blake2b(pd.util.hash_pandas_object(df, index=False).values.tobytes(), digest_size=20).hexdigest()
+    return _caminho((versao, len(df)) + normalize_filters(paises, tipos, anos), formato)
+
+# Função que retorna o caminho do arquivo de uma seleção da Tabela paginada (histórico completo no banco)
+# revisao é a revisão atual do conteúdo da tabela no banco (utils/revisions.py)
+def query_export_path(table_name, revisao, paises, tipos, anos, formato):
+    chave = ('banco', table_name, revisao) + normalize_filters(paises, tipos, anos)
+    return _caminho(chave, formato)
+
+# Função que divide o DataFrame em blocos de LINHAS_POR_BLOCO linhas (sempre ao menos um bloco, para o cabeçalho)
+def _blocos(df):
+    for inicio in range(0, max(len(df), 1), LINHAS_POR_BLOCO):
+        yield df.iloc[inicio:inicio + LINHAS_POR_BLOCO]
+
+# Função que grava o CSV bloco a bloco (com ou sem compressão gzip); o cabeçalho vai somente no primeiro bloco
+def _gravar_csv(blocos, caminho, comprimir):
+    linhas = 0
+    abrir = gzip.open if comprimir else open
+    with abrir(caminho, 'wt', encoding='utf-8', newline='') as destino:
+        for bloco in blocos:
+            texto = io.StringIO()
+            bloco.to_csv(texto, index=False, header=linhas == 0)
+            destino.write(texto.getvalue())
+            linhas += len(bloco)
+    return linhas
+
+# Função que grava o Parquet com um row group por bloco (País e Tipo categóricos viram dictionary encoding)
+def _gravar_parquet(blocos, caminho):
+    linhas = 0
+    escritor = None
+    try:
+        for bloco in blocos:
+            if escritor is None:
+                schema = pa.Schema.from_pandas(bloco, preserve_index=False)
+                escritor = pq.ParquetWriter(caminho, schema, compression='zstd')
+            escritor.write_table(pa.Table.from_pandas(bloco, schema=schema, preserve_index=False))
+            linhas += len(bloco)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return linhas
+
+# Função que remove os arquivos gerados mais antigos (e os seus locks) quando o limite de arquivos é excedido
+# Deve ser chamada com _lock
+def _limpar_antigos():
+    arquivos = [os.path.join(EXPORT_DIR, nome) for nome in os.listdir(EXPORT_DIR) if not nome.endswith('.tmp')]
+    arquivos.sort(key=os.path.getmtime, reverse=True)
+    for caminho in arquivos[MAX_ARQUIVOS:]:
+        _locks_arquivos.pop(caminho, None)
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+# Função que retorna o lock do arquivo de um caminho
+def _lock_arquivo(caminho):
+    with _lock:
+        return _locks_arquivos.setdefault(caminho, threading.Lock())
+
+# Função que grava os blocos no caminho do arquivo (reaproveitando o arquivo se ele já existir)
+# blocos é chamada somente quando o arquivo precisa ser gerado
+def _gerar(caminho, formato, blocos):
+    with _lock_arquivo(caminho):
+        if os.path.exists(caminho):
+            os.utime(caminho)
+            return caminho
+
+        with timed(f'download: {formato}') as medida:
+            os.makedirs(EXPORT_DIR, exist_ok=True)
+            temporario = f'{caminho}.tmp'
+            if formato == 'Parquet':
+                medida['linhas'] = _gravar_parquet(blocos(), temporario)
+            else:
+                medida['linhas'] = _gravar_csv(blocos(), temporario, comprimir=formato == 'CSV (gzip)')
+            os.replace(temporario, caminho)
+    with _lock:
+        _limpar_antigos()
+    return caminho
+
+# Função que gera (somente quando solicitado) o arquivo de download de uma seleção da Tabela e retorna o caminho
+# O arquivo é escrito em disco bloco a bloco: a seleção nunca é convertida inteira em texto na memória
+def export_file(df, paises, tipos, anos, formato):
+    caminho = export_path(df, paises, tipos, anos, formato)
+    return _gerar(caminho, formato, lambda: _blocos(filter_table(df, paises, tipos, anos)))
+
+# Função que gera o arquivo de download de uma seleção da Tabela paginada, lendo o banco página a página (keyset)
+# Somente um bloco de LINHAS_POR_BLOCO linhas fica em memória por vez
+def export_query_file(engine, table_name, revisao, paises, tipos, anos, formato):
+    caminho = query_export_path(table_name, revisao, paises, tipos, anos, formato)
+
+    def blocos():
+        apos = None
+        while True:
+            pagina = query_page(
+                engine, table_name, apos, LINHAS_POR_BLOCO, anos[0], anos[1], list(tipos) or None, list(paises) or None
+            )
+            if apos is None or not pagina.empty:
+                yield pagina
+            if len(pagina) < LINHAS_POR_BLOCO:
+                return
+            apos = page_key(pagina)
+
+    return _gerar(caminho, formato, blocos)
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+# Tamanho máximo (bytes) dos itens mantidos em memória, compartilhado por todas as sessões do processo
+MAX_BYTES_MEMORIA = 256 * 1024 * 1024
+
+# Pasta do cache em disco (opcional): definida pela variável de ambiente PROCESSED_CACHE_DIR
+CACHE_DIR = os.environ.get('PROCESSED_CACHE_DIR')
+
+# Tamanho máximo (bytes) do cache em disco: os arquivos usados há mais tempo (mtime) são removidos
+MAX_BYTES_DISCO = 1024 * 1024 * 1024
+
+# Versão do processamento dos arquivos: incrementar sempre que process_dataset (ou a validação) mudar o resultado
+# Entra na chave do cache em disco, que sobrevive a novas versões do app; o cache em memória é reiniciado com o processo
+VERSAO_PIPELINE = 1
+
+_lock = threading.Lock()
+_itens = OrderedDict()
+_tamanhos = {}
+_total = 0
+
+# Função que calcula a impressão digital (BLAKE2) do conteúdo de um arquivo
+def file_digest(conteudo):
+    return hashlib.blake2b(conteudo, digest_size=20).hexdigest()
+
+# Função que estima o tamanho em memória de um item do cache
+def _tamanho(valor):
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(sys.getsizeof(c) + sys.getsizeof(v) for c, v in valor.items())
+    return sys.getsizeof(valor)
+
+# Função que retorna o caminho do item no cache em disco (a chave inclui a versão do processamento)
+def _caminho(chave):
+    nome = hashlib.blake2b(repr((VERSAO_PIPELINE, chave)).encode(), digest_size=20).hexdigest()
+    return os.path.join(CACHE_DIR, f'{nome}.arrow')
+
+# Função que guarda o item na memória, descartando os menos utilizados quando o limite de bytes é excedido
+def _guardar_memoria(chave, valor):
+    global _total
+    tamanho = _tamanho(valor)
+    if tamanho > MAX_BYTES_MEMORIA:
+        return
+    with _lock:
+        if chave in _itens:
+            _itens.move_to_end(chave)
+            return
+        _itens[chave] = valor
+        _tamanhos[chave] = tamanho
+        _total += tamanho
+        while _total > MAX_BYTES_MEMORIA:
+            antiga, _ = _itens.popitem(last=False)
+            _total -= _tamanhos.pop(antiga)
+
+# Função que grava um DataFrame no cache em disco (Arrow IPC, gravação atômica)
+def _gravar_disco(chave, df):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    caminho = _caminho(chave)
+    temporario = f'{caminho}.{threading.get_ident()}.tmp'
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(temporario, 'wb') as destino:
+        with ipc.new_file(destino, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+    os.replace(temporario, caminho)
+    _limpar_disco()
+
+# Função que remove os arquivos do cache em disco usados há mais tempo quando MAX_BYTES_DISCO é excedido
+def _limpar_disco():
+    arquivos = []
+    for entrada in os.scandir(CACHE_DIR):
+        if entrada.name.endswith('.arrow'):
+            try:
+                info = entrada.stat()
+            except FileNotFoundError:
+                continue
+            arquivos.append((info.st_mtime, info.st_size, entrada.path))
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= MAX_BYTES_DISCO:
+            break
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+        total -= tamanho
+
+# Função que lê um DataFrame do cache em disco (None se não existir)
+# A leitura atualiza o mtime do arquivo, usado como ordem de uso na limpeza do disco
+def _ler_disco(chave):
+    caminho = _caminho(chave)
+    try:
+        with pa.memory_map(caminho, 'r') as origem:
+            df = ipc.open_file(origem).read_all().to_pandas()
+        os.utime(caminho)
+    except FileNotFoundError:
+        return None
+    return df
+
+# Função que busca um item no cache: primeiro na memória, depois no disco (somente DataFrames)
+# Retorna None quando o item não está em cache
+def get_cached(chave):
+    with _lock:
+        if chave in _itens:
+            _itens.move_to_end(chave)
+            return _itens[chave]
+    if CACHE_DIR is None:
+        return None
+    df = _ler_disco(chave)
+    if df is not None:
+        _guardar_memoria(chave, df)
+    return df
+
+# Função que guarda um item no cache; DataFrames também são gravados em disco quando o cache em disco está ativo
+def put_cached(chave, valor):
+    _guardar_memoria(chave, valor)
+    if CACHE_DIR is not None and isinstance(valor, pd.DataFrame):
+        _gravar_disco(chave, valor)
+
+# Função que esvazia o cache em memória
+def clear_cache():
+    global _total
+    with _lock:
+        _total = 0
+        _itens.clear()
+        _tamanhos.clear()
@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+
+from utils.perf import timed_fn
+
+# Limite do cache LRU (compartilhado por todas as sessões do processo)
+MAX_RESULTADOS = 32
+
+_lock = threading.Lock()
+_resultados = OrderedDict()
+
+# Função que identifica a versão do DataFrame carregado pelo data layer (tabela, janela, linhas, ano mais recente, revisão)
+# DataFrames sem versão retornam None e não são guardados nos caches
+def dataset_key(df):
+    return df.attrs.get('versao')
+
+# Função que limpa o cache de resultados (chamada após a gravação de novos dados)
+def clear_cache():
+    with _lock:
+        _resultados.clear()
+
+# Função que normaliza os filtros da Tabela em uma tupla: a ordem de seleção não altera a chave
+def normalize_filters(paises, tipos, anos):
+    return (
+        tuple(sorted(str(p) for p in paises or [])),
+        tuple(sorted(str(t) for t in tipos or [])),
+        (int(anos[0]), int(anos[1])) if anos else None
+    )
+
+# Função que aplica os filtros de País, Tipo e Período (listas vazias não filtram)
+def apply_filters(df, paises, tipos, anos):
+    mascara = None
+    if paises:
+        mascara = df['País'].isin(paises)
+    if tipos:
+        filtro_tipo = df['Tipo'].isin(tipos)
+        mascara = filtro_tipo if mascara is None else mascara & filtro_tipo
+    if anos:
+        filtro_ano = (df['Ano'] >= anos[0]) & (df['Ano'] <= anos[1])
+        mascara = filtro_ano if mascara is None else mascara & filtro_ano
+    return df if mascara is None else df[mascara]
+
+# Função que retorna o DataFrame filtrado, reaproveitando o resultado de seleções repetidas
+# O DataFrame retornado é compartilhado entre sessões e não deve ser alterado
+@timed_fn('tabela: filtros')
+def filter_table(df, paises, tipos, anos):
+    if dataset_key(df) is None:
+        return apply_filters(df, paises, tipos, anos)
+
+    chave = (dataset_key(df),) + normalize_filters(paises, tipos, anos)
+    with _lock:
+        if chave in _resultados:
+            _resultados.move_to_end(chave)
+            return _resultados[chave]
+
+    paises, tipos, anos = chave[1:]
+    resultado = apply_filters(df, list(paises), list(tipos), anos)
+
+    with _lock:
+        _resultados[chave] = resultado
+        while len(_resultados) > MAX_RESULTADOS:
+            _resultados.popitem(last=False)
+    return resultado
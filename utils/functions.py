@@ -1,5 +1,10 @@
 import streamlit as st
-import time
+import pandas as pd
+
+from utils.batch_ingest import stream_file_to_db
+from utils.data_layer import on_table_updated
+from utils.db_writer import upsert_dataframe
+from utils.incremental import save_checksums
 
 # Função para formatar número em Mil, Milhões, Bilhões...
 def format_number(valor):
@@ -9,13 +14,45 @@ def format_number(valor):
         valor /= 1000
     return f'{valor:.2f} Trilhões'
 
-# Função para para fazer download das tabelas em formato csv
-@st.cache_data
-def converte_csv(df):
-    return df.to_csv(index = False).encode('utf-8')
-
-# Função para mensagem de sucesso do Download
+# Função para mensagem de sucesso do Download (toast: não bloqueia o rerun da sessão)
 def mensagem_sucesso():
-    sucesso = st.success('Arquivo baixado com sucesso!', icon = "✅")
-    time.sleep(5)
-    sucesso.empty()
\ No newline at end of file
+    st.toast('Arquivo baixado com sucesso!', icon = "✅")
+
+# Função chamada ao clicar em Download na Tabela: libera o arquivo preparado da sessão (os próximos reruns não o leem mais)
+def download_concluido(chave):
+    st.session_state.pop(chave, None)
+    mensagem_sucesso()
+
+# Função que monta a notificação do resultado de uma gravação no banco de dados
+def mensagem_gravacao(table_name, resultado):
+    if resultado['inserted'] or resultado['updated']:
+        return 'success', (
+            f'Dados salvos com sucesso na tabela `{table_name}` do banco de dados! '
+            f"Inseridos: {resultado['inserted']} | Atualizados: {resultado['updated']} | Ignorados: {resultado['skipped']}"
+        )
+    return 'warning', 'Os dados já existem no banco de dados.'
+
+# Função que grava o lote processado no banco (tarefa em segundo plano do Upload)
+# Upsert pela chave natural (Id, País, Ano, Tipo): somente o lote trafega até o banco
+def salvar_lote(engine, data, table_name, incremental=None):
+    resultado = upsert_dataframe(engine, data, table_name)
+    if incremental is not None:
+        save_checksums(engine, table_name, incremental['checksums'])
+    if resultado['inserted'] or resultado['updated']:
+        on_table_updated(table_name, data)
+    return mensagem_gravacao(table_name, resultado)
+
+# Função que grava os arquivos em modo streaming, bloco a bloco (tarefa em segundo plano do Upload)
+def salvar_streaming(engine, arquivos, process_fn, table_name, on_progress=None):
+    resultado = {'inserted': 0, 'updated': 0, 'skipped': 0}
+    pares_gravados = []
+    for i, arquivo in enumerate(arquivos, start=1):
+        contagens, pares = stream_file_to_db(engine, arquivo.name, arquivo, process_fn, table_name)
+        pares_gravados.append(pares)
+        for chave in resultado:
+            resultado[chave] += contagens[chave]
+        if on_progress is not None:
+            on_progress(i / len(arquivos), f'{arquivo.name} gravado ({i}/{len(arquivos)})')
+    if resultado['inserted'] or resultado['updated']:
+        on_table_updated(table_name, pd.concat(pares_gravados, ignore_index=True))
+    return mensagem_gravacao(table_name, resultado)
\ No newline at end of file
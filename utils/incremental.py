@@ -0,0 +1,116 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, inspect, text
+
+from utils.transform import ID_COLS, split_year_columns
+
+# Tabela com o checksum do conteúdo de cada ano já gravado, por tabela de destino e Tipo
+CHECKSUM_TABLE = 'checksum_anos'
+
+# Função que cria a tabela de checksums caso ela ainda não exista
+def ensure_checksum_table(connection):
+    connection.execute(text(f'''
+        CREATE TABLE IF NOT EXISTS {CHECKSUM_TABLE} (
+            tabela TEXT NOT NULL,
+            "Tipo" TEXT NOT NULL,
+            "Ano" SMALLINT NOT NULL,
+            checksum TEXT NOT NULL,
+            PRIMARY KEY (tabela, "Tipo", "Ano")
+        )
+    '''))
+
+# Função que calcula o checksum (BLAKE2) do conteúdo de cada ano do arquivo largo: Id, País, Quantidade e Valor
+# Retorna um dicionário {ano (texto do cabeçalho): checksum}
+def year_checksums(data):
+    data = data.rename(columns=str)
+    anos, colunas_quantidade, colunas_valor = split_year_columns(data.columns)
+    chaves = pd.util.hash_pandas_object(data[ID_COLS], index=False).to_numpy()
+
+    checksums = {}
+    for ano in anos:
+        resumo = hashlib.blake2b(chaves.tobytes(), digest_size=16)
+        for colunas in (colunas_quantidade, colunas_valor):
+            if ano in colunas:
+                valores = pd.to_numeric(data[colunas[ano]], errors='coerce').fillna(0).to_numpy(dtype='float64')
+            else:
+                valores = np.zeros(len(data), dtype='float64')
+            resumo.update(valores.tobytes())
+        checksums[ano] = resumo.hexdigest()
+    return checksums
+
+# Função que consulta o ano mais recente gravado para um Tipo (None se a tabela ou o Tipo ainda não existirem)
+def latest_year(engine, table_name, tipo):
+    if not inspect(engine).has_table(table_name):
+        return None
+    with engine.connect() as connection:
+        ano = connection.execute(
+            text(f'SELECT MAX("Ano") FROM {table_name} WHERE "Tipo" = :tipo'), {'tipo': tipo}
+        ).scalar()
+    return int(ano) if ano is not None else None
+
+# Função que consulta os checksums gravados de uma tabela e Tipo: {ano (texto): checksum}
+def stored_checksums(engine, table_name, tipo):
+    if not inspect(engine).has_table(CHECKSUM_TABLE):
+        return {}
+    with engine.connect() as connection:
+        linhas = connection.execute(
+            text(f'SELECT "Ano", checksum FROM {CHECKSUM_TABLE} WHERE tabela = :tabela AND "Tipo" = :tipo'),
+            {'tabela': table_name, 'tipo': tipo}
+        ).all()
+    return {str(int(ano)): checksum for ano, checksum in linhas}
+
+# Função que seleciona os anos que precisam ser processados para um Tipo
+# - anos mais recentes que o último ano gravado no banco para o Tipo
+# - anos já gravados cujo checksum mudou (ou que ainda não têm checksum registrado)
+# Se não houver nenhuma linha do Tipo no banco, todos os anos do arquivo são processados
+def changed_years(engine, table_name, tipo, checksums):
+    ano_max = latest_year(engine, table_name, tipo)
+    if ano_max is None:
+        return list(checksums)
+    gravados = stored_checksums(engine, table_name, tipo)
+    return [ano for ano, checksum in checksums.items() if int(ano) > ano_max or gravados.get(ano) != checksum]
+
+# Função que mantém no arquivo largo somente as colunas de identificação e as colunas dos anos informados
+def project_years(data, anos):
+    data = data.rename(columns=str)
+    anos = set(anos)
+    colunas = [c for c in data.columns if c in ID_COLS or c.split('.')[0] in anos]
+    return data[colunas]
+
+# Função que monta o estado da carga incremental de uma tabela, compartilhado pelos arquivos processados
+# type_fn retorna o Tipo a partir do nome do arquivo; os checksums pendentes são gravados após o upsert
+def incremental_state(engine, table_name, type_fn):
+    return {'engine': engine, 'table_name': table_name, 'type_fn': type_fn, 'checksums': {}}
+
+# Função que seleciona os anos novos ou alterados de um arquivo a partir dos seus checksums
+# Os checksums dos anos selecionados ficam pendentes no estado até a gravação do lote
+def register_changed_years(estado, nome, checksums):
+    tipo = estado['type_fn'](nome)
+    anos = changed_years(estado['engine'], estado['table_name'], tipo, checksums)
+    pendentes = estado['checksums'].setdefault(tipo, {})
+    pendentes.update({ano: checksums[ano] for ano in anos})
+    return anos
+
+# Função que grava os checksums dos anos processados (chamada após a gravação do lote no banco)
+def save_checksums(engine, table_name, checksums):
+    if not any(checksums.values()):
+        return
+    delete = text(
+        f'DELETE FROM {CHECKSUM_TABLE} WHERE tabela = :tabela AND "Tipo" = :tipo AND "Ano" IN :anos'
+    ).bindparams(bindparam('anos', expanding=True))
+    insert = text(
+        f'INSERT INTO {CHECKSUM_TABLE} (tabela, "Tipo", "Ano", checksum) VALUES (:tabela, :tipo, :ano, :checksum)'
+    )
+    with engine.begin() as connection:
+        ensure_checksum_table(connection)
+        for tipo, por_ano in checksums.items():
+            if not por_ano:
+                continue
+            anos = [int(ano) for ano in por_ano]
+            connection.execute(delete, {'tabela': table_name, 'tipo': tipo, 'anos': anos})
+            connection.execute(insert, [
+                {'tabela': table_name, 'tipo': tipo, 'ano': int(ano), 'checksum': checksum}
+                for ano, checksum in por_ano.items()
+            ])
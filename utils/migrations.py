@@ -0,0 +1,132 @@
+from sqlalchemy import inspect, text
+
+from utils.incremental import ensure_checksum_table
+from utils.revisions import bump_revision, ensure_revision_table
+from utils.rollups import rollup_table
+
+# Tabelas base do app
+TABLES = ['export_vinho', 'import_vinho']
+
+# Chave natural das tabelas export_vinho e import_vinho
+NATURAL_KEY = ['Id', 'País', 'Ano', 'Tipo']
+
+# Índices compostos utilizados pelos filtros do Analytics, pela consulta do ano mais recente e pela Tabela paginada
+INDEXES = {
+    'tipo_ano': ['Tipo', 'Ano'],
+    'pais_ano': ['País', 'Ano'],
+    'ano': ['Ano'],
+    'pagina': ['Ano', 'País', 'Tipo', 'Id'],
+}
+
+# Função que converte a coluna "Ano" (gravada como texto pelo fluxo antigo) para SMALLINT
+# No SQLite (utilizado apenas como banco local de testes) a tipagem é dinâmica e a conversão é ignorada
+def migrate_ano_column(connection, table_name):
+    if connection.dialect.name != 'postgresql':
+        return
+    tipo_atual = connection.execute(text('''
+        SELECT data_type
+        FROM information_schema.columns
+        WHERE table_name = :tabela AND column_name = 'Ano'
+    '''), {'tabela': table_name}).scalar()
+    if tipo_atual is not None and tipo_atual != 'smallint':
+        connection.execute(text(
+            f'ALTER TABLE {table_name} ALTER COLUMN "Ano" TYPE SMALLINT USING CAST("Ano" AS SMALLINT)'
+        ))
+
+# Função que cria os índices compostos de uma tabela
+def create_indexes(connection, table_name):
+    for sufixo, colunas in INDEXES.items():
+        lista_colunas = ', '.join(f'"{c}"' for c in colunas)
+        connection.execute(text(f'CREATE INDEX IF NOT EXISTS {table_name}_{sufixo} ON {table_name} ({lista_colunas})'))
+
+# Função que garante o índice único da chave natural, exigido pelo upsert (ON CONFLICT)
+# Linhas duplicadas gravadas pelo fluxo antigo (append) são removidas antes, mantendo a gravada por último
+# (maior ctid/rowid): no append as linhas mais recentes são os valores revisados
+# Se alguma linha for removida, a tabela de resumo (calculada com as duplicatas) é descartada e recriada na próxima carga
+def ensure_natural_key(connection, table_name):
+    index_name = f'{table_name}_chave_natural'
+    if index_name in [idx['name'] for idx in inspect(connection).get_indexes(table_name)]:
+        return
+
+    chave = ', '.join(f'"{c}"' for c in NATURAL_KEY)
+    if connection.dialect.name == 'postgresql':
+        condicao = ' AND '.join(f'a."{c}" = b."{c}"' for c in NATURAL_KEY)
+        removidas = connection.execute(text(
+            f'DELETE FROM {table_name} a USING {table_name} b WHERE a.ctid < b.ctid AND {condicao}'
+        )).rowcount
+    else:
+        removidas = connection.execute(text(
+            f'DELETE FROM {table_name} WHERE rowid NOT IN (SELECT MAX(rowid) FROM {table_name} GROUP BY {chave})'
+        )).rowcount
+    connection.execute(text(f'CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {table_name} ({chave})'))
+    if removidas:
+        connection.execute(text(f'DROP TABLE IF EXISTS {rollup_table(table_name)}'))
+        bump_revision(connection, table_name)
+
+# Função que verifica se a tabela é particionada (somente PostgreSQL)
+def is_partitioned(connection, table_name):
+    if connection.dialect.name != 'postgresql':
+        return False
+    return bool(connection.execute(text('''
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid
+            WHERE c.relname = :tabela
+        )
+    '''), {'tabela': table_name}).scalar())
+
+# Função que cria as partições por década que ainda não existem para os anos informados
+# Chamada antes de cada gravação: anos de uma década nova ganham a sua partição automaticamente
+def ensure_partitions(connection, table_name, anos):
+    if not is_partitioned(connection, table_name):
+        return
+    for decada in sorted({int(ano) // 10 * 10 for ano in anos}):
+        connection.execute(text(
+            f'CREATE TABLE IF NOT EXISTS {table_name}_{decada}s PARTITION OF {table_name} '
+            f'FOR VALUES FROM ({decada}) TO ({decada + 10})'
+        ))
+
+# Função que converte uma tabela em uma tabela particionada por década de "Ano" (migração opcional, PostgreSQL)
+# As consultas com filtro de período (janela de análise, Tabela paginada) passam a ler somente as partições da janela
+# Retorna False se a tabela já estiver particionada
+def partition_table(engine, table_name):
+    if engine.dialect.name != 'postgresql':
+        raise ValueError('O particionamento por década está disponível somente no PostgreSQL')
+    with engine.begin() as connection:
+        if is_partitioned(connection, table_name):
+            return False
+        migrate_ano_column(connection, table_name)
+        inicio, fim = connection.execute(text(f'SELECT MIN("Ano"), MAX("Ano") FROM {table_name}')).one()
+
+        antiga = f'{table_name}_sem_particao'
+        connection.execute(text(f'ALTER TABLE {table_name} RENAME TO {antiga}'))
+        connection.execute(text(
+            f'CREATE TABLE {table_name} (LIKE {antiga} INCLUDING DEFAULTS) PARTITION BY RANGE ("Ano")'
+        ))
+        if inicio is not None:
+            ensure_partitions(connection, table_name, range(int(inicio), int(fim) + 1))
+        connection.execute(text(f'INSERT INTO {table_name} SELECT * FROM {antiga}'))
+        connection.execute(text(f'DROP TABLE {antiga}'))
+
+        # Índices recriados na tabela particionada (propagados para cada partição)
+        chave = ', '.join(f'"{c}"' for c in NATURAL_KEY)
+        connection.execute(text(f'CREATE UNIQUE INDEX {table_name}_chave_natural ON {table_name} ({chave})'))
+        create_indexes(connection, table_name)
+    with engine.connect() as connection:
+        connection.execution_options(isolation_level='AUTOCOMMIT').execute(text(f'ANALYZE {table_name}'))
+    return True
+
+# Função que aplica as migrações de schema nas tabelas existentes (idempotente)
+def migrate_schema(engine):
+    tabelas_existentes = set(inspect(engine).get_table_names())
+    with engine.begin() as connection:
+        for table_name in TABLES:
+            if table_name not in tabelas_existentes:
+                continue
+            migrate_ano_column(connection, table_name)
+            ensure_natural_key(connection, table_name)
+            create_indexes(connection, table_name)
+            resumo = rollup_table(table_name)
+            if resumo in tabelas_existentes:
+                migrate_ano_column(connection, resumo)
+        ensure_checksum_table(connection)
+        ensure_revision_table(connection)
@@ -0,0 +1,140 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+import psutil
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Número de execuções (reruns) mantidas por sessão no painel de performance
+MAX_EXECUCOES = 20
+
+# Número máximo de sessões com histórico em memória (as mais antigas são descartadas)
+MAX_SESSOES = 100
+
+# Arquivo de log (JSON lines) com uma linha por execução: definido pela variável de ambiente PERF_LOG
+PERF_LOG = os.environ.get('PERF_LOG')
+
+_lock = threading.Lock()
+_atuais = {}
+_historico = {}
+_processo = psutil.Process()
+
+# Função que identifica a sessão do Streamlit da thread atual (None fora do Streamlit)
+def _sessao():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+# Função que retorna a memória residente do processo em MB
+def _memoria_mb():
+    return _processo.memory_info().rss / 1024 / 1024
+
+# Função que retorna o inicializador das threads de um pool: as medições das threads entram na execução da sessão
+# Fora do Streamlit (ex.: ingest.py) não há contexto e as threads não precisam de inicializador
+def thread_initializer():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return None
+    return lambda: add_script_run_ctx(ctx=ctx)
+
+# Função que inicia a medição de uma execução (rerun) da sessão atual
+def start_run(pagina):
+    execucao = {
+        'inicio': datetime.now().isoformat(timespec='seconds'),
+        'pagina': pagina,
+        'memoria_inicial_mb': round(_memoria_mb(), 1),
+        'etapas': [],
+        '_relogio': time.perf_counter(),
+    }
+    with _lock:
+        _atuais[_sessao()] = execucao
+
+# Função que registra uma etapa na execução atual da sessão (ignorada quando não há execução em andamento)
+def record(etapa, duracao, linhas=None, delta_mb=None):
+    sessao = _sessao()
+    with _lock:
+        execucao = _atuais.get(sessao)
+        if execucao is None:
+            return
+        execucao['etapas'].append({
+            'etapa': etapa,
+            'duracao_ms': round(duracao * 1000, 2),
+            'linhas': linhas,
+            'delta_memoria_mb': round(delta_mb, 1) if delta_mb is not None else None,
+            'thread': threading.current_thread().name,
+        })
+
+# Função que retorna o número de linhas de um resultado (DataFrame, Series, array ou o primeiro item de uma tupla)
+def _linhas(resultado):
+    if isinstance(resultado, tuple) and resultado:
+        resultado = resultado[0]
+    if isinstance(resultado, (pd.DataFrame, pd.Series)) or hasattr(resultado, 'shape'):
+        return int(len(resultado))
+    return None
+
+# Gerenciador de contexto que mede uma etapa: duração, variação de memória e (opcionalmente) linhas
+# O dicionário retornado pode receber a chave 'linhas' dentro do bloco
+@contextmanager
+def timed(etapa):
+    medida = {}
+    memoria = _memoria_mb()
+    inicio = time.perf_counter()
+    try:
+        yield medida
+    finally:
+        record(etapa, time.perf_counter() - inicio, medida.get('linhas'), _memoria_mb() - memoria)
+
+# Decorador que mede cada chamada da função como uma etapa (as linhas vêm do resultado)
+def timed_fn(etapa):
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            with timed(etapa) as contexto:
+                resultado = funcao(*args, **kwargs)
+                contexto['linhas'] = _linhas(resultado)
+            return resultado
+        return medida
+    return decorador
+
+# Função que encerra a execução atual: guarda no histórico da sessão e grava no log (se PERF_LOG estiver definido)
+def finish_run():
+    sessao = _sessao()
+    with _lock:
+        execucao = _atuais.pop(sessao, None)
+        if execucao is None:
+            return None
+        execucao['duracao_ms'] = round((time.perf_counter() - execucao.pop('_relogio')) * 1000, 2)
+        execucao['memoria_final_mb'] = round(_memoria_mb(), 1)
+        _historico.setdefault(sessao, deque(maxlen=MAX_EXECUCOES)).appendleft(execucao)
+        while len(_historico) > MAX_SESSOES:
+            _historico.pop(next(iter(_historico)))
+    if PERF_LOG:
+        with open(PERF_LOG, 'a', encoding='utf-8') as log:
+            log.write(json.dumps(execucao, ensure_ascii=False) + '\n')
+    return execucao
+
+# Função que retorna as últimas execuções da sessão atual (a mais recente primeiro)
+def recent_runs():
+    with _lock:
+        return list(_historico.get(_sessao(), []))
+
+# Função que monta a tabela de etapas de uma execução, somando as chamadas repetidas de uma mesma etapa
+def stages_table(execucao):
+    etapas = pd.DataFrame(execucao['etapas'], columns=['etapa', 'duracao_ms', 'linhas', 'delta_memoria_mb'])
+    if etapas.empty:
+        return etapas
+    return (
+        etapas.groupby('etapa', sort=False)
+        .agg(chamadas=('duracao_ms', 'size'), duracao_ms=('duracao_ms', 'sum'), linhas=('linhas', 'max'), delta_memoria_mb=('delta_memoria_mb', 'sum'))
+        .reset_index()
+        .sort_values('duracao_ms', ascending=False)
+    )
+
+# Função que exporta as execuções em JSON lines (uma execução por linha)
+def runs_jsonl(execucoes):
+    return ''.join(json.dumps(e, ensure_ascii=False) + '\n' for e in execucoes).encode('utf-8')
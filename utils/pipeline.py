@@ -0,0 +1,91 @@
+import re
+import time
+from fnmatch import fnmatch
+
+from utils.perf import record
+from utils.transform import ID_COLS, drop_empty_rows, split_year_columns, wide_to_long
+
+# Registro dos arquivos da Embrapa aceitos pelo app
+# padrao: nome do arquivo (aceita curingas do fnmatch); direcao: export/import; tipo: valor da coluna Tipo;
+# tabela: tabela de destino no banco; unidade: unidade da coluna Quantidade
+FONTES = [
+    {'padrao': 'ExpVinho.csv', 'direcao': 'export', 'tipo': 'Vinhos de mesa', 'tabela': 'export_vinho', 'unidade': 'Kg'},
+    {'padrao': 'ExpEspumantes.csv', 'direcao': 'export', 'tipo': 'Espumantes', 'tabela': 'export_vinho', 'unidade': 'Kg'},
+    {'padrao': 'ExpUva.csv', 'direcao': 'export', 'tipo': 'Uvas frescas', 'tabela': 'export_vinho', 'unidade': 'Kg'},
+    {'padrao': 'ExpSuco.csv', 'direcao': 'export', 'tipo': 'Suco de uva', 'tabela': 'export_vinho', 'unidade': 'Kg'},
+    {'padrao': 'ImpVinhos.csv', 'direcao': 'import', 'tipo': 'Vinhos de mesa', 'tabela': 'import_vinho', 'unidade': 'Kg'},
+    {'padrao': 'ImpEspumantes.csv', 'direcao': 'import', 'tipo': 'Espumantes', 'tabela': 'import_vinho', 'unidade': 'Kg'},
+    {'padrao': 'ImpFrescas.csv', 'direcao': 'import', 'tipo': 'Uvas frescas', 'tabela': 'import_vinho', 'unidade': 'Kg'},
+    {'padrao': 'ImpPassas.csv', 'direcao': 'import', 'tipo': 'Uvas passas', 'tabela': 'import_vinho', 'unidade': 'Kg'},
+    {'padrao': 'ImpSuco.csv', 'direcao': 'import', 'tipo': 'Suco de uva', 'tabela': 'import_vinho', 'unidade': 'Kg'},
+]
+
+# Colunas de ano aceitas no cabeçalho: '1970' (Quantidade) e '1970.1' (Valor)
+_COLUNA_ANO = re.compile(r'^\d{4}(\.1)?$')
+
+# Função que localiza o registro de um arquivo pelo nome (opcionalmente restrito a uma direção)
+# Arquivos fora do registro geram erro em vez de serem gravados com um Tipo genérico
+def find_source(file_name, direcao=None):
+    for fonte in FONTES:
+        if fnmatch(file_name, fonte['padrao']) and direcao in (None, fonte['direcao']):
+            return fonte
+    esperados = ', '.join(f['padrao'] for f in FONTES if direcao in (None, f['direcao']))
+    raise ValueError(f'Arquivo não reconhecido: {file_name!r}. Arquivos esperados: {esperados}')
+
+# Etapa de validação do cabeçalho: colunas de identificação, colunas de ano e pares Quantidade/Valor completos
+def validate_header(data, fonte):
+    colunas = [str(c) for c in data.columns]
+    ausentes = [c for c in ID_COLS if c not in colunas]
+    if ausentes:
+        raise ValueError(f"{fonte['padrao']}: colunas ausentes no cabeçalho: {', '.join(ausentes)}")
+    inesperadas = [c for c in colunas if c not in ID_COLS and not _COLUNA_ANO.match(c)]
+    if inesperadas:
+        raise ValueError(f"{fonte['padrao']}: colunas inesperadas no cabeçalho: {', '.join(inesperadas)}")
+    anos, colunas_quantidade, colunas_valor = split_year_columns(colunas)
+    incompletos = [ano for ano in anos if ano not in colunas_quantidade or ano not in colunas_valor]
+    if incompletos:
+        raise ValueError(f"{fonte['padrao']}: anos sem o par Quantidade/Valor: {', '.join(incompletos)}")
+    return data
+
+# Etapa de transposição dos anos em linhas (Id, País, Ano, Quantidade, Valor)
+# As linhas repetidas de um mesmo Id e País são somadas ainda no formato largo, antes da transposição
+def reshape(data, fonte):
+    return wide_to_long(data)
+
+# Etapa que adiciona a coluna Tipo do registro
+def add_type(data, fonte):
+    data['Tipo'] = fonte['tipo']
+    return data
+
+# Etapa que remove as linhas com Quantidade e Valor iguais a zero
+def filter_zeros(data, fonte):
+    return drop_empty_rows(data)
+
+# Etapas do pipeline, na ordem de execução (a leitura e a gravação ficam em utils/batch_ingest.py e utils/db_writer.py)
+STAGES = [
+    ('validação', validate_header),
+    ('transposição', reshape),
+    ('tipo', add_type),
+    ('filtro de zeros', filter_zeros),
+]
+
+# Função que executa as etapas do pipeline sobre o arquivo lido
+# on_stage (opcional) é chamada ao final de cada etapa com o nome da etapa, a duração (s) e o número de linhas
+# Cada etapa também é registrada na execução atual do painel de performance (utils/perf.py)
+def run_pipeline(data, fonte, stages=STAGES, on_stage=None):
+    for etapa, funcao in stages:
+        inicio = time.perf_counter()
+        data = funcao(data, fonte)
+        duracao = time.perf_counter() - inicio
+        record(f'pipeline: {etapa}', duracao, len(data))
+        if on_stage is not None:
+            on_stage(etapa, duracao, len(data))
+    return data
+
+# Função que processa um arquivo da Embrapa de acordo com o registro
+def process_dataset(file_name, data, direcao=None, on_stage=None):
+    return run_pipeline(data, find_source(file_name, direcao), on_stage=on_stage)
+
+# Função que retorna o Tipo de um arquivo a partir do registro
+def dataset_type(file_name, direcao=None):
+    return find_source(file_name, direcao)['tipo']
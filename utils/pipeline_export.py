@@ -1,35 +1,9 @@
-import pandas as pd
+from utils.pipeline import dataset_type, process_dataset
 
-def process_file(file_name, data):
-    # Transposição das colunas de Anos em linhas
-    data = data.melt(id_vars=['Id', 'País'], var_name='Ano', value_name='Value')
+# Função que retorna o Tipo a partir do nome do arquivo (registro em utils/pipeline.py)
+def export_type(file_name):
+    return dataset_type(file_name, 'export')
 
-    # Colunas de Valor e Quantidade
-    data['Valor'] = data.apply(lambda row: row['Value'] if '.' in str(row['Ano']) else None, axis=1)
-    data['Quantidade'] = data.apply(lambda row: row['Value'] if '.' not in str(row['Ano']) else None, axis=1)
-
-    # Removendo o '.1' da coluna 'Ano'
-    data['Ano'] = data['Ano'].str.replace(r'\.1$', '', regex=True)
-
-    # Groupby por 'Id', 'País' e 'Ano' e somando as colunas 'Quantidade' e 'Valor'
-    data = data.groupby(['Id', 'País', 'Ano'], as_index=False).agg({
-        'Quantidade': 'sum',
-        'Valor': 'sum'
-    })
-
-    # Adicionando a nova coluna 'Tipo' com base no nome do arquivo
-    if file_name == 'ExpVinho.csv':
-        data['Tipo'] = 'Vinhos de mesa'
-    elif file_name == 'ExpEspumantes.csv':
-        data['Tipo'] = 'Espumantes'
-    elif file_name == 'ExpUva.csv':
-        data['Tipo'] = 'Uvas frescas'
-    elif file_name == 'ExpSuco.csv':
-        data['Tipo'] = 'Suco de uva'
-    else:
-        data['Tipo'] = 'Desconhecido'
-
-    # Removendo linhas com Quantidade e Valor iguais a zero
-    data = data[~((data['Quantidade'] == 0) & (data['Valor'] == 0))]
-
-    return data
\ No newline at end of file
+def process_file(file_name, data, on_stage=None):
+    # Validação do cabeçalho, transposição das colunas de Anos em linhas, coluna 'Tipo' e remoção das linhas zeradas
+    return process_dataset(file_name, data, 'export', on_stage=on_stage)
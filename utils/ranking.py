@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from utils.perf import timed_fn
+
+MEDIDAS = ['Valor', 'Quantidade']
+
+# Função que monta o índice de ranking de países a partir da tabela de resumo (Ano, País, Tipo)
+# Para cada medida guarda uma matriz densa Tipo x Ano x País com somas acumuladas (prefix sums) ao longo dos anos,
+# além da contagem de linhas, utilizada para saber quais combinações existem nos dados
+@timed_fn('dashboard: índice de ranking')
+def build_ranking_index(df):
+    paises = np.array(sorted(df['País'].dropna().astype(str).unique()), dtype=object)
+    tipos = sorted(df['Tipo'].dropna().astype(str).unique())
+    ano_inicial = int(df['Ano'].min()) if not df.empty else 0
+    n_anos = int(df['Ano'].max()) - ano_inicial + 1 if not df.empty else 0
+
+    df = df.dropna(subset=['País', 'Tipo'])
+    i_tipo = pd.Categorical(df['Tipo'].astype(str), categories=tipos).codes
+    i_ano = df['Ano'].to_numpy(dtype='int64') - ano_inicial
+    i_pais = pd.Categorical(df['País'].astype(str), categories=paises).codes
+
+    formato = (len(tipos), n_anos, len(paises))
+    indice = {'paises': paises, 'tipos': tipos, 'ano_inicial': ano_inicial, 'n_anos': n_anos}
+    for medida, valores in [(m, df[m].to_numpy(dtype='float64')) for m in MEDIDAS] + [('linhas', np.ones(len(df)))]:
+        matriz = np.zeros(formato, dtype='float64')
+        np.add.at(matriz, (i_tipo, i_ano, i_pais), valores)
+        acumulado = np.zeros((len(tipos), n_anos + 1, len(paises)), dtype='float64')
+        np.cumsum(matriz, axis=1, out=acumulado[:, 1:, :])
+        indice[medida] = acumulado
+    return indice
+
+# Função que converte os filtros (Tipos e período) em posições do índice
+def _posicoes(indice, tipos, anos):
+    i_tipos = [indice['tipos'].index(t) for t in tipos if t in indice['tipos']]
+    inicio = min(max(int(anos[0]) - indice['ano_inicial'], 0), indice['n_anos'])
+    fim = min(max(int(anos[1]) - indice['ano_inicial'] + 1, 0), indice['n_anos'])
+    return i_tipos, inicio, max(inicio, fim)
+
+# Função que soma uma medida por país para os Tipos e o período selecionados (diferença das somas acumuladas)
+def range_totals(indice, tipos, anos, medida='Valor'):
+    i_tipos, inicio, fim = _posicoes(indice, tipos, anos)
+    acumulado = indice[medida][i_tipos]
+    return (acumulado[:, fim, :] - acumulado[:, inicio, :]).sum(axis=0)
+
+# Função que retorna os N países com maior Valor (ou Quantidade) nos Tipos e período selecionados
+# Resultado equivalente a groupby('País').sum().nlargest(n), ordenado de forma decrescente
+# Empates são desfeitos pela ordem alfabética do país (a mesma ordem do groupby, mantida por nlargest)
+@timed_fn('dashboard: top países')
+def rank_countries(indice, tipos, anos, n, medida='Valor'):
+    totais = range_totals(indice, tipos, anos, medida)
+    presentes = np.flatnonzero(range_totals(indice, tipos, anos, 'linhas') > 0)
+    return presentes[np.lexsort((presentes, -totais[presentes]))][:n]
+
+# Função que monta o DataFrame (País, medida) de um conjunto de países, ordenado pela medida
+@timed_fn('dashboard: totais por país')
+def country_totals(indice, tipos, anos, posicoes, medida='Valor'):
+    totais = range_totals(indice, tipos, anos, medida)[posicoes]
+    ordem = np.lexsort((posicoes, -totais))
+    return pd.DataFrame({'País': indice['paises'][posicoes][ordem], medida: totais[ordem]})
+
+# Função que retorna a medida por (Ano, País) para um conjunto de países, somente nas combinações existentes nos dados
+@timed_fn('dashboard: valor por ano')
+def yearly_values(indice, tipos, anos, posicoes, medida='Valor'):
+    i_tipos, inicio, fim = _posicoes(indice, tipos, anos)
+    posicoes = np.sort(posicoes)
+    if not i_tipos:
+        return pd.DataFrame({'Ano': pd.Series(dtype='int64'), 'País': pd.Series(dtype=object), medida: pd.Series(dtype='float64')})
+    anuais = np.diff(indice[medida][i_tipos][:, inicio:fim + 1, :][:, :, posicoes], axis=1).sum(axis=0)
+    linhas = np.diff(indice['linhas'][i_tipos][:, inicio:fim + 1, :][:, :, posicoes], axis=1).sum(axis=0)
+    i_ano, i_pais = np.nonzero(linhas > 0)
+    return pd.DataFrame({
+        'Ano': i_ano + inicio + indice['ano_inicial'],
+        'País': indice['paises'][posicoes][i_pais],
+        medida: anuais[i_ano, i_pais]
+    })
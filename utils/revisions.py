@@ -0,0 +1,35 @@
+from sqlalchemy import text
+
+# Tabela com a revisão do conteúdo de cada tabela: incrementada a cada gravação que insere ou altera linhas
+# Complementa a versão (linhas + ano mais recente), que não muda quando somente Quantidade/Valor são revisados
+REVISION_TABLE = 'revisao_tabelas'
+
+# Função que cria a tabela de revisões caso ela ainda não exista
+def ensure_revision_table(connection):
+    connection.execute(text(f'''
+        CREATE TABLE IF NOT EXISTS {REVISION_TABLE} (
+            tabela TEXT PRIMARY KEY,
+            revisao INTEGER NOT NULL
+        )
+    '''))
+
+# Função que incrementa a revisão de uma tabela (na mesma transação da gravação)
+def bump_revision(connection, table_name):
+    ensure_revision_table(connection)
+    connection.execute(text(f'''
+        INSERT INTO {REVISION_TABLE} (tabela, revisao) VALUES (:tabela, 1)
+        ON CONFLICT (tabela) DO UPDATE SET revisao = {REVISION_TABLE}.revisao + 1
+    '''), {'tabela': table_name})
+
+# Função que retorna a revisão atual de uma tabela (0 se ela nunca foi gravada pelo app)
+# Somente leitura: a tabela de revisões é criada por migrate_schema (e pela primeira gravação)
+def get_revision(connection, table_name):
+    revisao = connection.execute(
+        text(f'SELECT revisao FROM {REVISION_TABLE} WHERE tabela = :tabela'), {'tabela': table_name}
+    ).scalar()
+    return int(revisao or 0)
+
+# Função que consulta a revisão atual de uma tabela (consulta pela chave primária, sem varrer a tabela)
+def table_revision(engine, table_name):
+    with engine.connect() as connection:
+        return get_revision(connection, table_name)
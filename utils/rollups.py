@@ -0,0 +1,52 @@
+from sqlalchemy import bindparam, inspect, text
+
+from utils.perf import timed_fn
+from utils.revisions import bump_revision
+
+# Dimensões e medidas das tabelas de resumo utilizadas pelos dashboards
+ROLLUP_DIMENSIONS = ['Ano', 'País', 'Tipo']
+ROLLUP_MEASURES = ['Valor', 'Quantidade']
+
+# Função que retorna o nome da tabela de resumo de uma tabela base (ex.: export_vinho_resumo)
+def rollup_table(table_name):
+    return f'{table_name}_resumo'
+
+# Função que monta o SELECT agregado (Ano, País, Tipo) -> soma de Valor e Quantidade
+def _select_agregado(table_name, filtro=''):
+    dimensoes = ', '.join(f'"{c}"' for c in ROLLUP_DIMENSIONS)
+    medidas = ', '.join(f'SUM("{c}") AS "{c}"' for c in ROLLUP_MEASURES)
+    return f'SELECT {dimensoes}, {medidas} FROM {table_name} {filtro} GROUP BY {dimensoes}'
+
+# Função que cria a tabela de resumo completa caso ela ainda não exista
+def ensure_rollup(engine, table_name):
+    resumo = rollup_table(table_name)
+    if inspect(engine).has_table(resumo):
+        return
+    dimensoes = ', '.join(f'"{c}"' for c in ROLLUP_DIMENSIONS)
+    with engine.begin() as connection:
+        connection.execute(text(f'CREATE TABLE {resumo} AS {_select_agregado(table_name)}'))
+        connection.execute(text(f'CREATE UNIQUE INDEX IF NOT EXISTS {resumo}_chave ON {resumo} ({dimensoes})'))
+        bump_revision(connection, resumo)
+
+# Função que atualiza de forma incremental a tabela de resumo após um upload
+# Somente os pares (Tipo, Ano) presentes no lote gravado são recalculados a partir da tabela base
+@timed_fn('gravação: tabela de resumo')
+def refresh_rollup(engine, table_name, data):
+    if not inspect(engine).has_table(rollup_table(table_name)):
+        ensure_rollup(engine, table_name)
+        return
+
+    resumo = rollup_table(table_name)
+    filtro = 'WHERE "Tipo" = :tipo AND "Ano" IN :anos'
+    delete = text(f'DELETE FROM {resumo} {filtro}').bindparams(bindparam('anos', expanding=True))
+    colunas = ', '.join(f'"{c}"' for c in ROLLUP_DIMENSIONS + ROLLUP_MEASURES)
+    insert = text(
+        f'INSERT INTO {resumo} ({colunas}) {_select_agregado(table_name, filtro)}'
+    ).bindparams(bindparam('anos', expanding=True))
+
+    with engine.begin() as connection:
+        for tipo, anos in data.groupby('Tipo')['Ano'].unique().items():
+            parametros = {'tipo': tipo, 'anos': anos.tolist()}
+            connection.execute(delete, parametros)
+            connection.execute(insert, parametros)
+        bump_revision(connection, resumo)
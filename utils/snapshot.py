@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+from contextlib import ExitStack
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+from sqlalchemy import text
+
+from utils.db_queries import query_data
+from utils.perf import timed_fn
+from utils.revisions import get_revision, table_revision
+
+# Pasta local onde ficam os snapshots colunares (Arrow IPC) das tabelas
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', os.path.join('.cache', 'snapshots'))
+
+# Colunas de texto gravadas com dictionary encoding (poucos valores distintos)
+DICTIONARY_COLS = ['País', 'Tipo']
+
+# Um lock por tabela: gravação, verificação e leitura do snapshot de uma tabela não se intercalam entre sessões/threads
+_lock = threading.Lock()
+_locks_tabelas = {}
+
+# Função que consulta a versão atual da tabela no banco: número de linhas, ano mais recente e revisão do conteúdo
+# A revisão muda a cada gravação, inclusive quando somente Quantidade/Valor de chaves existentes são revisados
+@timed_fn('banco: versão da tabela')
+def table_version(engine, table_name):
+    with engine.connect() as connection:
+        linhas, ano = connection.execute(text(
+            f'SELECT COUNT(*), MAX("Ano") FROM {table_name}'
+        )).one()
+        revisao = get_revision(connection, table_name)
+    return {'linhas': int(linhas), 'ano_max': int(ano) if ano is not None else None, 'revisao': revisao}
+
+# Função que retorna a pasta dos snapshots de uma tabela (um arquivo por década)
+def snapshot_dir(table_name):
+    return os.path.join(SNAPSHOT_DIR, table_name)
+
+# Função que retorna o caminho do snapshot de uma década de uma tabela
+def snapshot_path(table_name, decada):
+    return os.path.join(snapshot_dir(table_name), f'{decada}.arrow')
+
+# Função que retorna o caminho do manifesto do snapshot (versão da tabela e décadas gravadas)
+def _manifesto_path(table_name):
+    return os.path.join(snapshot_dir(table_name), 'versao.json')
+
+# Função que retorna a década de um ano (ex.: 1987 -> 1980)
+def decade(ano):
+    return int(ano) // 10 * 10
+
+# Função que lê o manifesto do snapshot de uma tabela (ou None se ele não existir)
+def _ler_manifesto(table_name):
+    caminho = _manifesto_path(table_name)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+# Função que retorna o lock (reentrante) do snapshot de uma tabela
+def _lock_tabela(table_name):
+    with _lock:
+        return _locks_tabelas.setdefault(table_name, threading.RLock())
+
+# Função que grava um arquivo de forma atômica (arquivo temporário único por processo/thread + os.replace)
+def _gravar_atomico(caminho, gravar):
+    temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+    gravar(temporario)
+    os.replace(temporario, caminho)
+
+# Função que grava o snapshot de uma década em formato Arrow IPC
+# Décadas fechadas são comprimidas (zstd); a década mais recente fica sem compressão, para leitura via mmap
+def _gravar_decada(df, caminho, comprimir):
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    for coluna in DICTIONARY_COLS:
+        if coluna in tabela.column_names:
+            indice = tabela.schema.get_field_index(coluna)
+            tabela = tabela.set_column(indice, coluna, pc.dictionary_encode(tabela[coluna]))
+    opcoes = ipc.IpcWriteOptions(compression='zstd' if comprimir else None)
+
+    def gravar(temporario):
+        with pa.OSFile(temporario, 'wb') as destino:
+            with ipc.new_file(destino, tabela.schema, options=opcoes) as escritor:
+                escritor.write_table(tabela)
+    _gravar_atomico(caminho, gravar)
+
+# Função que grava o snapshot de uma tabela particionado por década de "Ano"
+# Sem decadas (ou sem snapshot anterior) a tabela inteira é regravada; com decadas somente essas décadas são
+# consultadas no banco e regravadas (ex.: após o Upload de alguns anos)
+# A versão (linhas + ano mais recente) e a lista de décadas ficam no manifesto, gravado por último
+@timed_fn('snapshot: gravação')
+def write_snapshot(engine, table_name, decadas=None):
+    with _lock_tabela(table_name):
+        return _gravar_snapshot(engine, table_name, decadas)
+
+# Função que grava o snapshot de uma tabela (chamada por write_snapshot, com o lock da tabela)
+def _gravar_snapshot(engine, table_name, decadas):
+    os.makedirs(snapshot_dir(table_name), exist_ok=True)
+    manifesto = _ler_manifesto(table_name)
+
+    if decadas is None or manifesto is None:
+        # A revisão é lida antes dos dados: uma gravação concorrente deixa o snapshot desatualizado (e não o contrário)
+        revisao = table_revision(engine, table_name)
+        df = query_data(engine, table_name)
+        versao = {'linhas': len(df), 'ano_max': int(df['Ano'].max()) if not df.empty else None, 'revisao': revisao}
+        partes = dict(tuple(df.groupby(df['Ano'] // 10 * 10))) if not df.empty else {}
+        colunas = list(df.columns)
+        gravadas = set()
+        atual = decade(versao['ano_max']) if versao['ano_max'] is not None else None
+    else:
+        versao = table_version(engine, table_name)
+        atual = decade(versao['ano_max']) if versao['ano_max'] is not None else None
+        # Quando os dados chegam a uma nova década, a década que era a mais recente é regravada com compressão
+        decadas = set(decadas)
+        if manifesto['ano_max'] is not None and decade(manifesto['ano_max']) != atual:
+            decadas.add(decade(manifesto['ano_max']))
+        partes = {d: query_data(engine, table_name, ano_inicio=d, ano_fim=d + 9) for d in sorted(decadas)}
+        colunas = next((list(parte.columns) for parte in partes.values()), manifesto.get('colunas', []))
+        gravadas = set(manifesto['decadas'])
+
+    for decada, parte in partes.items():
+        decada = int(decada)
+        if parte.empty:
+            gravadas.discard(decada)
+            continue
+        _gravar_decada(parte.reset_index(drop=True), snapshot_path(table_name, decada), comprimir=decada != atual)
+        gravadas.add(decada)
+
+    # Arquivos de décadas que não existem mais (e o snapshot antigo, de arquivo único) são removidos
+    for nome in os.listdir(snapshot_dir(table_name)):
+        if nome.endswith('.arrow') and int(nome[:-len('.arrow')]) not in gravadas:
+            os.remove(os.path.join(snapshot_dir(table_name), nome))
+    legado = os.path.join(SNAPSHOT_DIR, f'{table_name}.arrow')
+    if os.path.exists(legado):
+        os.remove(legado)
+
+    def gravar(temporario):
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump({**versao, 'decadas': sorted(gravadas), 'colunas': colunas}, arquivo)
+    _gravar_atomico(_manifesto_path(table_name), gravar)
+    return versao
+
+# Função que retorna a versão gravada no snapshot (ou None se ele não existir)
+def snapshot_version(table_name):
+    manifesto = _ler_manifesto(table_name)
+    if manifesto is None:
+        return None
+    return {'linhas': manifesto['linhas'], 'ano_max': manifesto['ano_max'], 'revisao': manifesto.get('revisao')}
+
+# Função que lê o snapshot via memory map, somente das décadas da janela de anos (tempo proporcional à janela)
+# País e Tipo são carregados como categorias (dictionary encoding do Arrow)
+# As décadas são lidas em ordem e cada arquivo é gravado ordenado por "Ano", então a ordenação do banco é preservada
+@timed_fn('snapshot: leitura')
+def read_snapshot(table_name, ano_inicio=None):
+    manifesto = _ler_manifesto(table_name)
+    todas = manifesto['decadas']
+    if not todas:
+        # Snapshot de uma tabela sem linhas: nenhum arquivo de década, somente as colunas do manifesto
+        return pd.DataFrame(columns=manifesto.get('colunas', []))
+    decadas = [d for d in todas if ano_inicio is None or d + 9 >= ano_inicio]
+    if not decadas:
+        # Janela após o último ano: a última década é lida apenas para manter o schema (o filtro a esvazia)
+        decadas = todas[-1:]
+    with ExitStack() as pilha:
+        tabelas = [
+            ipc.open_file(pilha.enter_context(pa.memory_map(snapshot_path(table_name, d), 'r'))).read_all()
+            for d in decadas
+        ]
+        tabela = pa.concat_tables(tabelas)
+        if ano_inicio is not None:
+            tabela = tabela.filter(pc.greater_equal(tabela['Ano'], ano_inicio))
+        return tabela.to_pandas()
+
+# Função que carrega os últimos anos de uma tabela a partir do snapshot local
+# O banco é consultado apenas para a versão; se o snapshot estiver desatualizado ele é regravado
+def load_with_snapshot(engine, table_name, anos):
+    versao = table_version(engine, table_name)
+    if versao['ano_max'] is None:
+        df = query_data(engine, table_name)
+    else:
+        # Verificação, regravação e leitura com o lock da tabela: outra gravação não remove arquivos durante a leitura
+        with _lock_tabela(table_name):
+            if snapshot_version(table_name) != versao:
+                write_snapshot(engine, table_name)
+            df = read_snapshot(table_name, versao['ano_max'] - anos)
+
+    # Versão dos dados carregados, utilizada como chave pelos caches de filtros
+    df.attrs['versao'] = (table_name, anos, versao['linhas'], versao['ano_max'], versao['revisao'])
+    return df
@@ -0,0 +1,117 @@
+import math
+import os
+
+import streamlit as st
+
+from utils.data_layer import content_revision, country_categories, selection_page, selection_summary, year_bounds
+from utils.database import get_engine
+from utils.db_queries import TIPOS, page_key
+from utils.exports import FORMATOS, export_query_file, query_export_path
+from utils.filters import normalize_filters
+from utils.functions import download_concluido, format_number
+
+# Opções de linhas por página da Tabela paginada
+TAMANHOS_PAGINA = [50, 100, 500, 1000]
+
+# Configuração das colunas da tabela (mesma formatação da Tabela em memória)
+COLUNAS = {
+    'Quantidade': st.column_config.NumberColumn('Quantidade (L)', format='%.2f'),
+    'Valor': st.column_config.NumberColumn('Valor (US$)', format='%.2f'),
+    'Ano': st.column_config.NumberColumn('Ano', format='%d'),
+}
+
+# Função chamada pelo botão "Próxima": guarda a chave da última linha da página atual
+def _proxima(estado, chave):
+    estado['cursores'].append(chave)
+
+# Função chamada pelo botão "Anterior": volta para a chave de início da página anterior
+def _anterior(estado):
+    if len(estado['cursores']) > 1:
+        estado['cursores'].pop()
+
+# Função que exibe a Tabela paginada de uma tabela do banco, com o histórico completo
+# Totais, contagem e páginas são calculados no banco: somente a página exibida é carregada no Streamlit
+# chave identifica os widgets e o estado da paginação (ex.: 'export' ou 'import')
+def paginated_table(table_name, chave):
+    # Revisão do conteúdo da tabela: identifica os resultados em cache e os arquivos de download
+    revisao = content_revision(table_name)
+    periodo = year_bounds(table_name, revisao)
+    if periodo is None:
+        st.warning('Não há dados disponíveis na tabela.')
+        return
+
+    # Filtros
+    with st.expander('Filtros'):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            paises = st.multiselect('Selecione um país', country_categories(), key=f'{chave}_paginado_paises')
+        with col2:
+            tipos = st.multiselect('Selecione os tipos', TIPOS, key=f'{chave}_paginado_tipos')
+        with col3:
+            anos = st.slider('Selecione um Período de Anos', periodo[0], periodo[1], periodo, key=f'{chave}_paginado_anos')
+    filtros = normalize_filters(paises, tipos, anos)
+
+    # Valor Total e Quantidade Total (calculados no banco)
+    resumo = selection_summary(table_name, revisao, *filtros)
+    col1, col2 = st.columns(2)
+    with col1:
+        col1.metric("💵 Valor Total (US$)", format_number(resumo['valor']))
+    with col2:
+        col2.metric("🍷 Quantidade Total (L)", format_number(resumo['quantidade']))
+
+    # Estado da paginação: chaves de início das páginas visitadas (reiniciado quando os filtros mudam)
+    tamanho = st.selectbox('Linhas por página', TAMANHOS_PAGINA, index=1, key=f'{chave}_paginado_tamanho')
+    estado = st.session_state.setdefault(f'{chave}_paginado_estado', {'filtros': None, 'cursores': [None]})
+    if estado['filtros'] != (filtros, tamanho):
+        estado['filtros'] = (filtros, tamanho)
+        estado['cursores'] = [None]
+
+    pagina = selection_page(table_name, revisao, *filtros, estado['cursores'][-1], tamanho)
+    total_paginas = max(1, math.ceil(resumo['linhas'] / tamanho))
+    numero = len(estado['cursores'])
+
+    if not pagina.empty:
+        st.dataframe(pagina, hide_index=True, width=2000, column_config=COLUNAS)
+    else:
+        st.warning("Nenhum resultado encontrado para os filtros aplicados.")
+
+    # Navegação entre as páginas
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button('⬅️ Anterior', disabled=numero == 1, on_click=_anterior, args=(estado,), key=f'{chave}_paginado_anterior')
+    with col2:
+        st.markdown(
+            f"""
+            <p style="text-align:center;">Página <span style="color:#F1145C;">{numero}</span> de {total_paginas} |
+            <span style="color:#F1145C;">{resumo['linhas']}</span> linhas</p>
+            """,
+            unsafe_allow_html=True
+        )
+    with col3:
+        ultima = numero >= total_paginas or len(pagina) < tamanho
+        st.button(
+            'Próxima ➡️', disabled=ultima, on_click=_proxima,
+            args=(estado, page_key(pagina) if not ultima else None), key=f'{chave}_paginado_proxima'
+        )
+
+    # Download da seleção: o arquivo é gerado lendo o banco página a página ao clicar em "Preparar download"
+    st.markdown('Escreva um nome para o arquivo e escolha o formato')
+    coluna1, coluna2, coluna3 = st.columns(3)
+    with coluna1:
+        nome_arquivo = st.text_input('Nome do arquivo', label_visibility='collapsed', value='dados', key=f'{chave}_paginado_nome')
+    with coluna2:
+        formato = st.selectbox('Formato', list(FORMATOS), label_visibility='collapsed', help='Para seleções grandes, prefira CSV (gzip) ou Parquet.', key=f'{chave}_paginado_formato')
+    with coluna3:
+        caminho = query_export_path(table_name, revisao, *filtros, formato)
+        estado_download = f'{chave}_paginado_download'
+        if st.session_state.get(estado_download) != caminho or not os.path.exists(caminho):
+            if st.button('Preparar download', help='Clique para gerar o arquivo com os filtros aplicados.', key=f'{chave}_paginado_preparar'):
+                with st.spinner('Gerando o arquivo...'):
+                    st.session_state[estado_download] = export_query_file(get_engine(), table_name, revisao, *filtros, formato)
+        if st.session_state.get(estado_download) == caminho and os.path.exists(caminho):
+            with open(caminho, 'rb') as arquivo:
+                st.download_button(
+                    'Download', data=arquivo, file_name=nome_arquivo + FORMATOS[formato]['extensao'],
+                    mime=FORMATOS[formato]['mime'], on_click=download_concluido, args=(estado_download,),
+                    help='Clique para fazer download dos dados.', key=f'{chave}_paginado_botao_download'
+                )
@@ -0,0 +1,67 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Número máximo de tarefas em segundo plano executando ao mesmo tempo (compartilhado por todas as sessões)
+MAX_TAREFAS = 4
+
+# Intervalo (em segundos) entre as verificações das tarefas em andamento
+INTERVALO_VERIFICACAO = 1
+
+_executor = ThreadPoolExecutor(max_workers=MAX_TAREFAS, thread_name_prefix='tarefa')
+_ids = itertools.count(1)
+
+# Função que executa a tarefa na thread do pool com o contexto da sessão que a criou (cache do Streamlit e medições)
+def _executar(ctx, funcao, args, kwargs):
+    add_script_run_ctx(threading.current_thread(), ctx)
+    return funcao(*args, **kwargs)
+
+# Função que envia uma função para execução em segundo plano, sem bloquear o rerun da sessão
+# A função deve retornar a notificação exibida ao final: (tipo, texto), com tipo 'success', 'warning' ou 'error'
+# Com progress=True a função recebe on_progress(fracao, texto) para atualizar a barra de progresso da tarefa
+def submit_task(descricao, funcao, *args, progress=False, **kwargs):
+    tarefa = {'id': next(_ids), 'descricao': descricao, 'inicio': time.time(), 'progresso': None, 'texto': descricao}
+    if progress:
+        def on_progress(fracao, texto=None):
+            tarefa['progresso'] = fracao
+            tarefa['texto'] = texto or descricao
+        kwargs['on_progress'] = on_progress
+    tarefa['futuro'] = _executor.submit(_executar, get_script_run_ctx(), funcao, args, kwargs)
+    st.session_state.setdefault('tarefas', []).append(tarefa)
+    return tarefa
+
+# Função que retorna as tarefas em segundo plano da sessão (em andamento ou ainda não notificadas)
+def pending_tasks():
+    return st.session_state.get('tarefas', [])
+
+# Função que exibe as notificações das tarefas concluídas desde o último rerun (toasts não bloqueiam a sessão)
+def show_notifications():
+    icones = {'success': '✅', 'warning': '⚠️', 'error': '❌'}
+    for tipo, texto in st.session_state.pop('notificacoes', []):
+        st.toast(texto, icon=icones.get(tipo))
+
+# Fragmento que acompanha as tarefas em andamento, atualizado sozinho a cada INTERVALO_VERIFICACAO segundos
+# Quando uma tarefa termina, a notificação é guardada e o app inteiro é executado novamente (dados atualizados)
+@st.fragment(run_every=INTERVALO_VERIFICACAO)
+def task_monitor():
+    tarefas = pending_tasks()
+    concluidas = [t for t in tarefas if t['futuro'].done()]
+    for tarefa in tarefas:
+        if tarefa in concluidas:
+            continue
+        segundos = time.time() - tarefa['inicio']
+        st.progress(tarefa['progresso'] or 0.0, text=f"{tarefa['texto']} ({segundos:.0f}s)")
+
+    if concluidas:
+        notificacoes = st.session_state.setdefault('notificacoes', [])
+        for tarefa in concluidas:
+            try:
+                notificacoes.append(tarefa['futuro'].result())
+            except Exception as e:
+                notificacoes.append(('error', f"Erro na tarefa '{tarefa['descricao']}': {e}"))
+        st.session_state['tarefas'] = [t for t in tarefas if t not in concluidas]
+        st.rerun()
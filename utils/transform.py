@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+# Colunas de identificação presentes em todos os arquivos da Embrapa
+ID_COLS = ['Id', 'País']
+
+# Função que separa, a partir do cabeçalho, as colunas de Quantidade e de Valor de cada ano
+# Os arquivos trazem cada ano duas vezes: '1970' (Quantidade) e '1970.1' (Valor)
+def split_year_columns(columns):
+    colunas_quantidade = {}
+    colunas_valor = {}
+    for coluna in columns:
+        coluna = str(coluna)
+        if coluna in ID_COLS:
+            continue
+        if '.' in coluna:
+            colunas_valor[coluna.split('.')[0]] = coluna
+        else:
+            colunas_quantidade[coluna] = coluna
+    anos = sorted(set(colunas_quantidade) | set(colunas_valor), key=int)
+    return anos, colunas_quantidade, colunas_valor
+
+# Função que monta o bloco (linhas x anos) de uma medida, preenchendo com zero os anos ausentes
+def _bloco_medida(data, anos, colunas):
+    bloco = np.zeros((len(data), len(anos)), dtype='float64')
+    for i, ano in enumerate(anos):
+        if ano in colunas:
+            bloco[:, i] = pd.to_numeric(data[colunas[ano]], errors='coerce').fillna(0).to_numpy(dtype='float64')
+    return bloco
+
+# Função que transforma o arquivo largo (um par de colunas por ano) no formato longo
+# Id, País, Ano (SMALLINT), Quantidade, Valor utilizando operações vetorizadas sobre os blocos de anos
+def wide_to_long(data):
+    data = data.rename(columns=str)
+    anos, colunas_quantidade, colunas_valor = split_year_columns(data.columns)
+    n_anos = len(anos)
+
+    # Blocos de Quantidade e Valor lado a lado, agregados por Id e País (linhas repetidas são somadas)
+    blocos = np.hstack([
+        _bloco_medida(data, anos, colunas_quantidade),
+        _bloco_medida(data, anos, colunas_valor)
+    ])
+    blocos = pd.DataFrame(blocos, index=pd.MultiIndex.from_frame(data[ID_COLS]))
+    blocos = blocos.groupby(level=ID_COLS, sort=True).sum()
+
+    chaves = blocos.index
+    n_linhas = len(chaves)
+    valores = blocos.to_numpy()
+    return pd.DataFrame({
+        'Id': np.repeat(chaves.get_level_values('Id').to_numpy(), n_anos),
+        'País': np.repeat(chaves.get_level_values('País').to_numpy(), n_anos),
+        'Ano': np.tile(np.array(anos, dtype='int16'), n_linhas),
+        'Quantidade': valores[:, :n_anos].reshape(-1),
+        'Valor': valores[:, n_anos:].reshape(-1)
+    })
+
+# Função que remove as linhas com Quantidade e Valor iguais a zero
+def drop_empty_rows(data):
+    return data[~((data['Quantidade'] == 0) & (data['Valor'] == 0))]